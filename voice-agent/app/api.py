@@ -1,13 +1,18 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, WebSocket
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 import os
+import time
 from pathlib import Path
 from app.service import voice_service
+from app.metrics import metrics
+from app.session import VoiceSession
+from app.tts_cache import TTSCache
 from app.schemas import (
-    VoiceResponse, TTSRequest, SupportedLanguage,
-    HealthResponse, VoiceProcessRequest
+    Entity, VoiceResponse, TTSRequest, SupportedLanguage,
+    HealthResponse, VoiceProcessRequest, BatchProcessRequest, BatchProcessResponse
 )
+from app.config import config
 
 router = APIRouter()
 
@@ -46,44 +51,34 @@ async def process_text(request: VoiceProcessRequest):
     Process text input directly without audio file
     """
     try:
-        # Extract intent and entities from text
-        intent = voice_service._extract_intent(request.text)
-        entities = voice_service._extract_entities(request.text)
-        confidence = voice_service._calculate_confidence(
-            request.text, intent, entities)
-
-        # Query chatbot for intelligent response
-        chatbot_response = await voice_service.query_chatbot(request.text, request.language.value)
-
-        # Get product recommendations if relevant
-        product_recommendations = []
-        if intent in ["get_product_info", "search_products"]:
-            product_recommendations = await voice_service.get_product_recommendations(intent, entities)
-
-        # Generate enhanced response
-        response_text = voice_service._generate_enhanced_response(
-            intent, entities, request.text, chatbot_response, product_recommendations)
-
-        # Generate TTS audio if requested
-        audio_url = None
-        if request.enable_tts:
-            audio_url = await voice_service._generate_tts_audio(response_text, request.language)
-
-        return VoiceResponse(
-            transcript=request.text,
-            intent=intent,
-            entities=entities,
-            confidence=confidence,
-            response_text=response_text,
-            audio_url=audio_url,
-            processing_time_ms=0,  # No processing time for text input
-            product_recommendations=product_recommendations
-        )
+        return await voice_service.process_transcript(
+            request.text, request.language, request.enable_tts)
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Text processing failed: {str(e)}")
 
 
+@router.post("/process-text/batch", response_model=BatchProcessResponse)
+async def process_text_batch(request: BatchProcessRequest):
+    """
+    Process many text inputs in one request; results keep the input order
+    and a failed item is reported in its own result
+    """
+    if not request.items:
+        raise HTTPException(status_code=400, detail="No items provided")
+    if len(request.items) > config.BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many items: {len(request.items)} (max {config.BATCH_MAX_ITEMS})")
+
+    start_time = time.time()
+    results = await voice_service.process_text_batch(request.items)
+    return BatchProcessResponse(
+        results=results,
+        processing_time_ms=int((time.time() - start_time) * 1000)
+    )
+
+
 @router.post("/text-to-speech")
 async def text_to_speech(request: TTSRequest):
     """
@@ -93,6 +88,15 @@ async def text_to_speech(request: TTSRequest):
     return {"audio_url": audio_path}
 
 
+@router.post("/text-to-speech/stream")
+async def stream_text_to_speech(request: TTSRequest):
+    """
+    Stream synthesised speech sentence by sentence as soon as the first one is ready
+    """
+    audio_stream = await voice_service.open_speech_stream(request)
+    return StreamingResponse(audio_stream, media_type=voice_service.tts_media_type())
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
@@ -102,10 +106,19 @@ async def health_check():
     return HealthResponse(
         status=health_data["status"],
         version="1.0.0",
-        services=health_data["services"]
+        services=health_data["services"],
+        dependencies=health_data["dependencies"]
     )
 
 
+@router.get("/stats")
+async def get_stats():
+    """
+    Get internal pipeline metrics (worker pool queue depth, wait times, ...)
+    """
+    return metrics.snapshot()
+
+
 @router.get("/static/audio/{filename}")
 async def get_audio_file(filename: str):
     """
@@ -139,6 +152,9 @@ async def get_supported_languages():
 async def cleanup_audio_files():
     """
     Clean up old audio files (older than 1 hour)
+
+    Cached TTS clips are left alone: the TTS cache bounds them itself and
+    may still be serving them.
     """
     try:
         audio_dir = Path("app/static/audio")
@@ -150,6 +166,8 @@ async def cleanup_audio_files():
         deleted_count = 0
 
         for audio_file in audio_dir.glob("*.wav"):
+            if audio_file.name.startswith(TTSCache.FILE_PREFIX):
+                continue
             file_age = current_time - audio_file.stat().st_mtime
             if file_age > 3600:  # 1 hour
                 audio_file.unlink()
@@ -172,24 +190,13 @@ async def search_products_by_voice(
     Search products using voice-based queries
     """
     try:
-        # Extract entities from the voice query
-        entities = voice_service._extract_entities(query)
-
-        # Get product recommendations
-        recommendations = await voice_service.get_product_recommendations("search_products", entities)
-
-        # Apply additional filters
-        if category:
-            recommendations = [p for p in recommendations if p.get(
-                'category', {}).get('name', '').lower() == category.lower()]
-
-        if price_range:
-            recommendations = [p for p in recommendations if voice_service._matches_price_range(
-                p.get('price', 0), price_range)]
+        # Filters are applied inside the index, before the top matches are picked
+        recommendations = await voice_service.search_products(
+            query, category=category, price_range=price_range, limit=limit)
 
         return {
             "query": query,
-            "products": recommendations[:limit],
+            "products": recommendations,
             "total_found": len(recommendations),
             "filters_applied": {
                 "category": category,
@@ -208,7 +215,7 @@ async def get_product_categories():
     Get all available product categories
     """
     try:
-        await voice_service.refresh_product_cache()
+        await voice_service.ensure_product_cache()
         categories = list(voice_service.category_cache.values())
         return {
             "categories": categories,
@@ -232,10 +239,10 @@ async def get_voice_recommendations(
         # Create mock entities for recommendation
         entities = []
         if category:
-            entities.append(voice_service.Entity(
+            entities.append(Entity(
                 type="category", value=category, confidence=0.9))
         if price_max:
-            entities.append(voice_service.Entity(
+            entities.append(Entity(
                 type="price_range", value=f"under_{price_max}", confidence=0.8))
 
         recommendations = await voice_service.get_product_recommendations(
@@ -274,6 +281,26 @@ async def query_chatbot_via_voice(
             status_code=500, detail=f"Chatbot query failed: {str(e)}")
 
 
+@router.websocket("/session")
+async def voice_session(
+    websocket: WebSocket,
+    language: SupportedLanguage = SupportedLanguage.VIETNAMESE,
+    enable_tts: bool = True,
+    sample_rate: int = 16000
+):
+    """
+    Duplex voice session: stream PCM in, get partial/final results and TTS audio back
+    """
+    await websocket.accept()
+    if not 8000 <= sample_rate <= 48000:
+        await websocket.close(code=1003, reason="sample_rate must be 8000-48000 Hz")
+        return
+
+    session = VoiceSession(
+        websocket, voice_service, language, enable_tts, sample_rate)
+    await session.run()
+
+
 @router.get("/voice/stream")
 async def stream_voice_response(
     query: str,
@@ -287,11 +314,9 @@ async def stream_voice_response(
         intent = voice_service._extract_intent(query)
         entities = voice_service._extract_entities(query)
 
-        # Get chatbot response
-        chatbot_response = await voice_service.query_chatbot(query, language.value)
-
-        # Get product recommendations
-        product_recommendations = await voice_service.get_product_recommendations(intent, entities)
+        # Get chatbot response and product recommendations concurrently
+        chatbot_response, product_recommendations = await voice_service.fan_out(
+            query, language, intent, entities, with_products=True)
 
         # Generate response
         response_text = voice_service._generate_enhanced_response(
@@ -0,0 +1,149 @@
+import io
+import os
+import struct
+import tempfile
+import wave
+from math import gcd
+from typing import Optional, Tuple
+
+import numpy as np
+import soundfile as sf
+
+try:
+    import soxr
+except ImportError:  # soxr ships with librosa, but keep a polyphase fallback
+    soxr = None
+
+# Audio format expected by the speech recognizer: 16 kHz mono 16-bit PCM
+TARGET_SAMPLE_RATE = 16000
+PCM_SAMPLE_WIDTH = 2
+
+
+def float_to_pcm16(audio: np.ndarray) -> bytes:
+    """Convert float samples in [-1, 1] to little-endian 16-bit PCM bytes"""
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+
+
+def resample(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+    """Resample mono float audio to TARGET_SAMPLE_RATE"""
+    if sample_rate == TARGET_SAMPLE_RATE:
+        return audio
+    if soxr is not None:
+        return soxr.resample(audio, sample_rate, TARGET_SAMPLE_RATE, quality='HQ')
+
+    from scipy.signal import resample_poly
+    divisor = gcd(sample_rate, TARGET_SAMPLE_RATE)
+    return resample_poly(audio, TARGET_SAMPLE_RATE // divisor, sample_rate // divisor)
+
+
+def _decode_pcm_wav(data: bytes) -> Optional[Tuple[np.ndarray, int, bytes]]:
+    """Parse plain 16-bit PCM WAV with the stdlib reader
+
+    Returns (samples, sample_rate, raw frames) or None when the data is not
+    a 16-bit PCM WAV, in which case the general decoder takes over.
+    """
+    try:
+        with wave.open(io.BytesIO(data), 'rb') as wav_file:
+            if wav_file.getsampwidth() != PCM_SAMPLE_WIDTH:
+                return None
+            channels = wav_file.getnchannels()
+            sample_rate = wav_file.getframerate()
+            frames = wav_file.readframes(wav_file.getnframes())
+    except (wave.Error, EOFError):
+        return None
+
+    samples = np.frombuffer(frames, dtype='<i2')
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples.astype(np.float32) / 32768.0, sample_rate, frames if channels == 1 else b''
+
+
+def _decode_with_ffmpeg(data: bytes, suffix: str) -> Tuple[np.ndarray, int]:
+    """Disk fallback for containers libsndfile cannot read (e.g. m4a)"""
+    import librosa
+
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        # librosa hands these formats to audioread/ffmpeg
+        audio, sample_rate = librosa.load(path, sr=None, mono=True)
+        return audio, sample_rate
+    finally:
+        os.unlink(path)
+
+
+def decode_to_pcm(data: bytes, suffix: str) -> bytes:
+    """Decode uploaded audio bytes to 16 kHz mono 16-bit PCM
+
+    Tiered so the common cases stay cheap:
+    1. 16 kHz mono 16-bit WAV is passed through untouched.
+    2. Other PCM WAV, FLAC, OGG and MP3 are decoded from memory and
+       resampled with soxr (polyphase fallback).
+    3. Only containers that need ffmpeg (m4a) go through librosa and a
+       temporary file.
+
+    Runs inside the decode worker processes, so it must stay a picklable
+    module-level function.
+    """
+    decoded = _decode_pcm_wav(data) if suffix == '.wav' else None
+    if decoded is not None:
+        audio, sample_rate, frames = decoded
+        if sample_rate == TARGET_SAMPLE_RATE and frames:
+            return frames
+    else:
+        try:
+            audio, sample_rate = sf.read(
+                io.BytesIO(data), dtype='float32', always_2d=True)
+            audio = audio.mean(axis=1)
+        except RuntimeError:
+            audio, sample_rate = _decode_with_ffmpeg(data, suffix)
+
+    return float_to_pcm16(resample(audio, sample_rate))
+
+
+def split_wav(data: bytes) -> Tuple[Tuple[int, int, int], bytes]:
+    """Return ((channels, sample width, sample rate), raw frames) of a PCM WAV"""
+    with wave.open(io.BytesIO(data), 'rb') as wav_file:
+        params = (wav_file.getnchannels(), wav_file.getsampwidth(), wav_file.getframerate())
+        return params, wav_file.readframes(wav_file.getnframes())
+
+
+def pcm_to_wav(frames: bytes, channels: int, sample_width: int, sample_rate: int) -> bytes:
+    """Wrap raw PCM frames in a WAV container"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(sample_width)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(frames)
+    return buffer.getvalue()
+
+
+def wav_stream_header(channels: int, sample_width: int, sample_rate: int) -> bytes:
+    """WAV header for a stream of unknown length (sizes set to the maximum)"""
+    byte_rate = sample_rate * channels * sample_width
+    return (b'RIFF' + struct.pack('<I', 0xFFFFFFFF) + b'WAVE' +
+            b'fmt ' + struct.pack('<IHHIIHH', 16, 1, channels, sample_rate,
+                                  byte_rate, channels * sample_width, sample_width * 8) +
+            b'data' + struct.pack('<I', 0xFFFFFFFF))
+
+
+class StreamResampler:
+    """Incremental resampler from a live 16-bit mono PCM stream to TARGET_SAMPLE_RATE"""
+
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._stream = None
+        if sample_rate != TARGET_SAMPLE_RATE and soxr is not None:
+            # Keeps filter state between chunks, so frame edges don't click
+            self._stream = soxr.ResampleStream(
+                sample_rate, TARGET_SAMPLE_RATE, 1, dtype='float32')
+
+    def process(self, pcm: bytes) -> bytes:
+        if self.sample_rate == TARGET_SAMPLE_RATE:
+            return pcm
+        audio = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+        if self._stream is not None:
+            return float_to_pcm16(self._stream.resample_chunk(audio))
+        return float_to_pcm16(resample(audio, self.sample_rate))
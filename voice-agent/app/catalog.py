@@ -0,0 +1,316 @@
+import sys
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+from .fuzzy import NGramIndex, edit_distance, max_edits, normalize_text
+
+# Price thresholds used by the "rẻ/cheap" and "đắt/expensive" price ranges
+CHEAP_PRICE_LIMIT = 2000000  # Under 2M VND
+EXPENSIVE_PRICE_LIMIT = 3000000  # Over 3M VND
+
+# Relevance weights for product recommendations
+NAME_MATCH_SCORE = 10
+CATEGORY_MATCH_SCORE = 8
+PRICE_MATCH_SCORE = 5
+# Fuzzy (typo-tolerant) matches, only tried for values with no exact match
+FUZZY_NAME_MATCH_SCORE = 7
+FUZZY_CATEGORY_MATCH_SCORE = 6
+
+
+def price_range_mask(prices: np.ndarray, price_range: str,
+                     levels: bool = False) -> Optional[np.ndarray]:
+    """Boolean mask of the prices inside a price range, None if the range sets no limit
+
+    Understands ``under_<price>``, ``over_<price>``, rẻ/cheap and
+    đắt/expensive; with ``levels``, also the bare "low" and "high" the
+    search filter accepts. Scoring leaves those out, like the full scan it
+    replaced; unlike that scan it also scores ``under_``/``over_``, which
+    the recommendations endpoint builds from ``price_max``. Missing prices
+    are NaN and never match.
+    """
+    value = price_range.lower()
+    try:
+        if value.startswith("under_"):
+            return prices <= float(value.split("_")[1])
+        if value.startswith("over_"):
+            return prices >= float(value.split("_")[1])
+    except ValueError:
+        return None
+    if (levels and value == "low") or 'rẻ' in value or 'cheap' in value:
+        return prices < CHEAP_PRICE_LIMIT
+    if (levels and value == "high") or 'đắt' in value or 'expensive' in value:
+        return prices > EXPENSIVE_PRICE_LIMIT
+    return None
+
+
+class ProductIndex:
+    """Columnar product table with an inverted name index over the product cache.
+
+    Built once per full catalog sync; delta syncs patch it in place with
+    ``apply_delta``. Names are normalised (lowercase, no diacritics),
+    interned and indexed by token, so name matching only touches candidate
+    products. A value with no exact match falls back to typo-tolerant
+    matching through a character n-gram index over the name tokens, at a
+    lower score. Prices and category ids live
+    in NumPy columns, so category and price-range scoring, filters and the
+    top-k selection run as vectorised operations, and product dicts are
+    only built for the returned top matches. Scores and ordering are
+    identical to a full scan of the cache for values that match exactly.
+    """
+
+    # Upper bound on memoised fragment -> token lookups
+    MAX_FRAGMENT_CACHE = 2048
+    # Smallest column capacity; columns double when full
+    MIN_CAPACITY = 64
+
+    def __init__(self, product_cache: Dict[Any, Dict[str, Any]], fuzzy: bool = True):
+        # Removed products leave a None slot so other positions stay stable
+        self.products: List[Optional[Dict[str, Any]]] = []
+        self._names: List[str] = []
+        self._positions_by_id: Dict[Any, int] = {}
+        self._token_postings: Dict[str, List[int]] = {}
+        self._fragment_cache: Dict[str, Set[int]] = {}
+        # Name tokens without digits, for typo-tolerant lookups
+        self._fuzzy_index: Optional[NGramIndex] = NGramIndex() if fuzzy else None
+        self._fuzzy_cache: Dict[str, Set[int]] = {}
+        # Interned lowercase category names; the category column holds their codes
+        self._category_names: List[str] = []
+        self._category_codes: Dict[str, int] = {}
+        # Columns, valid up to len(self.products); NaN price / -1 category when unknown
+        capacity = max(self.MIN_CAPACITY, len(product_cache))
+        self._price_column = np.full(capacity, np.nan)
+        self._category_column = np.full(capacity, -1, dtype=np.int32)
+        self.removed = 0
+
+        for product in product_cache.values():
+            self._append(product)
+
+    @staticmethod
+    def _price(product: Dict[str, Any]) -> float:
+        try:
+            return float(product['price'])
+        except (KeyError, TypeError, ValueError):
+            return np.nan
+
+    def _category_code(self, product: Dict[str, Any]) -> int:
+        category = product.get('category')
+        if not category or category.get('name') is None:
+            return -1
+        name = normalize_text(str(category['name']))
+        code = self._category_codes.get(name)
+        if code is None:
+            code = len(self._category_names)
+            self._category_names.append(name)
+            self._category_codes[name] = code
+        return code
+
+    def _append(self, product: Dict[str, Any]) -> int:
+        """Add a product at a new position, growing the columns if needed"""
+        position = len(self.products)
+        if position == len(self._price_column):
+            capacity = 2 * position
+            self._price_column = np.concatenate(
+                [self._price_column, np.full(capacity - position, np.nan)])
+            self._category_column = np.concatenate(
+                [self._category_column, np.full(capacity - position, -1, dtype=np.int32)])
+        self.products.append(None)
+        self._names.append('')
+        self._fill(position, product)
+        return position
+
+    def _fill(self, position: int, product: Dict[str, Any]):
+        self.products[position] = product
+        self._positions_by_id[product.get('id')] = position
+        name = sys.intern(normalize_text(str(product.get('name') or '')))
+        self._names[position] = name
+        for token in set(name.split()):
+            postings = self._token_postings.get(token)
+            if postings is None:
+                postings = self._token_postings[token] = []
+                if self._fuzzy_index is not None and not any(char.isdigit() for char in token):
+                    self._fuzzy_index.add(token)
+            postings.append(position)
+        self._price_column[position] = self._price(product)
+        self._category_column[position] = self._category_code(product)
+
+    def _clear(self, position: int):
+        """Drop the product at position from the postings and columns, leaving the slot empty"""
+        product = self.products[position]
+        for token in set(self._names[position].split()):
+            postings = self._token_postings[token]
+            postings.remove(position)
+            if not postings:
+                del self._token_postings[token]
+                if self._fuzzy_index is not None:
+                    self._fuzzy_index.discard(token)
+
+        del self._positions_by_id[product.get('id')]
+        self.products[position] = None
+        self._names[position] = ''
+        self._price_column[position] = np.nan
+        self._category_column[position] = -1
+
+    def apply_delta(self, upserts: Iterable[Dict[str, Any]], removed_ids: Iterable[Any]):
+        """Patch the index with changed/new products and removed product ids.
+
+        A changed product keeps its position (and so its place in ties);
+        new products are appended. Cost is proportional to the delta, not
+        the catalog. Runs synchronously, so readers on the event loop never
+        see a half-applied delta.
+        """
+        for product_id in removed_ids:
+            position = self._positions_by_id.get(product_id)
+            if position is not None:
+                self._clear(position)
+                self.removed += 1
+
+        for product in upserts:
+            position = self._positions_by_id.get(product.get('id'))
+            if position is None:
+                self._append(product)
+            else:
+                self._clear(position)
+                self._fill(position, product)
+
+        self._fragment_cache.clear()
+        self._fuzzy_cache.clear()
+
+    def __len__(self) -> int:
+        return len(self.products) - self.removed
+
+    def _positions_containing(self, fragment: str) -> Set[int]:
+        """Return products with a name token that contains the fragment"""
+        positions = self._fragment_cache.get(fragment)
+        if positions is None:
+            positions = set()
+            for token, postings in self._token_postings.items():
+                if fragment in token:
+                    positions.update(postings)
+            if len(self._fragment_cache) >= self.MAX_FRAGMENT_CACHE:
+                self._fragment_cache.clear()
+            self._fragment_cache[fragment] = positions
+        return positions
+
+    def _name_candidates(self, names: Iterable[str]) -> Iterable[int]:
+        """Return a superset of the products whose name contains any of names"""
+        candidates: Set[int] = set()
+        for name in names:
+            tokens = name.split()
+            if not tokens:
+                # Whitespace-only values can match anywhere
+                return [position for position, product in enumerate(self.products)
+                        if product is not None]
+            # The first token of a substring always lies inside one name token
+            candidates |= self._positions_containing(tokens[0])
+        return candidates
+
+    def _fuzzy_token_positions(self, token: str) -> Set[int]:
+        """Products with a name token containing token, or within a few edits of it"""
+        positions = self._fuzzy_cache.get(token)
+        if positions is None:
+            positions = set(self._positions_containing(token))
+            for similar in self._fuzzy_index.lookup(token, max_edits(token)):
+                positions.update(self._token_postings[similar])
+            if len(self._fuzzy_cache) >= self.MAX_FRAGMENT_CACHE:
+                self._fuzzy_cache.clear()
+            self._fuzzy_cache[token] = positions
+        return positions
+
+    def _fuzzy_name_matches(self, name: str) -> Set[int]:
+        """Products whose name matches every token of name, allowing typos and any order"""
+        matches: Optional[Set[int]] = None
+        for token in name.split():
+            positions = self._fuzzy_token_positions(token)
+            matches = set(positions) if matches is None else matches & positions
+            if not matches:
+                break
+        return matches or set()
+
+    def _categories_fuzzy(self, value: str) -> List[int]:
+        """Codes of the categories with a token near each token of value"""
+        tokens = value.split()
+        return [code for code, category_name in enumerate(self._category_names)
+                if tokens and all(any(token in category_token or
+                                      edit_distance(token, category_token, max_edits(token)) <= max_edits(token)
+                                      for category_token in category_name.split())
+                                  for token in tokens)]
+
+    def _categories_matching(self, values: List[str], exact: bool = False) -> List[int]:
+        """Codes of the interned categories whose name contains (or equals) any value"""
+        return [code for code, category_name in enumerate(self._category_names)
+                if any(value == category_name if exact else value in category_name
+                       for value in values)]
+
+    def recommend(self, product_names: List[str], categories: List[str],
+                  price_ranges: List[str], limit: int = 5,
+                  category_filter: Optional[str] = None,
+                  price_filter: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Score products against the extracted entities and return the top matches
+
+        ``category_filter`` (exact category name) and ``price_filter`` (a
+        price range) restrict the scored products before the top ``limit``
+        are picked.
+        """
+        size = len(self.products)
+        if limit <= 0 or size == 0:
+            return []
+        scores = np.zeros(size, dtype=np.int64)
+        prices = self._price_column[:size]
+        category_column = self._category_column[:size]
+
+        # Product name match
+        names = [normalize_text(name) for name in product_names]
+        exact: Set[int] = set()
+        fuzzy: Set[int] = set()
+        for name in names:
+            matched = [position for position in self._name_candidates([name])
+                       if name in self._names[position]]
+            exact.update(matched)
+            if not matched and self._fuzzy_index is not None:
+                fuzzy |= self._fuzzy_name_matches(name)
+        if fuzzy:
+            scores[np.array(list(fuzzy - exact), dtype=np.intp)] = FUZZY_NAME_MATCH_SCORE
+        if exact:
+            scores[np.array(list(exact), dtype=np.intp)] = NAME_MATCH_SCORE
+
+        # Category match
+        codes: List[int] = []
+        fuzzy_codes: List[int] = []
+        for value in (normalize_text(category) for category in categories):
+            matched = self._categories_matching([value])
+            codes.extend(matched)
+            if not matched and self._fuzzy_index is not None:
+                fuzzy_codes.extend(self._categories_fuzzy(value))
+        fuzzy_codes = [code for code in fuzzy_codes if code not in codes]
+        if codes:
+            scores[np.isin(category_column, codes)] += CATEGORY_MATCH_SCORE
+        if fuzzy_codes:
+            scores[np.isin(category_column, fuzzy_codes)] += FUZZY_CATEGORY_MATCH_SCORE
+
+        # Price range match
+        for price_range in price_ranges:
+            mask = price_range_mask(prices, price_range)
+            if mask is not None:
+                scores[mask] += PRICE_MATCH_SCORE
+
+        selected = scores > 0
+        if category_filter:
+            selected &= np.isin(category_column,
+                                self._categories_matching([normalize_text(category_filter)], exact=True))
+        if price_filter:
+            mask = price_range_mask(prices, price_filter, levels=True)
+            if mask is not None:
+                selected &= mask
+
+        # Highest score first, ties keep catalog order: one unique key per product
+        candidates = np.flatnonzero(selected)
+        keys = candidates - scores[candidates] * size
+        if len(candidates) > limit:
+            top = np.argpartition(keys, limit - 1)[:limit]
+            candidates, keys = candidates[top], keys[top]
+        top = candidates[np.argsort(keys)]
+        return [
+            {**self.products[position], 'relevance_score': int(scores[position])}
+            for position in top.tolist()
+        ]
@@ -0,0 +1,77 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+import msgpack
+
+logger = logging.getLogger(__name__)
+
+# Bump when the snapshot layout changes; older files are ignored
+SNAPSHOT_VERSION = 1
+
+
+class CatalogSnapshot(NamedTuple):
+    """Catalog state persisted between restarts"""
+    products: Dict[Any, Dict[str, Any]]
+    categories: Dict[Any, Dict[str, Any]]
+    sync_state: Dict[str, Any]  # CatalogSync page ETags, so the next sync can be a delta
+    saved_at: float
+
+
+def save_snapshot(path: Path, backend_api_url: str, products: Dict[Any, Dict[str, Any]],
+                  categories: Dict[Any, Dict[str, Any]], sync_state: Dict[str, Any]) -> int:
+    """Write the catalog to a msgpack file atomically and return its size (blocking)"""
+    payload = msgpack.packb({
+        "version": SNAPSHOT_VERSION,
+        "backend_api_url": backend_api_url,
+        "saved_at": time.time(),
+        # Lists keep catalog order; the dicts are rebuilt by id on load
+        "products": list(products.values()),
+        "categories": list(categories.values()),
+        "sync_state": sync_state,
+    }, use_bin_type=True)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with open(temp_path, "wb") as snapshot_file:
+        snapshot_file.write(payload)
+    # Readers see either the old or the new file, never a partial one
+    os.replace(temp_path, path)
+    return len(payload)
+
+
+def load_snapshot(path: Path, backend_api_url: str, max_age_seconds: float) -> Optional[CatalogSnapshot]:
+    """Read a snapshot written by save_snapshot, or None if missing, stale or unusable (blocking)"""
+    path = Path(path)
+    if not path.is_file():
+        return None
+    try:
+        with open(path, "rb") as snapshot_file:
+            data = msgpack.unpackb(snapshot_file.read(), raw=False, strict_map_key=False)
+    except (OSError, ValueError, msgpack.UnpackException) as e:
+        logger.warning(f"Ignoring unreadable product snapshot {path}: {str(e)}")
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != SNAPSHOT_VERSION:
+        logger.info(f"Ignoring product snapshot {path}: different format version")
+        return None
+    if data.get("backend_api_url") != backend_api_url:
+        logger.info(f"Ignoring product snapshot {path}: taken from another backend")
+        return None
+    try:
+        age = time.time() - data["saved_at"]
+        if max_age_seconds and age > max_age_seconds:
+            logger.info(f"Ignoring product snapshot {path}: {age:.0f}s old")
+            return None
+        return CatalogSnapshot(
+            products={p['id']: p for p in data["products"]},
+            categories={c['id']: c for c in data["categories"]},
+            sync_state=data.get("sync_state") or {},
+            saved_at=data["saved_at"],
+        )
+    except (KeyError, TypeError) as e:
+        logger.warning(f"Ignoring malformed product snapshot {path}: {str(e)}")
+        return None
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .circuit_breaker import CircuitBreaker
+from .http_client import http_client
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogChanges(NamedTuple):
+    """What one catalog sync found"""
+    full: bool  # products is the whole catalog, to be indexed from scratch
+    products: Dict[Any, Dict[str, Any]]  # whole catalog, or only new/changed products
+    removed_ids: Set[Any]
+    categories: Optional[Dict[Any, Dict[str, Any]]]  # None when unchanged
+    pages_fetched: int
+    pages_unchanged: int
+
+
+class PageState(NamedTuple):
+    etag: Optional[str]
+    ids: List[Any]
+
+
+class CatalogSync:
+    """Keeps a copy of the backend catalog in step with as little transfer as possible.
+
+    The product listing is paginated, so every sync walks all pages. The
+    first sync (and every ``full_every``-th one after it, to heal drift)
+    downloads them all. Later syncs send each page's ETag as If-None-Match,
+    so unchanged pages come back as an empty 304, and the products of
+    changed pages are diffed against the cache so only new or changed ones
+    are re-indexed. Products no page lists any more are reported removed.
+    Page state is only committed once every page was read, so a failed sync
+    leaves the next one to start from the last good state. With a
+    ``breaker``, every request gets its adaptive timeout and a backend that
+    keeps failing fails the sync fast.
+    """
+
+    def __init__(self, backend_api_url: str, page_size: int, concurrency: int,
+                 delta: bool = True, full_every: int = 0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.backend_api_url = backend_api_url
+        self.page_size = page_size
+        self.concurrency = max(1, concurrency)
+        self.delta = delta
+        self.full_every = full_every
+        self.breaker = breaker
+        self._pages: Dict[int, PageState] = {}
+        self._categories_etag: Optional[str] = None
+        self._syncs = 0
+
+    def reset(self):
+        """Forget page state so the next sync downloads everything"""
+        self._pages = {}
+        self._categories_etag = None
+
+    def state(self) -> Dict[str, Any]:
+        """Page ETags and ids, for persisting alongside the catalog"""
+        return {
+            "pages": [[page, state.etag, state.ids] for page, state in self._pages.items()],
+            "categories_etag": self._categories_etag,
+            "syncs": self._syncs,
+        }
+
+    def restore(self, state: Dict[str, Any]):
+        """Resume from a persisted state so the next sync can be a delta"""
+        try:
+            pages = {int(page): PageState(etag, list(ids)) for page, etag, ids in state.get("pages", [])}
+        except (TypeError, ValueError):
+            logger.warning("Ignoring malformed catalog sync state")
+            return
+        # The page walk relies on pages 1..N all being known
+        if sorted(pages) != list(range(1, len(pages) + 1)):
+            return
+        self._pages = pages
+        self._categories_etag = state.get("categories_etag")
+        self._syncs = int(state.get("syncs") or 0)
+
+    async def _get(self, url: str, etag: Optional[str]) -> Tuple[int, Any, Optional[str]]:
+        if self.breaker is None:
+            return await http_client.get_json_if_changed(url, etag)
+        return await self.breaker.call(
+            http_client.get_json_if_changed, url, etag, is_failure=lambda result: result[0] >= 500)
+
+    def _page_url(self, page: int) -> str:
+        return f"{self.backend_api_url}/products?page={page}&limit={self.page_size}"
+
+    async def _fetch_page(self, page: int, conditional: bool) -> Tuple[int, Optional[dict], Optional[str]]:
+        known = self._pages.get(page)
+        etag = known.etag if conditional and known is not None else None
+        status, data, etag = await self._get(self._page_url(page), etag)
+        if status == 304 and known is None:
+            # Only possible if the backend ignores our (absent) ETag; treat as an error
+            raise RuntimeError(f"Backend returned 304 for unknown products page {page}")
+        if status not in (200, 304):
+            raise RuntimeError(f"Backend returned {status} for products page {page}")
+        return status, (data or {}).get("data", {}), etag
+
+    async def _fetch_categories(self, conditional: bool) -> Tuple[Optional[Dict[Any, Dict[str, Any]]], Optional[str]]:
+        """Return (categories or None when unchanged/unavailable, ETag)"""
+        status, data, etag = await self._get(
+            f"{self.backend_api_url}/products/categories/all",
+            self._categories_etag if conditional else None)
+        if status == 304:
+            return None, etag
+        if status != 200:
+            logger.warning(f"Backend returned {status} for categories, keeping the previous ones")
+            return None, self._categories_etag
+        categories = (data or {}).get("data", {}).get("categories", [])
+        return {c['id']: c for c in categories}, etag
+
+    async def sync(self, current: Dict[Any, Dict[str, Any]]) -> CatalogChanges:
+        """Walk the catalog and return what changed relative to ``current``"""
+        full = (not self.delta or not self._pages or
+                (self.full_every > 0 and self._syncs % self.full_every == 0))
+        conditional = not full
+
+        # Page 1 tells how many pages there are; fetch the rest concurrently
+        first, (categories, categories_etag) = await asyncio.gather(
+            self._fetch_page(1, conditional), self._fetch_categories(conditional))
+        if first[0] == 304:
+            # Page 1 carries the totals, so an unchanged page 1 means the same page count
+            page_count = len(self._pages)
+        else:
+            pagination = first[1].get("pagination") or {}
+            page_count = max(1, int(pagination.get("pages") or 1))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(page: int):
+            async with semaphore:
+                return await self._fetch_page(page, conditional)
+
+        rest = await asyncio.gather(*(fetch(page) for page in range(2, page_count + 1)))
+
+        pages: Dict[int, PageState] = {}
+        fetched: Dict[Any, Dict[str, Any]] = {}
+        listed: Set[Any] = set()
+        unchanged = 0
+        for page, (status, data, etag) in enumerate([first] + rest, start=1):
+            if status == 304:
+                ids = self._pages[page].ids
+                unchanged += 1
+            else:
+                products = data.get("products", [])
+                ids = [p['id'] for p in products]
+                for product in products:
+                    fetched[product['id']] = product
+            pages[page] = PageState(etag, ids)
+            listed.update(ids)
+
+        self._pages = pages
+        self._categories_etag = categories_etag
+        self._syncs += 1
+
+        if full:
+            return CatalogChanges(True, fetched, set(), categories,
+                                  page_count - unchanged, unchanged)
+
+        upserts = {
+            product_id: product for product_id, product in fetched.items()
+            if current.get(product_id) != product
+        }
+        removed_ids = set(current) - listed
+        return CatalogChanges(False, upserts, removed_ids, categories,
+                              page_count - unchanged, unchanged)
@@ -0,0 +1,113 @@
+import asyncio
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from .metrics import metrics
+
+chatbot_cache_hits = metrics.counter(
+    "voice_chatbot_cache_hits_total", "Chatbot queries answered from the response cache or a shared in-flight request")
+chatbot_cache_misses = metrics.counter(
+    "voice_chatbot_cache_misses_total", "Chatbot queries sent to the backend")
+chatbot_cache_evictions = metrics.counter(
+    "voice_chatbot_cache_evictions_total", "Cached chatbot responses evicted for the entry limit")
+chatbot_cache_entries = metrics.gauge(
+    "voice_chatbot_cache_entries", "Chatbot responses currently cached")
+chatbot_cache_hit_ratio = metrics.gauge(
+    "voice_chatbot_cache_hit_ratio", "Share of chatbot queries not sent to the backend")
+
+# Punctuation STT and typing add or drop without changing the question
+_TRAILING_PUNCTUATION = re.compile(r"[\s.,!?…]+$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+class ChatbotCache:
+    """LRU cache of chatbot responses with a TTL, keyed on (normalised text, language).
+
+    Concurrent misses for the same key share one backend request, which
+    runs as its own task: a caller that gives up at its deadline does not
+    cancel it for the others, and its answer is still cached for the next
+    identical utterance. Only non-empty responses are cached, so a failed
+    request is retried by the next query.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], asyncio.Future] = {}
+
+        chatbot_cache_entries.set_function(lambda: len(self._entries))
+        chatbot_cache_hit_ratio.set_function(self.hit_ratio)
+
+    @staticmethod
+    def key(text: str, language: str) -> Tuple[str, str]:
+        """Cache key: case, spacing and trailing punctuation do not matter, diacritics do"""
+        text = unicodedata.normalize("NFC", text).lower()
+        text = _WHITESPACE.sub(" ", _TRAILING_PUNCTUATION.sub("", text)).strip()
+        return text, language
+
+    @staticmethod
+    def hit_ratio() -> float:
+        hits, misses = chatbot_cache_hits.get(), chatbot_cache_misses.get()
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _lookup(self, key: Tuple[str, str]):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, response = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    def _store(self, key: Tuple[str, str], response: Dict[str, Any]):
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            chatbot_cache_evictions.inc()
+
+    async def _fetch(self, key: Tuple[str, str], fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        try:
+            response = await fetch()
+            if response:
+                self._store(key, response)
+            return response
+        finally:
+            del self._in_flight[key]
+
+    async def get_or_fetch(self, text: str, language: str,
+                           fetch: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Return the cached response for an utterance, or fetch it once for all concurrent callers"""
+        if not self.enabled:
+            chatbot_cache_misses.inc()
+            return await fetch()
+
+        key = self.key(text, language)
+        response = self._lookup(key)
+        if response is not None:
+            chatbot_cache_hits.inc()
+            return response
+
+        task = self._in_flight.get(key)
+        if task is None:
+            chatbot_cache_misses.inc()
+            task = self._in_flight[key] = asyncio.ensure_future(self._fetch(key, fetch))
+        else:
+            chatbot_cache_hits.inc()
+        return await asyncio.shield(task)
@@ -0,0 +1,203 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Type
+
+from .config import config
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+circuit_state = metrics.gauge(
+    "voice_circuit_breaker_state", "Dependency circuit state: 0 closed, 1 half-open, 2 open")
+circuit_rejections = metrics.counter(
+    "voice_circuit_breaker_rejections_total", "Dependency calls failed fast because the circuit was open")
+circuit_opened = metrics.counter(
+    "voice_circuit_breaker_opened_total", "Times a dependency circuit opened")
+dependency_timeout = metrics.gauge(
+    "voice_dependency_timeout_seconds",
+    "Current timeout of a dependency per call, or per unit of work (character, audio second)")
+dependency_failures = metrics.counter(
+    "voice_dependency_failures_total", "Failed dependency calls (errors and timeouts)")
+
+
+class CircuitOpenError(Exception):
+    """The dependency's circuit is open; the call was not attempted"""
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over the recent calls to one dependency.
+
+    The last ``window_size`` calls are kept. Once at least ``min_calls`` of
+    them are in and ``failure_rate`` or more failed (errors, timeouts or
+    results ``is_failure`` rejects), the circuit opens and calls fail fast
+    with CircuitOpenError for ``open_seconds``. Then one trial call is let
+    through: success closes the circuit, failure opens it again.
+
+    With ``adaptive`` set, each call's timeout is ``timeout_multiplier``
+    times the p99 latency of recent successful calls, kept between
+    ``min_timeout`` and ``max_timeout``; until there are ``min_calls``
+    samples, and without ``adaptive``, it is ``max_timeout``. For
+    dependencies whose latency grows with the input (speech per audio
+    second, synthesis per character) calls pass a ``cost`` in ``unit``s:
+    latencies are kept per unit and the timeout scales with the call's
+    cost, so a p99 learned on short greetings does not time out long
+    replies. Exceptions in ``excluded`` (e.g. our own overload) pass
+    through without counting.
+    """
+
+    CLOSED = "closed"
+    HALF_OPEN = "half_open"
+    OPEN = "open"
+    STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+    def __init__(self, name: str, max_timeout: float, adaptive: bool = True,
+                 window_size: int = 50, min_calls: int = 5, failure_rate: float = 0.5,
+                 open_seconds: float = 15.0, min_timeout: float = 1.0,
+                 timeout_multiplier: float = 2.0,
+                 excluded: Tuple[Type[BaseException], ...] = (), unit: str = "call"):
+        self.name = name
+        self.unit = unit
+        self.max_timeout = max_timeout
+        self.adaptive = adaptive
+        self.min_calls = max(1, min_calls)
+        self.failure_rate = failure_rate
+        self.open_seconds = open_seconds
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.timeout_multiplier = timeout_multiplier
+        self.excluded = excluded
+        self.state = self.CLOSED
+        self._outcomes: deque = deque(maxlen=max(1, window_size))  # True = success
+        self._latencies: deque = deque(maxlen=max(1, window_size))  # seconds per unit, successes only
+        self._opened_at = 0.0
+        self._probing = False
+
+        circuit_state.set_function(lambda: self.STATE_VALUES[self.state], dependency=name)
+        dependency_timeout.set_function(self.timeout, dependency=name)
+
+    def latency_p99(self) -> Optional[float]:
+        """p99 latency per unit of recent successful calls, None without samples"""
+        if not self._latencies:
+            return None
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, math.ceil(0.99 * len(latencies)) - 1)]
+
+    def error_rate(self) -> float:
+        if not self._outcomes:
+            return 0.0
+        return self._outcomes.count(False) / len(self._outcomes)
+
+    def timeout(self, cost: float = 1.0) -> float:
+        """Timeout for a call of the given cost"""
+        if not self.adaptive or len(self._latencies) < self.min_calls:
+            return self.max_timeout
+        return min(self.max_timeout,
+                   max(self.min_timeout, self.latency_p99() * self.timeout_multiplier * cost))
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN
+
+    def _set_state(self, state: str):
+        if state == self.state:
+            return
+        self.state = state
+        if state == self.OPEN:
+            self._opened_at = time.monotonic()
+            circuit_opened.inc(dependency=self.name)
+            logger.warning(
+                f"{self.name} circuit opened: {self.error_rate():.0%} of the last "
+                f"{len(self._outcomes)} calls failed; failing fast for {self.open_seconds:.0f}s")
+        elif state == self.CLOSED:
+            logger.info(f"{self.name} circuit closed")
+
+    def _before_call(self) -> bool:
+        """Let a call through or raise CircuitOpenError; True for the half-open trial call"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                circuit_rejections.inc(dependency=self.name)
+                raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+            self._set_state(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probing:
+                circuit_rejections.inc(dependency=self.name)
+                raise CircuitOpenError(f"{self.name} is unavailable (circuit half-open)")
+            self._probing = True
+            return True
+        return False
+
+    def _record(self, success: bool, latency: float, trial: bool):
+        """Record an outcome; latency is per unit of cost"""
+        if not success:
+            dependency_failures.inc(dependency=self.name)
+        if trial:
+            self._probing = False
+            if success:
+                self._outcomes.clear()
+                self._outcomes.append(True)
+                self._latencies.append(latency)
+                self._set_state(self.CLOSED)
+            else:
+                self._set_state(self.OPEN)
+            return
+
+        self._outcomes.append(success)
+        if success:
+            self._latencies.append(latency)
+        if (self.state == self.CLOSED and len(self._outcomes) >= self.min_calls and
+                self.error_rate() >= self.failure_rate):
+            self._set_state(self.OPEN)
+
+    async def call(self, func: Callable[..., Awaitable[Any]], *args: Any,
+                   is_failure: Optional[Callable[[Any], bool]] = None,
+                   cost: float = 1.0) -> Any:
+        """Await func(*args) within the timeout for its cost and record the outcome
+
+        Raises CircuitOpenError without calling func while the circuit is
+        open, and asyncio.TimeoutError when the call overruns its timeout.
+        """
+        trial = self._before_call()
+        cost = max(cost, 1e-3)
+        started = time.monotonic()
+        try:
+            result = await asyncio.wait_for(func(*args), self.timeout(cost))
+        except self.excluded:
+            if trial:
+                self._probing = False
+            raise
+        except asyncio.CancelledError:
+            # Abandoned by the caller: says nothing about the dependency
+            if trial:
+                self._probing = False
+            raise
+        except Exception:
+            self._record(False, (time.monotonic() - started) / cost, trial)
+            raise
+        self._record(is_failure is None or not is_failure(result),
+                     (time.monotonic() - started) / cost, trial)
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        """State for health checks"""
+        p99 = self.latency_p99()
+        return {
+            "state": self.state,
+            "error_rate": round(self.error_rate(), 3),
+            "calls": len(self._outcomes),
+            "latency_p99_ms": round(p99 * 1000, 1) if p99 is not None else None,
+            "timeout_seconds": round(self.timeout(), 3),
+            "per": self.unit,
+        }
+
+
+def breaker_from_config(name: str, max_timeout: float, adaptive: bool = True,
+                        excluded: Tuple[Type[BaseException], ...] = (),
+                        unit: str = "call") -> CircuitBreaker:
+    """Circuit breaker for one dependency with the BREAKER_* / ADAPTIVE_TIMEOUT_* settings"""
+    return CircuitBreaker(
+        name, max_timeout, adaptive=adaptive,
+        window_size=config.BREAKER_WINDOW_SIZE, min_calls=config.BREAKER_MIN_CALLS,
+        failure_rate=config.BREAKER_FAILURE_RATE, open_seconds=config.BREAKER_OPEN_SECONDS,
+        min_timeout=config.ADAPTIVE_TIMEOUT_MIN_SECONDS,
+        timeout_multiplier=config.ADAPTIVE_TIMEOUT_MULTIPLIER, excluded=excluded, unit=unit)
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 class Config:
     """Configuration settings for the voice agent"""
@@ -19,10 +19,88 @@ class Config:
     SPEECH_RECOGNITION_TIMEOUT = int(os.getenv("SPEECH_RECOGNITION_TIMEOUT", 10))
     SPEECH_RECOGNITION_PHRASE_TIMEOUT = int(os.getenv("SPEECH_RECOGNITION_PHRASE_TIMEOUT", 5))
     
+    # Speech Recognition Backend: "google" (network) or a local engine, "vosk" / "whisper"
+    STT_BACKEND = os.getenv("STT_BACKEND", "google")
+    STT_WORKERS = int(os.getenv("STT_WORKERS", 2))  # processes for local engines, one model each
+    VOSK_MODEL_PATHS = os.getenv("VOSK_MODEL_PATHS", "")  # e.g. "vi-VN=/models/vosk-vn,en-US=/models/vosk-en"
+    WHISPER_MODEL = os.getenv("WHISPER_MODEL", "small")
+    WHISPER_COMPUTE_TYPE = os.getenv("WHISPER_COMPUTE_TYPE", "int8")
+    WHISPER_CPU_THREADS = int(os.getenv("WHISPER_CPU_THREADS", 2))  # per STT worker
+    
     # Text-to-Speech Settings
     TTS_VOICE_RATE = int(os.getenv("TTS_VOICE_RATE", 180))
     TTS_VOICE_VOLUME = float(os.getenv("TTS_VOICE_VOLUME", 0.9))
     
+    # Text-to-Speech Backend: "gtts" (network) or a local engine, "espeak" / "piper"
+    TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")
+    TTS_WORKERS = int(os.getenv("TTS_WORKERS", 2))  # long-lived processes for local engines
+    ESPEAK_BINARY = os.getenv("ESPEAK_BINARY", "")  # default: espeak-ng, then espeak, from PATH
+    PIPER_VOICE_PATHS = os.getenv("PIPER_VOICE_PATHS", "")  # e.g. "vi-VN=/models/vi_VN-vais1000-medium.onnx"
+    
+    # Upstream HTTP Settings (backend product API and chatbot)
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 3.0))
+    HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", 10.0))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", 20))
+    HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("HTTP_KEEPALIVE_TIMEOUT", 30.0))
+    
+    # Worker Pool Settings (blocking audio pipeline)
+    AUDIO_DECODE_WORKERS = int(os.getenv("AUDIO_DECODE_WORKERS", 2))  # processes for decode/resample
+    AUDIO_IO_WORKERS = int(os.getenv("AUDIO_IO_WORKERS", 8))  # threads for STT/TTS network calls
+    WORKER_QUEUE_SIZE = int(os.getenv("WORKER_QUEUE_SIZE", 32))  # queued jobs per pool before 503
+    WORKER_RETRY_AFTER_SECONDS = int(os.getenv("WORKER_RETRY_AFTER_SECONDS", 2))
+    
+    # TTS Cache Settings (content-addressed clips in AUDIO_DIR)
+    TTS_CACHE_MAX_ENTRIES = int(os.getenv("TTS_CACHE_MAX_ENTRIES", 2000))
+    TTS_CACHE_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", 268435456))  # 256MB
+    TTS_PREWARM_ENABLED = os.getenv("TTS_PREWARM_ENABLED", "true").lower() == "true"
+    TTS_PREWARM_CONCURRENCY = int(os.getenv("TTS_PREWARM_CONCURRENCY", 2))  # canned clips synthesised at once
+    TTS_STREAM_LOOKAHEAD = int(os.getenv("TTS_STREAM_LOOKAHEAD", 2))  # sentences synthesised ahead when streaming
+    
+    # WebSocket Voice Session Settings (/voice/session)
+    STREAM_VAD_FRAME_MS = int(os.getenv("STREAM_VAD_FRAME_MS", 30))
+    STREAM_END_SILENCE_MS = int(os.getenv("STREAM_END_SILENCE_MS", 700))  # silence that ends an utterance
+    STREAM_PRE_ROLL_MS = int(os.getenv("STREAM_PRE_ROLL_MS", 300))  # audio kept before speech starts
+    STREAM_PARTIAL_INTERVAL_MS = int(os.getenv("STREAM_PARTIAL_INTERVAL_MS", 1000))  # new speech between partials
+    STREAM_MAX_UTTERANCE_SECONDS = int(os.getenv("STREAM_MAX_UTTERANCE_SECONDS", 30))
+    STREAM_BARGE_IN = os.getenv("STREAM_BARGE_IN", "true").lower() == "true"  # speech over a reply cancels it
+    
+    # Product Cache Settings (refreshed in the background, served stale while refreshing)
+    PRODUCT_CACHE_TTL_SECONDS = int(os.getenv("PRODUCT_CACHE_TTL_SECONDS", 300))
+    PRODUCT_CACHE_RETRY_SECONDS = float(os.getenv("PRODUCT_CACHE_RETRY_SECONDS", 5))  # first backoff after a failed refresh
+    PRODUCT_CACHE_MAX_BACKOFF_SECONDS = float(os.getenv("PRODUCT_CACHE_MAX_BACKOFF_SECONDS", 300))
+    PRODUCT_SYNC_MODE = os.getenv("PRODUCT_SYNC_MODE", "delta")  # "delta" (ETag per page) or "full"
+    PRODUCT_SYNC_PAGE_SIZE = int(os.getenv("PRODUCT_SYNC_PAGE_SIZE", 100))
+    PRODUCT_SYNC_CONCURRENCY = int(os.getenv("PRODUCT_SYNC_CONCURRENCY", 4))  # pages fetched at once
+    PRODUCT_SYNC_FULL_EVERY = int(os.getenv("PRODUCT_SYNC_FULL_EVERY", 12))  # every Nth sync re-downloads all, 0 = never
+    PRODUCT_SNAPSHOT_PATH = os.getenv("PRODUCT_SNAPSHOT_PATH", "data/product_snapshot.msgpack")  # empty = off
+    PRODUCT_SNAPSHOT_MAX_AGE_SECONDS = int(os.getenv("PRODUCT_SNAPSHOT_MAX_AGE_SECONDS", 604800))  # 7 days
+    
+    # Batch Text Processing Settings (/voice/process-text/batch)
+    BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 100))
+    BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", 8))  # chatbot/TTS calls in flight per batch
+    
+    # Response Pipeline Deadlines (chatbot and recommendations run concurrently after NLP)
+    CHATBOT_DEADLINE_SECONDS = float(os.getenv("CHATBOT_DEADLINE_SECONDS", 2.5))  # then answer with the basic response
+    RECOMMENDATION_DEADLINE_SECONDS = float(os.getenv("RECOMMENDATION_DEADLINE_SECONDS", 1.5))  # then answer without products
+    
+    # Chatbot Response Cache (keyed on normalised utterance + language)
+    CHATBOT_CACHE_MAX_ENTRIES = int(os.getenv("CHATBOT_CACHE_MAX_ENTRIES", 1000))  # 0 = no response cache
+    CHATBOT_CACHE_TTL_SECONDS = float(os.getenv("CHATBOT_CACHE_TTL_SECONDS", 300))
+    
+    # Circuit Breakers and Adaptive Timeouts (chatbot, products, STT, TTS)
+    BREAKER_WINDOW_SIZE = int(os.getenv("BREAKER_WINDOW_SIZE", 50))  # recent calls tracked per dependency
+    BREAKER_MIN_CALLS = int(os.getenv("BREAKER_MIN_CALLS", 5))  # before the error rate or p99 is trusted
+    BREAKER_FAILURE_RATE = float(os.getenv("BREAKER_FAILURE_RATE", 0.5))  # share of failed calls that opens the circuit
+    BREAKER_OPEN_SECONDS = float(os.getenv("BREAKER_OPEN_SECONDS", 15))  # fail fast this long, then try one call
+    ADAPTIVE_TIMEOUT_MULTIPLIER = float(os.getenv("ADAPTIVE_TIMEOUT_MULTIPLIER", 2.0))  # timeout = p99 latency x this
+    ADAPTIVE_TIMEOUT_MIN_SECONDS = float(os.getenv("ADAPTIVE_TIMEOUT_MIN_SECONDS", 1.0))
+    STT_TIMEOUT_SECONDS = float(os.getenv("STT_TIMEOUT_SECONDS", 30))  # ceiling; HTTP_READ_TIMEOUT for chatbot/products
+    TTS_TIMEOUT_SECONDS = float(os.getenv("TTS_TIMEOUT_SECONDS", 30))
+    
+    # Latency Instrumentation (voice_stage_seconds histograms are always recorded)
+    STAGE_TIMINGS_IN_RESPONSE = os.getenv("STAGE_TIMINGS_IN_RESPONSE", "true").lower() == "true"  # stage_timings_ms in responses
+    
     # File Storage Settings
     STATIC_DIR = Path("app/static")
     AUDIO_DIR = STATIC_DIR / "audio"
@@ -46,6 +124,16 @@ class Config:
         "ja-JP": "Japanese"
     }
     
+    @staticmethod
+    def parse_language_map(value: str) -> Dict[str, str]:
+        """Parse "vi-VN=/models/vn,en-US=/models/en" into {language: path}"""
+        paths = {}
+        for item in value.split(","):
+            if "=" in item:
+                language, path = item.split("=", 1)
+                paths[language.strip()] = path.strip()
+        return paths
+    
     @classmethod
     def create_directories(cls):
         """Create necessary directories if they don't exist"""
@@ -0,0 +1,133 @@
+import asyncio
+import logging
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional, Tuple
+
+from fastapi import HTTPException
+
+from .config import config
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+pool_queue_depth = metrics.gauge(
+    "voice_worker_pool_queue_depth", "Jobs waiting for a free worker")
+pool_in_flight = metrics.gauge(
+    "voice_worker_pool_in_flight", "Jobs submitted and not yet finished")
+pool_wait_seconds = metrics.histogram(
+    "voice_worker_pool_wait_seconds", "Time jobs spent queued before a worker picked them up")
+pool_rejected = metrics.counter(
+    "voice_worker_pool_rejected_total", "Jobs rejected because the pool was saturated")
+
+
+class WorkerPoolSaturated(HTTPException):
+    """Raised when a worker pool's queue is full; maps to HTTP 503"""
+
+    def __init__(self, pool_name: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Voice agent is busy ({pool_name} pool saturated), please retry",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+def _timed_call(func: Callable, args: Tuple[Any, ...]) -> Tuple[float, Any]:
+    """Run func in the worker and report when it actually started"""
+    started_at = time.time()
+    return started_at, func(*args)
+
+
+class WorkerPool:
+    """Bounded executor stage for blocking work.
+
+    At most ``max_workers`` jobs run at once and at most ``max_queue`` more
+    wait for a worker; anything beyond that is rejected immediately with
+    WorkerPoolSaturated so overload turns into fast 503s instead of an
+    ever-growing backlog on the event loop.
+    """
+
+    def __init__(self, name: str, kind: str, max_workers: int, max_queue: int,
+                 initializer: Optional[Callable[[], None]] = None):
+        if kind not in ("process", "thread"):
+            raise ValueError(f"Unknown worker pool kind: {kind}")
+        self.name = name
+        self.kind = kind
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        # Runs once in every worker as it starts (e.g. to load a model)
+        self.initializer = initializer
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+
+        pool_queue_depth.set_function(lambda: self.queue_depth, pool=name)
+        pool_in_flight.set_function(lambda: self._in_flight, pool=name)
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._in_flight - self.max_workers)
+
+    def start(self):
+        """Create the underlying executor"""
+        if self._executor is not None:
+            return
+        if self.kind == "process":
+            # spawn keeps workers clear of the parent's event loop and threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=self.initializer)
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix=f"voice-{self.name}",
+                initializer=self.initializer)
+        logger.info(
+            f"Worker pool '{self.name}' started: {self.max_workers} {self.kind} workers, "
+            f"queue {self.max_queue}")
+
+    def shutdown(self):
+        """Stop the executor, waiting for running jobs"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, func: Callable, *args: Any) -> Any:
+        """Run func(*args) on the pool, rejecting it when the pool is saturated"""
+        if self._in_flight >= self.max_workers + self.max_queue:
+            pool_rejected.inc(pool=self.name)
+            raise WorkerPoolSaturated(self.name, config.WORKER_RETRY_AFTER_SECONDS)
+
+        if self._executor is None:
+            self.start()
+
+        # A job holds its slot until it finishes in the worker, even if the
+        # caller stops waiting (timeout, client disconnect): cancelling the
+        # await cannot stop it, so it must keep counting against the bound
+        self._in_flight += 1
+        submitted_at = time.time()
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, _timed_call, func, args)
+        except BaseException:
+            self._in_flight -= 1
+            raise
+        future.add_done_callback(self._job_done)
+        started_at, result = await asyncio.shield(future)
+        pool_wait_seconds.observe(
+            max(0.0, started_at - submitted_at), pool=self.name)
+        return result
+
+    def _job_done(self, future: asyncio.Future):
+        self._in_flight -= 1
+        # Mark a failure retrieved when the caller is no longer waiting for it
+        if not future.cancelled():
+            future.exception()
+
+
+# Process pool for CPU-bound decode/resample, thread pool for network-bound STT/TTS
+decode_pool = WorkerPool(
+    "decode", "process", config.AUDIO_DECODE_WORKERS, config.WORKER_QUEUE_SIZE)
+io_pool = WorkerPool(
+    "io", "thread", config.AUDIO_IO_WORKERS, config.WORKER_QUEUE_SIZE)
@@ -0,0 +1,146 @@
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+# "đ" has no decomposition, so NFD alone would keep it
+_EXTRA_FOLDS = str.maketrans({"đ": "d", "Đ": "d"})
+
+# Token length -> edits allowed: short tokens must match exactly
+FUZZY_MIN_LENGTH_ONE_EDIT = 4
+FUZZY_MIN_LENGTH_TWO_EDITS = 5
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip Vietnamese (and other) diacritics: "Mô Hình Đẹp" -> "mo hinh dep" """
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFD", text.translate(_EXTRA_FOLDS))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def max_edits(token: str) -> int:
+    """Edits a query token may be away from a catalog token"""
+    if len(token) >= FUZZY_MIN_LENGTH_TWO_EDITS:
+        return 2
+    if len(token) >= FUZZY_MIN_LENGTH_ONE_EDIT:
+        return 1
+    return 0
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance between a and b, or limit + 1 once it exceeds limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class NGramIndex:
+    """Character bigram index over a token vocabulary for bounded edit-distance lookups.
+
+    Tokens are padded ("$luffy$") and split into bigrams, numbered by
+    occurrence so repeated bigrams count like a multiset. One edit changes
+    at most two bigrams, so a token within k edits of the query shares at
+    least ``max(len) + 1 - 2k`` of them: candidates are counted with NumPy
+    from the postings of the query's bigrams within the allowed length
+    range, and only the few that pass that filter pay for an edit-distance
+    check.
+    Bigrams rather than trigrams keep that filter selective for the
+    five-letter, two-edit case ("luphy" -> "luffy").
+    """
+
+    def __init__(self):
+        # Tokens by id; ids of discarded tokens are reused
+        self._tokens: List[Optional[str]] = []
+        self._ids: Dict[str, int] = {}
+        self._free_ids: List[int] = []
+        # (bigram, occurrence, token length) -> token ids, plus their arrays built on demand
+        self._postings: Dict[Tuple[str, int, int], Set[int]] = {}
+        self._arrays: Dict[Tuple[str, int, int], np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    @staticmethod
+    def _grams(token: str) -> List[Tuple[str, int]]:
+        padded = f"${token}$"
+        seen: Counter = Counter()
+        grams = []
+        for i in range(len(padded) - 1):
+            gram = padded[i:i + 2]
+            grams.append((gram, seen[gram]))
+            seen[gram] += 1
+        return grams
+
+    def add(self, token: str):
+        if token in self._ids:
+            return
+        if self._free_ids:
+            token_id = self._free_ids.pop()
+            self._tokens[token_id] = token
+        else:
+            token_id = len(self._tokens)
+            self._tokens.append(token)
+        self._ids[token] = token_id
+        for gram, occurrence in self._grams(token):
+            key = (gram, occurrence, len(token))
+            self._postings.setdefault(key, set()).add(token_id)
+            self._arrays.pop(key, None)
+
+    def discard(self, token: str):
+        token_id = self._ids.pop(token, None)
+        if token_id is None:
+            return
+        self._tokens[token_id] = None
+        self._free_ids.append(token_id)
+        for gram, occurrence in self._grams(token):
+            key = (gram, occurrence, len(token))
+            postings = self._postings[key]
+            postings.discard(token_id)
+            if not postings:
+                del self._postings[key]
+            self._arrays.pop(key, None)
+
+    def _array(self, key: Tuple[str, int, int]) -> Optional[np.ndarray]:
+        array = self._arrays.get(key)
+        if array is None:
+            postings = self._postings.get(key)
+            if not postings:
+                return None
+            array = self._arrays[key] = np.fromiter(postings, dtype=np.int32, count=len(postings))
+        return array
+
+    def lookup(self, token: str, edits: int) -> Dict[str, int]:
+        """Vocabulary tokens within ``edits`` edits of token, with their distance
+
+        ``edits`` is capped so matches must still share at least two bigrams.
+        """
+        edits = min(edits, (len(token) - 1) // 2)
+        if edits <= 0:
+            return {token: 0} if token in self._ids else {}
+
+        grams = self._grams(token)
+        matches: Dict[str, int] = {}
+        for length in range(max(1, len(token) - edits), len(token) + edits + 1):
+            arrays = [array for array in (self._array((gram, occurrence, length))
+                                          for gram, occurrence in grams) if array is not None]
+            needed = max(len(token), length) + 1 - 2 * edits
+            if len(arrays) < needed:
+                continue
+            ids, shared = np.unique(np.concatenate(arrays), return_counts=True)
+            for token_id in ids[shared >= needed].tolist():
+                candidate = self._tokens[token_id]
+                distance = edit_distance(token, candidate, edits)
+                if distance <= edits:
+                    matches[candidate] = distance
+        return matches
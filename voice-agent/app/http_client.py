@@ -0,0 +1,83 @@
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+
+class HttpClient:
+    """Shared, pooled async HTTP client for backend and chatbot calls.
+
+    One aiohttp session (and therefore one keep-alive connection pool) is
+    created on app startup and closed on shutdown, so upstream calls never
+    block the event loop and reuse connections across requests.
+    """
+
+    def __init__(self):
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def default_timeout(self) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            connect=config.HTTP_CONNECT_TIMEOUT,
+            sock_read=config.HTTP_READ_TIMEOUT
+        )
+
+    async def start(self):
+        """Create the session and its connection pool"""
+        if self._session is not None and not self._session.closed:
+            return
+
+        connector = aiohttp.TCPConnector(
+            limit=config.HTTP_MAX_CONNECTIONS,
+            limit_per_host=config.HTTP_MAX_CONNECTIONS_PER_HOST,
+            keepalive_timeout=config.HTTP_KEEPALIVE_TIMEOUT
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector, timeout=self.default_timeout)
+        logger.info(
+            f"HTTP client started (max {config.HTTP_MAX_CONNECTIONS} connections, "
+            f"{config.HTTP_MAX_CONNECTIONS_PER_HOST} per host)")
+
+    async def close(self):
+        """Close the session and release pooled connections"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # Lazily start when used outside the FastAPI lifecycle (scripts, tests)
+        if self._session is None or self._session.closed:
+            await self.start()
+        return self._session
+
+    async def get_json(self, url: str, timeout: Optional[aiohttp.ClientTimeout] = None) -> Tuple[int, Any]:
+        """GET a JSON resource and return (status code, parsed body or None)"""
+        session = await self._get_session()
+        async with session.get(url, timeout=timeout or self.default_timeout) as response:
+            data = await response.json(content_type=None) if response.status == 200 else None
+            return response.status, data
+
+    async def get_json_if_changed(self, url: str, etag: Optional[str] = None,
+                                  timeout: Optional[aiohttp.ClientTimeout] = None) -> Tuple[int, Any, Optional[str]]:
+        """Conditional GET: return (status code, parsed body or None, ETag); 304 means unchanged"""
+        session = await self._get_session()
+        headers = {"If-None-Match": etag} if etag else None
+        async with session.get(url, headers=headers, timeout=timeout or self.default_timeout) as response:
+            data = await response.json(content_type=None) if response.status == 200 else None
+            return response.status, data, response.headers.get("ETag", etag)
+
+    async def post_json(self, url: str, payload: Dict[str, Any],
+                        timeout: Optional[aiohttp.ClientTimeout] = None) -> Tuple[int, Any]:
+        """POST a JSON payload and return (status code, parsed body or None)"""
+        session = await self._get_session()
+        async with session.post(url, json=payload, timeout=timeout or self.default_timeout) as response:
+            data = await response.json(content_type=None) if response.status == 200 else None
+            return response.status, data
+
+
+# Create global HTTP client instance
+http_client = HttpClient()
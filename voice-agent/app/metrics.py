@@ -0,0 +1,253 @@
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Default latency buckets in seconds
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Content type of the Prometheus text exposition format
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# Label kwargs as passed -> sorted, stringified key; bounded by the series count
+_label_keys: Dict[tuple, LabelKey] = {}
+
+
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    if not labels:
+        return ()
+    passed = tuple(labels.items())
+    key = _label_keys.get(passed)
+    if key is None:
+        key = _label_keys[passed] = tuple(sorted((name, str(value)) for name, value in passed))
+    return key
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey) -> str:
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in key) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value != value:
+        return "NaN"
+    if value in (float("inf"), float("-inf")):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """Monotonically increasing counter, optionally split by labels"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels) -> float:
+        return self.values.get(_label_key(labels), 0.0)
+
+    def labels(self, **labels) -> "BoundCounter":
+        """Bind a label set once, for hot paths that update the same series repeatedly"""
+        return BoundCounter(self.values, _label_key(labels))
+
+    def samples(self) -> Dict[LabelKey, float]:
+        return dict(self.values)
+
+
+class BoundCounter:
+    """One series of a Counter with its label key resolved up front"""
+
+    __slots__ = ("_values", "_key")
+
+    def __init__(self, values: Dict[LabelKey, float], key: LabelKey):
+        self._values = values
+        self._key = key
+
+    def inc(self, amount: float = 1.0):
+        self._values[self._key] = self._values.get(self._key, 0.0) + amount
+
+
+class Gauge:
+    """Value that can go up and down, or be read from a callback on collection"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self.values: Dict[LabelKey, float] = {}
+        self._callbacks: Dict[LabelKey, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        self.values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        self.values[key] = self.values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, callback: Callable[[], float], **labels):
+        self._callbacks[_label_key(labels)] = callback
+
+    def get(self, **labels) -> float:
+        key = _label_key(labels)
+        if key in self._callbacks:
+            return float(self._callbacks[key]())
+        return self.values.get(key, 0.0)
+
+    def samples(self) -> Dict[LabelKey, float]:
+        samples = dict(self.values)
+        for key, callback in self._callbacks.items():
+            try:
+                samples[key] = float(callback())
+            except Exception:
+                continue
+        return samples
+
+
+class Histogram:
+    """Bucketed distribution of observed values (e.g. latencies in seconds)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts (+Inf last), sum, count]
+        self.values: Dict[LabelKey, list] = {}
+
+    def _series(self, key: LabelKey) -> list:
+        series = self.values.get(key)
+        if series is None:
+            series = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        return series
+
+    def observe(self, value: float, **labels):
+        series = self._series(_label_key(labels))
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def labels(self, **labels) -> "BoundHistogram":
+        """Bind a label set once, for hot paths that observe the same series repeatedly"""
+        return BoundHistogram(self.buckets, self._series(_label_key(labels)))
+
+    def samples(self) -> Dict[LabelKey, dict]:
+        samples = {}
+        for key, (counts, total, count) in self.values.items():
+            cumulative, running = [], 0
+            for bucket_count in counts:
+                running += bucket_count
+                cumulative.append(running)
+            bounds = [repr(float(bound)) for bound in self.buckets] + ["+Inf"]
+            samples[key] = {
+                "buckets": list(zip(bounds, cumulative)),
+                "sum": total,
+                "count": count,
+            }
+        return samples
+
+
+class BoundHistogram:
+    """One series of a Histogram with its label key resolved up front"""
+
+    __slots__ = ("_buckets", "_series")
+
+    def __init__(self, buckets: Tuple[float, ...], series: list):
+        self._buckets = buckets
+        self._series = series
+
+    def observe(self, value: float):
+        series = self._series
+        series[0][bisect_left(self._buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+
+class MetricsRegistry:
+    """In-process registry of counters, gauges and histograms.
+
+    Updates are plain dict operations on the event loop thread, so recording
+    a sample costs well under a microsecond and needs no external service.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name: str, documentation: str, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, documentation, **kwargs)
+        return metric
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        return self._get_or_create(Counter, name, documentation)
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation)
+
+    def histogram(self, name: str, documentation: str,
+                  buckets: Optional[Tuple[float, ...]] = None) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, buckets=buckets or DEFAULT_BUCKETS)
+
+    def collect(self) -> List[object]:
+        """Return all registered metrics"""
+        return list(self._metrics.values())
+
+    def render_prometheus(self) -> str:
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.collect():
+            samples = metric.samples()
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for key, value in samples.items():
+                if metric.kind != "histogram":
+                    lines.append(f"{metric.name}{_format_labels(key)} {_format_value(value)}")
+                    continue
+                for bound, cumulative in value["buckets"]:
+                    lines.append(
+                        f"{metric.name}_bucket{_format_labels(key + (('le', bound),))} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(key)} {_format_value(value['sum'])}")
+                lines.append(f"{metric.name}_count{_format_labels(key)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, dict]:
+        """Return a JSON-friendly view of every metric"""
+        snapshot = {}
+        for metric in self.collect():
+            snapshot[metric.name] = {
+                "type": metric.kind,
+                "help": metric.documentation,
+                "samples": [
+                    {"labels": dict(key), "value": value}
+                    for key, value in metric.samples().items()
+                ],
+            }
+        return snapshot
+
+
+# Create global metrics registry
+metrics = MetricsRegistry()
@@ -0,0 +1,283 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+from .fuzzy import normalize_text
+from .schemas import Intent
+
+
+# Intent patterns for Vietnamese - Enhanced with product knowledge
+INTENT_PATTERNS = {
+    Intent.CREATE_ORDER: [
+        r"(?:muốn|cần|đặt|mua|order|lấy|có thể)\s*(?:một|mô hình|figure|sản phẩm)",
+        r"(?:tôi|em|mình)\s+(?:muốn|cần|đặt|mua|lấy)",
+        r"(?:có thể|được không)\s+(?:đặt|mua|order|lấy)",
+        r"(?:thêm|add)\s+(?:vào|into)\s+(?:giỏ|cart)",
+        r"(?:mua|đặt|order)\s+(?:ngay|luôn|now)",
+        r"(?:muốn|cần)\s+(?:mua|đặt|order)"
+    ],
+    Intent.CANCEL_ORDER: [
+        r"(?:hủy|cancel)\s+(?:đơn|order)",
+        r"(?:không|ko)\s+(?:muốn|cần)\s+(?:nữa|rồi)",
+        r"(?:bỏ|hủy)\s+(?:đặt hàng|order)"
+    ],
+    Intent.CHECK_ORDER_STATUS: [
+        r"(?:kiểm tra|check|xem)\s+(?:đơn|order|trạng thái)",
+        r"(?:đơn|order)\s+(?:của|tôi|em)\s+(?:thế nào|ra sao)",
+        r"(?:tình trạng|status)\s+(?:đơn hàng|order)",
+        r"(?:đơn hàng|order)\s+(?:đang|hiện tại)"
+    ],
+    Intent.GET_PRODUCT_INFO: [
+        # Broader patterns for product searches
+        r"(?:tôi|em|mình)\s+(?:muốn|cần)\s+(?:tìm|find|search)\s*(?:sản phẩm|mô hình|figure)",
+        r"(?:tìm|find|search)\s+(?:sản phẩm|mô hình|figure|product)",
+        r"(?:cho|show|hiển thị)\s+(?:tôi|em|mình)\s+(?:sản phẩm|mô hình|figure)",
+        r"(?:có|available)\s+(?:sản phẩm|mô hình|figure)\s+(?:gì|nào|what)",
+        r"(?:gợi ý|suggest|recommend)\s+(?:sản phẩm|mô hình|figure)",
+        r"(?:thông tin|info|chi tiết)\s+(?:về|của|about)\s+(?:sản phẩm|mô hình|figure)",
+        r"(?:giá|price|cost)\s+(?:của|bao nhiêu|how much)",
+        r"(?:mô tả|description)\s+(?:sản phẩm|figure)",
+        # Specific character names
+        r"(?:naruto|goku|luffy|sasuke|vegeta|ichigo|eren)",
+        r"(?:one piece|dragon ball|attack on titan|demon slayer|my hero academia)",
+        r"(?:anime|manga)\s+(?:figure|mô hình)"
+    ],
+    Intent.SEARCH_PRODUCTS: [
+        r"(?:tìm kiếm|search|find)\s+(?:theo|by)\s+(?:danh mục|category)",
+        r"(?:xem|show)\s+(?:tất cả|all)\s+(?:danh mục|categories)",
+        r"(?:sản phẩm|products)\s+(?:trong|of)\s+(?:danh mục|category)",
+        r"(?:naruto|one piece|dragon ball|demon slayer|my hero academia|attack on titan|jujutsu kaisen)"
+    ],
+    Intent.CHECK_STOCK: [
+        r"(?:còn hàng|in stock|available|hết hàng|out of stock)",
+        r"(?:kiểm tra|check)\s+(?:hàng tồn kho|stock|availability)",
+        r"(?:số lượng|quantity)\s+(?:còn lại|remaining)"
+    ],
+    Intent.CUSTOMIZATION_INQUIRY: [
+        r"(?:tùy chỉnh|customize|customization)",
+        r"(?:màu sắc|color|size|accessory|phụ kiện)",
+        r"(?:thay đổi|change|modify)\s+(?:màu|color|size)"
+    ],
+    Intent.PRICE_INQUIRY: [
+        r"(?:giá|price|cost|bao nhiêu|rẻ|đắt)",
+        r"(?:khuyến mãi|sale|discount|promotion)",
+        r"(?:so sánh|compare)\s+(?:giá|price)"
+    ],
+    Intent.GREETING: [
+        r"(?:xin chào|hello|hi|chào|hey)",
+        r"(?:chào|hello)\s+(?:bạn|anh|chị|admin|support)",
+        r"(?:good morning|good afternoon|good evening)",
+        r"(?:buổi sáng|buổi chiều|buổi tối)\s+(?:tốt lành|vui vẻ)"
+    ],
+    Intent.GOODBYE: [
+        r"(?:tạm biệt|goodbye|bye|chào|see you)",
+        r"(?:hẹn gặp lại|see you|until next time)",
+        r"(?:cảm ơn|thank you)\s*(?:và|rồi|nhé|很多|much)?",
+        r"(?:kết thúc|end|finish|done)"
+    ],
+    Intent.HELP: [
+        r"(?:giúp|help|hỗ trợ|support|tư vấn|advice)",
+        r"(?:không hiểu|don't understand|confused)",
+        r"(?:hướng dẫn|guide|instruction|tutorial)"
+    ]
+}
+
+# Entity types in the order they are reported by entity extraction
+ENTITY_TYPES = ["product", "category", "quantity", "color", "price_range"]
+
+# Dictionary entities - literal keywords matched by the KeywordAutomaton
+ENTITY_KEYWORDS = {
+    "product": [
+        # Character names
+        "naruto", "uzumaki", "sasuke", "kakashi", "itachi", "minato", "madara", "hinata", "jiraya",
+        "goku", "vegeta", "gohan", "piccolo", "frieza", "cell", "majin buu", "goku black", "jiren", "beerus", "whis",
+        "luffy", "zoro", "sanji", "nami", "chopper", "robin", "brook", "franky", "jinbe", "ace", "law", "kid", "katakuri",
+        "ichigo", "rukia", "byakuya", "kenpachi", "aizen",
+        "eren", "mikasa", "levi", "armin", "annie",
+        "tanjiro", "nezuko", "zenitsu", "inosuke", "giyu", "rengoku",
+        "deku", "bakugo", "todoroki", "all might", "endeavor", "uraraka", "kirishima",
+        # Series names
+        "one piece", "dragon ball", "bleach", "attack on titan", "demon slayer", "my hero academia", "jujutsu kaisen",
+        "studio ghibli", "spirited away", "totoro", "princess mononoke"
+    ],
+    "category": [
+        "naruto", "one piece", "dragon ball", "demon slayer", "my hero academia", "attack on titan", "jujutsu kaisen",
+        "anime", "manga", "figure", "mô hình", "nhân vật"
+    ],
+    "color": [
+        "đỏ", "xanh", "vàng", "đen", "trắng", "hồng", "tím", "cam",
+        "red", "blue", "yellow", "black", "white", "pink", "purple", "orange"
+    ]
+}
+
+# Entity extraction patterns - free-form entities that need a real regex
+ENTITY_PATTERNS = {
+    "product": [
+        r"(?:mô hình|mo hinh|figure|model)\s+([a-z\s]+)",
+        r"(?:anime|manga)\s+([a-z\s]+)",
+        r"(?:nhân vật|nhan vat|character)\s+([a-z\s]+)"
+    ],
+    "quantity": [
+        r"(\d+)\s+(?:cái|chiếc|mô hình|figure|sản phẩm)",
+        r"(một|hai|ba|bốn|năm|sáu|bảy|tám|chín|mười)\s+(?:cái|chiếc)",
+        r"(\d+)"  # Any number
+    ],
+    "price_range": [
+        r"(?:giá\s+)?(rẻ|cheap|đắt|expensive|cao|thấp|low|high)",
+        r"(\d+)\s*(?:triệu|tr|nghìn|k|đồng|vnd)",
+        r"(?:dưới|under|trên|over)\s+(\d+)\s*(?:triệu|tr|nghìn|k)"
+    ]
+}
+
+# Sentence boundaries for chunked TTS: end punctuation (not after a list
+# number like "1.") followed by whitespace, or a line break
+SENTENCE_BOUNDARY = re.compile(r"(?<=[^\d\s][.!?…])\s+|\s*\n\s*")
+
+
+class IntentMatcher:
+    """Pre-compiled intent matcher that keeps pattern priority order.
+
+    Each intent's patterns are merged into a single alternation and compiled
+    once, so matching an utterance costs at most one regex search per intent
+    instead of one per pattern. The first intent (in dict order) with any
+    matching pattern wins, exactly like walking the raw pattern lists.
+    """
+
+    def __init__(self, intent_patterns: Dict[str, List[str]]):
+        self._compiled = [
+            (intent, re.compile("|".join(f"(?:{p})" for p in patterns)))
+            for intent, patterns in intent_patterns.items()
+            if patterns
+        ]
+
+    def match(self, text: str) -> Optional[str]:
+        """Return the highest-priority intent matching the (lowercased) text"""
+        for intent, regex in self._compiled:
+            if regex.search(text):
+                return intent
+        return None
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over word tokens for dictionary entities.
+
+    Keywords are tokenised the same way as the input text, so a single
+    left-to-right pass over the utterance's tokens reports every keyword
+    occurrence, and matches always fall on word boundaries ("ace" does not
+    fire inside "place"). Overlapping hits of the same entity type are
+    resolved leftmost-longest, so "goku black" wins over "goku".
+    """
+
+    TOKEN_PATTERN = re.compile(r"\w+")
+
+    def __init__(self):
+        self._keyword_ids: Dict[Tuple[Tuple[str, ...], str], int] = {}
+        self._keyword_length: List[int] = []
+        self._keyword_entity: List[Tuple[str, str]] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._terminal: List[List[int]] = [[]]
+        self._output: List[List[int]] = [[]]
+        self._built = False
+
+    def __len__(self) -> int:
+        return len(self._keyword_entity)
+
+    def add(self, keyword: str, entity_type: str):
+        """Register a keyword for an entity type (call build() afterwards)"""
+        value = keyword.strip().lower()
+        tokens = tuple(self.TOKEN_PATTERN.findall(value))
+        if not tokens or (tokens, entity_type) in self._keyword_ids:
+            return
+
+        keyword_id = len(self._keyword_entity)
+        self._keyword_ids[(tokens, entity_type)] = keyword_id
+        self._keyword_length.append(len(tokens))
+        self._keyword_entity.append((entity_type, value))
+
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._terminal.append([])
+            state = next_state
+        self._terminal[state].append(keyword_id)
+        self._built = False
+
+    def build(self):
+        """Compute failure links with a breadth-first walk of the trie"""
+        self._output = [list(terminal) for terminal in self._terminal]
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+
+        while queue:
+            state = queue.popleft()
+            for token, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                self._output[child] = (
+                    self._output[child] + self._output[self._fail[child]])
+                queue.append(child)
+
+        self._built = True
+
+    def search(self, text: str) -> Dict[str, List[str]]:
+        """Return the matched keyword values per entity type, in text order"""
+        if not self._built:
+            self.build()
+
+        goto, fail, output = self._goto, self._fail, self._output
+        hits: Dict[str, List[Tuple[int, int, str]]] = {}
+        state = 0
+        for position, token in enumerate(self.TOKEN_PATTERN.findall(text.lower())):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for keyword_id in output[state]:
+                entity_type, value = self._keyword_entity[keyword_id]
+                start = position - self._keyword_length[keyword_id] + 1
+                hits.setdefault(entity_type, []).append(
+                    (start, position, value))
+
+        matches: Dict[str, List[str]] = {}
+        for entity_type, spans in hits.items():
+            # Leftmost-longest, non-overlapping
+            spans.sort(key=lambda span: (span[0], -span[1]))
+            last_end = -1
+            for start, end, value in spans:
+                if start > last_end:
+                    matches.setdefault(entity_type, []).append(value)
+                    last_end = end
+        return matches
+
+
+def build_entity_automaton(catalog_names: Iterable[Tuple[str, str]] = ()) -> KeywordAutomaton:
+    """Build the entity automaton from the static keywords plus live catalog names
+
+    ``catalog_names`` holds ``(entity_type, name)`` pairs, e.g. product and
+    category names from the product cache. Catalog names are also matched
+    without diacritics ("mo hinh luffy"); the product index normalises the
+    same way, so either spelling finds the product.
+    """
+    automaton = KeywordAutomaton()
+    for entity_type, keywords in ENTITY_KEYWORDS.items():
+        for keyword in keywords:
+            automaton.add(keyword, entity_type)
+    for entity_type, name in catalog_names:
+        if name:
+            automaton.add(name, entity_type)
+            automaton.add(normalize_text(name), entity_type)
+    automaton.build()
+    return automaton
+
+
+def split_sentences(text: str) -> List[str]:
+    """Split response text into sentence-sized chunks for streaming TTS"""
+    return [chunk.strip() for chunk in SENTENCE_BOUNDARY.split(text) if chunk and chunk.strip()]
@@ -0,0 +1,66 @@
+import time
+
+from .metrics import metrics
+
+http_requests = metrics.counter(
+    "voice_http_requests_total", "HTTP requests by method, route template and status code")
+http_request_seconds = metrics.histogram(
+    "voice_http_request_duration_seconds", "HTTP request latency by method and route template, until the body is sent")
+http_requests_in_flight = metrics.gauge(
+    "voice_http_requests_in_flight", "HTTP requests being handled")
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware counting HTTP requests and timing them per route.
+
+    Requests are labelled with the matched route template
+    ("/voice/products/{product_id}"), or the mount path for static files,
+    so paths with ids do not create a series each; unmatched paths share
+    "unmatched". Plain ASGI rather than BaseHTTPMiddleware, so streaming
+    responses pass through untouched. The bound series for each
+    (method, route, status) are cached, so recording a request costs two
+    clock reads, one dict lookup and two bound series updates.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        # (method, route template, status) -> (counter, histogram) series;
+        # bounded by the routes the app declares, not by the paths requested
+        self._series = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_requests_in_flight.dec()
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            if route is not None:
+                path = route.path
+            elif scope.get("root_path", "") != root_path:
+                path = scope["root_path"]
+            else:
+                path = "unmatched"
+            key = (scope["method"], path, status)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = (
+                    http_requests.labels(method=key[0], route=path, status=status),
+                    http_request_seconds.labels(method=key[0], route=path))
+            series[0].inc()
+            series[1].observe(elapsed)
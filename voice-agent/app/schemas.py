@@ -55,6 +55,26 @@ class VoiceResponse(BaseModel):
     audio_url: Optional[str] = None
     processing_time_ms: int
     product_recommendations: Optional[List[Dict[str, Any]]] = None
+    # Milliseconds per pipeline stage (decode, stt, intent, chatbot, ...);
+    # concurrent stages overlap, so they may add up to more than the total
+    stage_timings_ms: Optional[Dict[str, float]] = None
+
+
+class BatchProcessRequest(BaseModel):
+    # Utterances to process; results come back in the same order
+    items: List[VoiceProcessRequest]
+
+
+class BatchItemResult(BaseModel):
+    index: int
+    response: Optional[VoiceResponse] = None
+    # Set instead of response when this item failed
+    error: Optional[str] = None
+
+
+class BatchProcessResponse(BaseModel):
+    results: List[BatchItemResult]
+    processing_time_ms: int
 
 
 class TTSRequest(BaseModel):
@@ -67,3 +87,4 @@ class HealthResponse(BaseModel):
     status: str
     version: str
     services: Dict[str, bool]
+    dependencies: Dict[str, Dict[str, Any]] = {}
@@ -1,273 +1,551 @@
 import os
 import time
-import tempfile
+import asyncio
 import logging
-import speech_recognition as sr
-import pyttsx3
-from gtts import gTTS
-import librosa
-import soundfile as sf
 import numpy as np
 import re
-import requests
 import json
-from typing import Tuple, List, Optional, Dict, Any
+import random
+from collections import deque
+from typing import Tuple, List, Optional, Dict, Any, AsyncIterator, Awaitable, Callable, Iterable
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
 from .schemas import (
     SupportedLanguage, Intent, Entity, AudioFormat,
-    VoiceResponse, TTSRequest
+    VoiceResponse, TTSRequest, VoiceProcessRequest, BatchItemResult
 )
+from .nlp import (
+    INTENT_PATTERNS, ENTITY_PATTERNS, ENTITY_TYPES, IntentMatcher,
+    build_entity_automaton, split_sentences
+)
+from .catalog import ProductIndex
+from .catalog_sync import CatalogSync
+from .catalog_snapshot import save_snapshot, load_snapshot
+from .http_client import http_client
+from .audio import split_wav, wav_stream_header, TARGET_SAMPLE_RATE, PCM_SAMPLE_WIDTH
+from .executor import decode_pool, io_pool, WorkerPoolSaturated
+from .tts_cache import tts_cache
+from .chatbot_cache import ChatbotCache
+from .circuit_breaker import CircuitOpenError, breaker_from_config
+from .vad import decode_speech, SpeechClip
+from .stt import stt_pool, transcribe, load_stt_backend, STTServiceError, STT_BACKENDS
+from .tts import tts_pool, synthesize, load_tts_backend, tts_backend_class, TTSServiceError
+from .metrics import metrics
+from .timing import collect_timings, span, timed
+from .config import config
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+tts_prewarm_clips = metrics.gauge(
+    "voice_tts_prewarm_clips", "Canned-response TTS clips synthesised or found cached at startup")
+tts_prewarm_ready = metrics.gauge(
+    "voice_tts_prewarm_ready", "1 once every canned-response TTS clip is cached")
+stt_audio_bytes = metrics.histogram(
+    "voice_stt_audio_bytes", "PCM bytes sent to speech recognition per clip",
+    buckets=(16000, 32000, 64000, 128000, 256000, 512000, 1024000, 2048000))
+vad_trimmed_bytes = metrics.counter(
+    "voice_vad_trimmed_bytes_total", "Decoded PCM bytes trimmed as silence before STT")
+vad_rejected = metrics.counter(
+    "voice_vad_rejected_total", "Uploaded clips rejected by the VAD as containing no speech")
+clip_processing_seconds = metrics.histogram(
+    "voice_clip_processing_seconds", "End-to-end processing time of uploaded clips")
+product_cache_age = metrics.gauge(
+    "voice_product_cache_age_seconds", "Seconds since the product cache was last refreshed successfully")
+product_cache_refresh_seconds = metrics.gauge(
+    "voice_product_cache_last_refresh_seconds", "Duration of the last product cache refresh attempt")
+product_cache_hits = metrics.counter(
+    "voice_product_cache_hits_total", "Requests served from an existing catalog snapshot, fresh or stale")
+product_cache_misses = metrics.counter(
+    "voice_product_cache_misses_total", "Requests that found no catalog snapshot yet")
+product_cache_hit_ratio = metrics.gauge(
+    "voice_product_cache_hit_ratio", "Share of requests served from an existing catalog snapshot")
+
+product_cache_refreshes = metrics.counter(
+    "voice_product_cache_refreshes_total", "Product cache refresh attempts by result")
+product_sync_pages = metrics.counter(
+    "voice_product_sync_pages_total", "Catalog pages read by product syncs, fetched or unchanged (304)")
+product_snapshot_bytes = metrics.gauge(
+    "voice_product_snapshot_bytes", "Size of the last persisted product snapshot")
+product_snapshot_load_seconds = metrics.gauge(
+    "voice_product_snapshot_load_seconds", "Time to load the product snapshot and build its indexes at startup")
+product_sync_changes = metrics.counter(
+    "voice_product_sync_changes_total", "Products upserted or removed by delta syncs")
+batch_items = metrics.counter(
+    "voice_batch_items_total", "Utterances received through /process-text/batch")
+batch_item_errors = metrics.counter(
+    "voice_batch_item_errors_total", "Batch utterances that failed and were returned as errors")
+batch_chatbot_queries = metrics.counter(
+    "voice_batch_chatbot_queries_total", "Distinct chatbot queries sent for batches after coalescing")
+stage_deadline_misses = metrics.counter(
+    "voice_stage_deadline_misses_total", "Pipeline stages abandoned at their deadline, by stage")
+
+
+def _product_cache_hit_ratio() -> float:
+    hits, misses = product_cache_hits.get(), product_cache_misses.get()
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+product_cache_hit_ratio.set_function(_product_cache_hit_ratio)
+
+# Canned replies used when the chatbot is unavailable; their TTS clips are
+# pre-warmed at startup
+BASIC_RESPONSES = {
+    Intent.CREATE_ORDER: "Tôi sẽ giúp bạn đặt hàng. Bạn muốn mua sản phẩm nào?",
+    Intent.CANCEL_ORDER: "Tôi hiểu bạn muốn hủy đơn hàng. Bạn có thể cung cấp mã đơn hàng không?",
+    Intent.CHECK_ORDER_STATUS: "Tôi sẽ kiểm tra trạng thái đơn hàng cho bạn. Bạn có mã đơn hàng không?",
+    Intent.GET_PRODUCT_INFO: "Tôi sẽ tìm thông tin sản phẩm cho bạn. Bạn quan tâm đến sản phẩm nào?",
+    Intent.SEARCH_PRODUCTS: "Tôi sẽ giúp bạn tìm kiếm sản phẩm. Bạn muốn tìm theo danh mục nào?",
+    Intent.CHECK_STOCK: "Tôi sẽ kiểm tra tình trạng hàng tồn kho. Bạn muốn kiểm tra sản phẩm nào?",
+    Intent.CUSTOMIZATION_INQUIRY: "Tôi sẽ giải thích về các tùy chọn tùy chỉnh. Bạn muốn tùy chỉnh sản phẩm nào?",
+    Intent.PRICE_INQUIRY: "Tôi sẽ cung cấp thông tin về giá cả. Bạn muốn biết giá của sản phẩm nào?",
+    Intent.GREETING: "Xin chào! Tôi là trợ lý ảo của Figuro. Tôi có thể giúp bạn tìm sản phẩm, đặt hàng, hoặc tư vấn về mô hình figure. Bạn cần hỗ trợ gì?",
+    Intent.GOODBYE: "Cảm ơn bạn đã sử dụng dịch vụ của Figuro. Hẹn gặp lại!",
+    Intent.HELP: "Tôi có thể giúp bạn: tìm kiếm sản phẩm, xem danh mục, kiểm tra giá cả, theo dõi đơn hàng, và tư vấn tùy chỉnh. Bạn cần hỗ trợ gì cụ thể?"
+}
+DEFAULT_BASIC_RESPONSE = "Xin lỗi, tôi chưa hiểu rõ yêu cầu của bạn. Bạn có thể nói rõ hơn được không?"
+
 
 class VoiceAgentService:
     def __init__(self):
-        self.recognizer = sr.Recognizer()
-        self.tts_engine = pyttsx3.init()
-        self.setup_tts_engine()
+        # Whether the configured speech engines loaded (local backends only)
+        self.stt_available = True
+        self.tts_available = True
 
         # Chatbot API configuration
         self.chatbot_api_url = os.getenv(
             'CHATBOT_API_URL', 'http://localhost:3000/api/chatbot')
         self.backend_api_url = os.getenv(
             'BACKEND_API_URL', 'http://localhost:3000/api')
+        # One circuit breaker per dependency: fail fast to local fallbacks
+        # while it keeps failing, time calls out at a multiple of its p99
+        self.breakers = {
+            "chatbot": breaker_from_config("chatbot", config.HTTP_READ_TIMEOUT),
+            "products": breaker_from_config("products", config.HTTP_READ_TIMEOUT),
+            # Speech services take longer for longer audio and text, so their
+            # p99 is kept per audio second / character. Local engines also
+            # depend on CPU load and keep the fixed timeout.
+            "stt": breaker_from_config(
+                "stt", config.STT_TIMEOUT_SECONDS, adaptive=not STT_BACKENDS[config.STT_BACKEND].local,
+                excluded=(WorkerPoolSaturated,), unit="audio_second"),
+            "tts": breaker_from_config(
+                "tts", config.TTS_TIMEOUT_SECONDS, adaptive=not tts_backend_class.local,
+                excluded=(WorkerPoolSaturated,), unit="character"),
+        }
+
+        # Recent chatbot answers, so repeated phrases skip the backend
+        self.chatbot_cache = ChatbotCache(
+            config.CHATBOT_CACHE_MAX_ENTRIES, config.CHATBOT_CACHE_TTL_SECONDS)
 
         # Product knowledge cache
         self.product_cache = {}
         self.category_cache = {}
+        self.product_index = ProductIndex({})
         self.last_cache_update = 0
-        self.cache_ttl = 300  # 5 minutes
+        self.cache_ttl = config.PRODUCT_CACHE_TTL_SECONDS
+        self.catalog_sync = CatalogSync(
+            self.backend_api_url, config.PRODUCT_SYNC_PAGE_SIZE, config.PRODUCT_SYNC_CONCURRENCY,
+            delta=config.PRODUCT_SYNC_MODE == "delta", full_every=config.PRODUCT_SYNC_FULL_EVERY,
+            breaker=self.breakers["products"])
+        # Catalog persisted after each refresh so restarts serve it immediately
+        self.snapshot_path = config.PRODUCT_SNAPSHOT_PATH
+        # No sample until the first successful refresh
+        product_cache_age.set_function(lambda: self.product_cache_age())
 
         # Intent patterns for Vietnamese - Enhanced with product knowledge
-        self.intent_patterns = {
-            Intent.CREATE_ORDER: [
-                r"(?:muốn|cần|đặt|mua|order|lấy|có thể)\s*(?:một|mô hình|figure|sản phẩm)",
-                r"(?:tôi|em|mình)\s+(?:muốn|cần|đặt|mua|lấy)",
-                r"(?:có thể|được không)\s+(?:đặt|mua|order|lấy)",
-                r"(?:thêm|add)\s+(?:vào|into)\s+(?:giỏ|cart)",
-                r"(?:mua|đặt|order)\s+(?:ngay|luôn|now)",
-                r"(?:muốn|cần)\s+(?:mua|đặt|order)"
-            ],
-            Intent.CANCEL_ORDER: [
-                r"(?:hủy|cancel)\s+(?:đơn|order)",
-                r"(?:không|ko)\s+(?:muốn|cần)\s+(?:nữa|rồi)",
-                r"(?:bỏ|hủy)\s+(?:đặt hàng|order)"
-            ],
-            Intent.CHECK_ORDER_STATUS: [
-                r"(?:kiểm tra|check|xem)\s+(?:đơn|order|trạng thái)",
-                r"(?:đơn|order)\s+(?:của|tôi|em)\s+(?:thế nào|ra sao)",
-                r"(?:tình trạng|status)\s+(?:đơn hàng|order)",
-                r"(?:đơn hàng|order)\s+(?:đang|hiện tại)"
-            ],
-            Intent.GET_PRODUCT_INFO: [
-                # Broader patterns for product searches
-                r"(?:tôi|em|mình)\s+(?:muốn|cần)\s+(?:tìm|find|search)\s*(?:sản phẩm|mô hình|figure)",
-                r"(?:tìm|find|search)\s+(?:sản phẩm|mô hình|figure|product)",
-                r"(?:cho|show|hiển thị)\s+(?:tôi|em|mình)\s+(?:sản phẩm|mô hình|figure)",
-                r"(?:có|available)\s+(?:sản phẩm|mô hình|figure)\s+(?:gì|nào|what)",
-                r"(?:gợi ý|suggest|recommend)\s+(?:sản phẩm|mô hình|figure)",
-                r"(?:thông tin|info|chi tiết)\s+(?:về|của|about)\s+(?:sản phẩm|mô hình|figure)",
-                r"(?:giá|price|cost)\s+(?:của|bao nhiêu|how much)",
-                r"(?:mô tả|description)\s+(?:sản phẩm|figure)",
-                # Specific character names
-                r"(?:naruto|goku|luffy|sasuke|vegeta|ichigo|eren)",
-                r"(?:one piece|dragon ball|attack on titan|demon slayer|my hero academia)",
-                r"(?:anime|manga)\s+(?:figure|mô hình)"
-            ],
-            Intent.SEARCH_PRODUCTS: [
-                r"(?:tìm kiếm|search|find)\s+(?:theo|by)\s+(?:danh mục|category)",
-                r"(?:xem|show)\s+(?:tất cả|all)\s+(?:danh mục|categories)",
-                r"(?:sản phẩm|products)\s+(?:trong|of)\s+(?:danh mục|category)",
-                r"(?:naruto|one piece|dragon ball|demon slayer|my hero academia|attack on titan|jujutsu kaisen)"
-            ],
-            Intent.CHECK_STOCK: [
-                r"(?:còn hàng|in stock|available|hết hàng|out of stock)",
-                r"(?:kiểm tra|check)\s+(?:hàng tồn kho|stock|availability)",
-                r"(?:số lượng|quantity)\s+(?:còn lại|remaining)"
-            ],
-            Intent.CUSTOMIZATION_INQUIRY: [
-                r"(?:tùy chỉnh|customize|customization)",
-                r"(?:màu sắc|color|size|accessory|phụ kiện)",
-                r"(?:thay đổi|change|modify)\s+(?:màu|color|size)"
-            ],
-            Intent.PRICE_INQUIRY: [
-                r"(?:giá|price|cost|bao nhiêu|rẻ|đắt)",
-                r"(?:khuyến mãi|sale|discount|promotion)",
-                r"(?:so sánh|compare)\s+(?:giá|price)"
-            ],
-            Intent.GREETING: [
-                r"(?:xin chào|hello|hi|chào|hey)",
-                r"(?:chào|hello)\s+(?:bạn|anh|chị|admin|support)",
-                r"(?:good morning|good afternoon|good evening)",
-                r"(?:buổi sáng|buổi chiều|buổi tối)\s+(?:tốt lành|vui vẻ)"
-            ],
-            Intent.GOODBYE: [
-                r"(?:tạm biệt|goodbye|bye|chào|see you)",
-                r"(?:hẹn gặp lại|see you|until next time)",
-                r"(?:cảm ơn|thank you)\s*(?:và|rồi|nhé|很多|much)?",
-                r"(?:kết thúc|end|finish|done)"
-            ],
-            Intent.HELP: [
-                r"(?:giúp|help|hỗ trợ|support|tư vấn|advice)",
-                r"(?:không hiểu|don't understand|confused)",
-                r"(?:hướng dẫn|guide|instruction|tutorial)"
-            ]
+        self.intent_patterns = INTENT_PATTERNS
+        self.intent_matcher = IntentMatcher(self.intent_patterns)
+
+        # Entity extraction - keyword automaton for dictionary entities
+        # (rebuilt off the event loop when catalog names change) plus
+        # pre-compiled regexes for the free-form ones
+        self.entity_patterns = ENTITY_PATTERNS
+        self.entity_regexes = {
+            entity_type: [re.compile(pattern) for pattern in patterns]
+            for entity_type, patterns in self.entity_patterns.items()
         }
+        self.entity_automaton = build_entity_automaton()
+        self._entity_vocabulary = frozenset()
 
-        # Entity extraction patterns - Enhanced with product knowledge
-        self.entity_patterns = {
-            "product": [
-                # Character names - case insensitive
-                r"(naruto|uzumaki|sasuke|kakashi|itachi|minato|madara|hinata|jiraya)",
-                r"(goku|vegeta|gohan|piccolo|frieza|cell|majin buu|goku black|jiren|beerus|whis)",
-                r"(luffy|zoro|sanji|nami|chopper|robin|brook|franky|jinbe|ace|law|kid|katakuri)",
-                r"(ichigo|rukia|byakuya|kenpachi|aizen)",
-                r"(eren|mikasa|levi|armin|annie)",
-                r"(tanjiro|nezuko|zenitsu|inosuke|giyu|rengoku)",
-                r"(deku|bakugo|todoroki|all might|endeavor|uraraka|kirishima)",
-                # Series names
-                r"(one piece|dragon ball|naruto|bleach|attack on titan|demon slayer|my hero academia|jujutsu kaisen)",
-                r"(studio ghibli|spirited away|totoro|princess mononoke)",
-                # General patterns
-                r"(?:mô hình|figure|model)\s+([a-z\s]+)",
-                r"(?:anime|manga)\s+([a-z\s]+)",
-                r"(?:nhân vật|character)\s+([a-z\s]+)"
-            ],
-            "category": [
-                r"(naruto|one piece|dragon ball|demon slayer|my hero academia|attack on titan|jujutsu kaisen)",
-                r"(anime|manga|figure|mô hình|nhân vật)"
-            ],
-            "quantity": [
-                r"(\d+)\s+(?:cái|chiếc|mô hình|figure|sản phẩm)",
-                r"(một|hai|ba|bốn|năm|sáu|bảy|tám|chín|mười)\s+(?:cái|chiếc)",
-                r"(\d+)"  # Any number
-            ],
-            "color": [
-                r"(?:màu\s+)?(đỏ|xanh|vàng|đen|trắng|hồng|tím|cam|red|blue|yellow|black|white|pink|purple|orange)"
-            ],
-            "price_range": [
-                r"(?:giá\s+)?(rẻ|cheap|đắt|expensive|cao|thấp|low|high)",
-                r"(\d+)\s*(?:triệu|tr|nghìn|k|đồng|vnd)",
-                r"(?:dưới|under|trên|over)\s+(\d+)\s*(?:triệu|tr|nghìn|k)"
-            ]
-        }
+        # Background task synthesising the canned-response clips
+        self._tts_prewarm_task: Optional[asyncio.Task] = None
+
+        # Periodic catalog refresher, and the one refresh allowed in flight
+        self._product_refresher: Optional[asyncio.Task] = None
+        self._product_refresh: Optional[asyncio.Task] = None
 
-    async def refresh_product_cache(self):
-        """Refresh product and category cache from backend"""
+    def product_cache_age(self) -> Optional[float]:
+        """Seconds since the last successful catalog refresh, None before the first"""
+        if not self.last_cache_update:
+            return None
+        return time.time() - self.last_cache_update
+
+    async def ensure_product_cache(self):
+        """Make sure a catalog snapshot is available to the current request
+
+        Once a snapshot exists requests never wait for the backend: a stale
+        one is served while the background refresher replaces it (or, if the
+        refresher is not running, while a refresh started here does). Only
+        requests arriving before the first snapshot wait, all joining the
+        same in-flight refresh; while the refresher is backing off they get
+        the empty catalog instead of adding load to a failing backend.
+        """
+        refresher_running = self._product_refresher is not None and not self._product_refresher.done()
+        refreshing = self._product_refresh is not None and not self._product_refresh.done()
+        if not self.last_cache_update:
+            product_cache_misses.inc()
+            # Wait for the first snapshot, unless the refresher is backing off
+            if refreshing or not refresher_running:
+                await self.refresh_product_cache()
+            return
+        product_cache_hits.inc()
+        if self.product_cache_age() >= self.cache_ttl and not (refresher_running or refreshing):
+            self._product_refresh = asyncio.create_task(self._refresh_product_cache())
+
+    async def refresh_product_cache(self) -> bool:
+        """Fetch a new catalog snapshot, joining the refresh in flight if there is one"""
+        if self._product_refresh is None or self._product_refresh.done():
+            self._product_refresh = asyncio.create_task(self._refresh_product_cache())
+        # A cancelled waiter must not cancel the refresh other requests share
+        return await asyncio.shield(self._product_refresh)
+
+    async def _refresh_product_cache(self) -> bool:
+        """Sync the catalog from the backend and swap or patch it in without a mixed state"""
+        start_time = time.time()
         try:
-            current_time = time.time()
-            if current_time - self.last_cache_update < self.cache_ttl:
-                return  # Cache still valid
-
-            # Fetch products from backend
-            products_response = requests.get(
-                f"{self.backend_api_url}/products")
-            if products_response.status_code == 200:
-                products = products_response.json().get("data", {}).get("products", [])
-                self.product_cache = {
-                    p['id']: p for p in products}
-
-            # Fetch categories from backend
-            categories_response = requests.get(
-                f"{self.backend_api_url}/products/categories/all")
-            if categories_response.status_code == 200:
-                categories = categories_response.json().get("data", {}).get("categories", [])
-                self.category_cache = {
-                    c['id']: c for c in categories}
-
-            self.last_cache_update = current_time
+            changes = await self.catalog_sync.sync(self.product_cache)
+            product_sync_pages.inc(changes.pages_fetched, result="fetched")
+            product_sync_pages.inc(changes.pages_unchanged, result="unchanged")
+            category_cache = (changes.categories if changes.categories is not None
+                              else self.category_cache)
+
+            if changes.full:
+                # Build off the event loop while requests keep using the old snapshot
+                loop = asyncio.get_running_loop()
+                product_index = await loop.run_in_executor(None, ProductIndex, changes.products)
+                entity_automaton, vocabulary = await self._build_entity_automaton(
+                    self._catalog_vocabulary(changes.products.values(), category_cache))
+
+                # Swap with no await in between so no request sees a mixed snapshot
+                self.product_cache = changes.products
+                self.category_cache = category_cache
+                self.product_index = product_index
+                self.entity_automaton = entity_automaton
+                self._entity_vocabulary = vocabulary
+            elif changes.products or changes.removed_ids or changes.categories is not None:
+                changed = changes.products.keys() | changes.removed_ids
+                entity_automaton, vocabulary = await self._build_entity_automaton(
+                    self._catalog_vocabulary(
+                        [p for product_id, p in self.product_cache.items() if product_id not in changed] +
+                        list(changes.products.values()),
+                        category_cache))
+
+                # Patch the cache and index in place, again with no await in between
+                for product_id in changes.removed_ids:
+                    self.product_cache.pop(product_id, None)
+                self.product_cache.update(changes.products)
+                self.product_index.apply_delta(changes.products.values(), changes.removed_ids)
+                self.category_cache = category_cache
+                self.entity_automaton = entity_automaton
+                self._entity_vocabulary = vocabulary
+                product_sync_changes.inc(len(changes.products), kind="upserted")
+                product_sync_changes.inc(len(changes.removed_ids), kind="removed")
+
+                if self.product_index.removed > len(self.product_index):
+                    # Mostly empty slots after many deletions: compact
+                    loop = asyncio.get_running_loop()
+                    self.product_index = await loop.run_in_executor(
+                        None, ProductIndex, dict(self.product_cache))
+
+            self.last_cache_update = time.time()
+            product_cache_refreshes.inc(result="success")
+            if changes.full or changes.products or changes.removed_ids or changes.categories is not None:
+                await self._save_product_snapshot()
+            sync_kind = "full" if changes.full else (
+                f"delta: {len(changes.products)} upserted, {len(changes.removed_ids)} removed")
             logger.info(
-                f"Product cache refreshed: {len(self.product_cache)} products, {len(self.category_cache)} categories")
+                f"Product cache refreshed ({sync_kind}): {len(self.product_cache)} products, "
+                f"{len(self.category_cache)} categories, {changes.pages_fetched} pages fetched, "
+                f"{changes.pages_unchanged} unchanged in {time.time() - start_time:.2f}s")
+            return True
 
         except Exception as e:
+            product_cache_refreshes.inc(result="failure")
             logger.error(f"Error refreshing product cache: {e}")
+            return False
+        finally:
+            product_cache_refresh_seconds.set(time.time() - start_time)
 
+    async def _save_product_snapshot(self):
+        """Persist the catalog; a failure only costs the next warm start"""
+        if not self.snapshot_path:
+            return
+        try:
+            # Only the single in-flight refresh mutates the catalog, and it waits here
+            loop = asyncio.get_running_loop()
+            size = await loop.run_in_executor(
+                None, save_snapshot, self.snapshot_path, self.backend_api_url,
+                self.product_cache, self.category_cache, self.catalog_sync.state())
+            product_snapshot_bytes.set(size)
+        except Exception as e:
+            logger.warning(f"Could not save product snapshot: {str(e)}")
+
+    async def load_product_snapshot(self) -> bool:
+        """Serve the persisted catalog until the first refresh replaces it"""
+        if not self.snapshot_path:
+            return False
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        snapshot = await loop.run_in_executor(
+            None, load_snapshot, self.snapshot_path, self.backend_api_url,
+            config.PRODUCT_SNAPSHOT_MAX_AGE_SECONDS)
+        if snapshot is None:
+            return False
+
+        product_index = await loop.run_in_executor(None, ProductIndex, snapshot.products)
+        entity_automaton, vocabulary = await self._build_entity_automaton(
+            self._catalog_vocabulary(snapshot.products.values(), snapshot.categories))
+
+        self.product_cache = snapshot.products
+        self.category_cache = snapshot.categories
+        self.product_index = product_index
+        self.entity_automaton = entity_automaton
+        self._entity_vocabulary = vocabulary
+        # Age counts from when the snapshot was taken, so it is revalidated right away
+        self.last_cache_update = snapshot.saved_at
+        self.catalog_sync.restore(snapshot.sync_state)
+
+        product_snapshot_load_seconds.set(time.time() - start_time)
+        logger.info(
+            f"Product snapshot loaded: {len(self.product_cache)} products, "
+            f"{len(self.category_cache)} categories, {time.time() - snapshot.saved_at:.0f}s old, "
+            f"in {time.time() - start_time:.2f}s")
+        return True
+
+    def start_product_refresher(self):
+        """Start refreshing the catalog in the background"""
+        if self._product_refresher is None or self._product_refresher.done():
+            self._product_refresher = asyncio.create_task(self._product_refresh_loop())
+
+    async def _product_refresh_loop(self):
+        """Refresh the catalog before it goes stale; back off with jitter while the backend fails"""
+        failures = 0
+        while True:
+            if await self.refresh_product_cache():
+                failures = 0
+                # Refresh ahead of the TTL, spread so replicas do not sync up
+                delay = self.cache_ttl * random.uniform(0.7, 0.9)
+            else:
+                failures += 1
+                backoff = min(config.PRODUCT_CACHE_MAX_BACKOFF_SECONDS,
+                              config.PRODUCT_CACHE_RETRY_SECONDS * 2 ** (failures - 1))
+                delay = backoff / 2 + random.uniform(0, backoff / 2)
+                logger.info(f"Retrying product cache refresh in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    async def startup(self):
+        """Start shared resources (called from the app startup event)"""
+        await http_client.start()
+        decode_pool.start()
+        io_pool.start()
+        stt_pool.start()
+        tts_pool.start()
+        await tts_cache.load()
+        # Load local models/voices before taking traffic
+        if STT_BACKENDS[config.STT_BACKEND].local:
+            try:
+                await stt_pool.run(load_stt_backend)
+            except Exception as e:
+                self.stt_available = False
+                logger.error(f"STT backend '{config.STT_BACKEND}' unavailable: {str(e)}")
+        if tts_backend_class.local:
+            try:
+                await tts_pool.run(load_tts_backend)
+            except Exception as e:
+                self.tts_available = False
+                logger.error(f"TTS backend '{config.TTS_BACKEND}' unavailable: {str(e)}")
+        # Warm start from the last snapshot; the refresher revalidates it next
+        try:
+            await self.load_product_snapshot()
+        except Exception as e:
+            logger.warning(f"Could not load product snapshot: {str(e)}")
+        self.start_product_refresher()
+
+    def start_tts_prewarm(self):
+        """Start pre-warming canned-response TTS clips in the background"""
+        if self._tts_prewarm_task is None or self._tts_prewarm_task.done():
+            self._tts_prewarm_task = asyncio.create_task(self.prewarm_tts_cache())
+
+    async def prewarm_tts_cache(self):
+        """Synthesise every canned response in every language into the TTS cache
+
+        At most TTS_PREWARM_CONCURRENCY clips are synthesised at once so the
+        warm-up never crowds real requests off the I/O pool. Requests that
+        arrive before a clip is ready synthesise it lazily, or join the
+        in-flight synthesis through the cache.
+        """
+        start_time = time.time()
+        semaphore = asyncio.Semaphore(max(1, config.TTS_PREWARM_CONCURRENCY))
+        texts = list(BASIC_RESPONSES.values()) + [DEFAULT_BASIC_RESPONSE]
+        tts_prewarm_ready.set(0)
+        tts_prewarm_clips.set(0)
+
+        async def warm(text: str, language: SupportedLanguage) -> bool:
+            key, extension = self._tts_cache_key(text, language)
+            if not tts_cache.contains(key, extension):
+                async with semaphore:
+                    try:
+                        await self._synthesize_speech(text, language)
+                    except Exception as e:
+                        logger.warning(
+                            f"TTS pre-warm failed for {language.value}: {str(e)}")
+                        return False
+            tts_prewarm_clips.inc()
+            return True
+
+        results = await asyncio.gather(
+            *(warm(text, language) for language in SupportedLanguage for text in texts))
+        if all(results):
+            tts_prewarm_ready.set(1)
+        logger.info(
+            f"TTS pre-warm finished: {sum(results)}/{len(results)} clips cached "
+            f"in {time.time() - start_time:.1f}s")
+
+    async def shutdown(self):
+        """Release shared resources (called from the app shutdown event)"""
+        for task in (self._tts_prewarm_task, self._product_refresher, self._product_refresh):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        await http_client.close()
+        decode_pool.shutdown()
+        io_pool.shutdown()
+        stt_pool.shutdown()
+        tts_pool.shutdown()
+
+    @staticmethod
+    def _catalog_vocabulary(products: Iterable[Dict[str, Any]],
+                            categories: Dict[Any, Dict[str, Any]]) -> frozenset:
+        """Product and category names the entity automaton must know"""
+        return frozenset(
+            [("product", p.get('name')) for p in products] +
+            [("category", c.get('name')) for c in categories.values()]
+        )
+
+    async def _build_entity_automaton(self, vocabulary: frozenset):
+        """Return (automaton, vocabulary), rebuilding the automaton only if the names changed"""
+        if vocabulary == self._entity_vocabulary:
+            return self.entity_automaton, vocabulary
+
+        # Build in a worker thread; the caller swaps the reference
+        loop = asyncio.get_running_loop()
+        automaton = await loop.run_in_executor(
+            None, build_entity_automaton, vocabulary)
+        logger.info(
+            f"Entity automaton rebuilt: {len(automaton)} keywords")
+        return automaton, vocabulary
+
+    @timed("chatbot")
     async def query_chatbot(self, text: str, language: str = 'vi-VN') -> Dict[str, Any]:
+        """Query the chatbot service, reusing recent and in-flight answers to the same utterance"""
+        return await self.chatbot_cache.get_or_fetch(
+            text, language, lambda: self._post_chatbot_query(text, language))
+
+    async def _post_chatbot_query(self, text: str, language: str) -> Dict[str, Any]:
         """Query the chatbot service for intelligent responses"""
         try:
-            response = requests.post(
+            status, data = await self.breakers["chatbot"].call(
+                http_client.post_json,
                 f"{self.chatbot_api_url}/query",
-                json={
+                {
                     "text": text,
                     "language": language,
                     "context": {"source": "voice_agent"}
                 },
-                timeout=10
+                is_failure=lambda result: result[0] >= 500
             )
 
-            if response.status_code == 200:
-                return response.json()
+            if status == 200:
+                return data or {}
             else:
-                logger.warning(f"Chatbot API returned {response.status_code}")
+                logger.warning(f"Chatbot API returned {status}")
                 return {}
 
+        except CircuitOpenError as e:
+            logger.debug(f"Skipping chatbot query: {e}")
+            return {}
+        except asyncio.TimeoutError:
+            logger.warning("Chatbot query timed out")
+            return {}
         except Exception as e:
             logger.error(f"Error querying chatbot: {e}")
             return {}
 
+    async def _within_deadline(self, stage: str, awaitable: Awaitable, deadline: float, fallback: Any) -> Any:
+        """Await a pipeline stage for at most deadline seconds, else cancel it and return fallback"""
+        try:
+            return await asyncio.wait_for(awaitable, deadline)
+        except asyncio.TimeoutError:
+            stage_deadline_misses.inc(stage=stage)
+            logger.warning(f"{stage} missed its {deadline:.1f}s deadline, answering without it")
+            return fallback
+
+    @staticmethod
+    def wants_products(intent: str) -> bool:
+        """Whether an intent's response should carry product recommendations"""
+        return intent in [Intent.GET_PRODUCT_INFO, Intent.SEARCH_PRODUCTS]
+
+    async def fan_out(self, text: str, language: SupportedLanguage, intent: str,
+                      entities: List[Entity], with_products: bool) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """Query the chatbot and recommend products concurrently, each within its deadline
+
+        A chatbot that misses CHATBOT_DEADLINE_SECONDS yields an empty
+        response, so the reply falls back to the basic response; late
+        recommendations are left out. Neither stage waits for the other.
+        """
+        chatbot = self._within_deadline(
+            "chatbot", self.query_chatbot(text, language.value), config.CHATBOT_DEADLINE_SECONDS, {})
+        if not with_products:
+            return await chatbot, []
+        recommendations = self._within_deadline(
+            "recommendations", self.get_product_recommendations(intent, entities),
+            config.RECOMMENDATION_DEADLINE_SECONDS, [])
+        chatbot_response, product_recommendations = await asyncio.gather(chatbot, recommendations)
+        return chatbot_response, product_recommendations
+
+    @timed("recommendations")
     async def get_product_recommendations(self, intent: str, entities: List[Entity]) -> List[Dict[str, Any]]:
         """Get product recommendations based on intent and entities"""
-        await self.refresh_product_cache()
+        await self.ensure_product_cache()
 
-        recommendations = []
+        return self._recommend(self.product_index, entities)
 
+    def _recommend(self, product_index: ProductIndex, entities: List[Entity]) -> List[Dict[str, Any]]:
+        """Top 5 products of an index snapshot for the extracted entities"""
         # Extract product-related entities
         product_names = [e.value for e in entities if e.type == "product"]
         categories = [e.value for e in entities if e.type == "category"]
         price_ranges = [e.value for e in entities if e.type == "price_range"]
 
-        if not self.product_cache:
-            return recommendations
-
-        # Filter products based on entities
-        for product in self.product_cache.values():
-            score = 0
-
-            # Product name match
-            if any(name.lower() in product['name'].lower() for name in product_names):
-                score += 10
-
-            # Category match
-            if categories and product.get('category') and any(cat.lower() in product['category']['name'].lower() for cat in categories):
-                score += 8
-
-            # Price range match
-            if price_ranges:
-                price = float(product['price'])
-                for price_range in price_ranges:
-                    if 'rẻ' in price_range.lower() or 'cheap' in price_range.lower():
-                        if price < 2000000:  # Under 2M VND
-                            score += 5
-                    elif 'đắt' in price_range.lower() or 'expensive' in price_range.lower():
-                        if price > 3000000:  # Over 3M VND
-                            score += 5
-
-            if score > 0:
-                recommendations.append({
-                    **product,
-                    'relevance_score': score
-                })
-
-        # Sort by relevance score and return top 5
-        recommendations.sort(key=lambda x: x['relevance_score'], reverse=True)
-        return recommendations[:5]
-
-    def setup_tts_engine(self):
-        """Setup text-to-speech engine with optimized settings"""
-        voices = self.tts_engine.getProperty('voices')
-        if voices:
-            # Try to set a female voice if available
-            for voice in voices:
-                if 'female' in voice.name.lower() or 'woman' in voice.name.lower():
-                    self.tts_engine.setProperty('voice', voice.id)
-                    break
-
-        self.tts_engine.setProperty('rate', 180)  # Speaking rate
-        self.tts_engine.setProperty('volume', 0.9)  # Volume level
+        # Score only the candidates from the inverted index, return top 5
+        return product_index.recommend(
+            product_names, categories, price_ranges, limit=5)
+
+    async def search_products(self, query: str, category: Optional[str] = None,
+                              price_range: Optional[str] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top products for a free-text query, filtered by category name and price range"""
+        await self.ensure_product_cache()
+
+        entities = self._extract_entities(query)
+        return self.product_index.recommend(
+            [e.value for e in entities if e.type == "product"],
+            [e.value for e in entities if e.type == "category"],
+            [e.value for e in entities if e.type == "price_range"],
+            limit=limit, category_filter=category, price_filter=price_range)
 
     async def process_audio_file(self, file: UploadFile, language: SupportedLanguage = SupportedLanguage.VIETNAMESE, enable_tts: bool = False) -> VoiceResponse:
         """Process uploaded audio file and return voice response"""
@@ -279,59 +557,171 @@ class VoiceAgentService:
                 raise HTTPException(
                     status_code=400, detail="Unsupported audio format")
 
-            # Save uploaded file temporarily
-            temp_path = await self._save_temp_file(file)
+            with collect_timings():
+                # Read the upload into memory - no temp files on the hot path
+                with span("upload"):
+                    content = await file.read()
+                suffix = Path(file.filename).suffix.lower()
+
+                # Decode to 16 kHz mono PCM, trim silence and get transcript
+                clip = await self._prepare_audio_file(content, suffix)
+                transcript = await self._speech_to_text(clip, language)
+
+                response = await self.process_transcript(
+                    transcript, language, enable_tts, start_time)
+
+            clip_processing_seconds.observe(time.time() - start_time)
+            if clip is not None:
+                logger.info(
+                    f"Clip processed in {response.processing_time_ms} ms: "
+                    f"{clip.decoded_bytes} bytes decoded, {len(clip.pcm)} sent to STT "
+                    f"(noise floor {clip.noise_floor_db:.1f} dBFS)")
+            return response
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error processing audio: {str(e)}")
+            raise HTTPException(
+                status_code=500, detail=f"Audio processing failed: {str(e)}")
 
-            try:
-                # Convert audio if needed and get transcript
-                audio_path = await self._prepare_audio_file(temp_path)
-                transcript = await self._speech_to_text(audio_path, language)
+    async def process_transcript(self, transcript: str, language: SupportedLanguage,
+                                 enable_tts: bool = False,
+                                 start_time: Optional[float] = None) -> VoiceResponse:
+        """Run NLP, chatbot and recommendations on a transcript and build the response
 
-                # Process NLP
-                intent = self._extract_intent(transcript)
-                entities = self._extract_entities(transcript)
-                confidence = self._calculate_confidence(
-                    transcript, intent, entities)
+        Stage timings collected for the request so far (decode and STT for
+        audio) are included when STAGE_TIMINGS_IN_RESPONSE is set.
+        """
+        if start_time is None:
+            start_time = time.time()
 
-                # Query chatbot for intelligent response
-                chatbot_response = await self.query_chatbot(transcript, language.value)
+        with collect_timings() as timings:
+            # Process NLP
+            intent, entities, confidence = self._analyze_text(transcript)
 
-                # Get product recommendations if relevant
-                product_recommendations = []
-                if intent in [Intent.GET_PRODUCT_INFO, Intent.SEARCH_PRODUCTS]:
-                    product_recommendations = await self.get_product_recommendations(intent, entities)
+            # Query chatbot and get product recommendations (if relevant) concurrently
+            chatbot_response, product_recommendations = await self.fan_out(
+                transcript, language, intent, entities, self.wants_products(intent))
 
-                # Generate enhanced response
+            # Generate enhanced response
+            with span("response"):
                 response_text = self._generate_enhanced_response(
                     intent, entities, transcript, chatbot_response, product_recommendations)
 
-                # Generate TTS audio if requested
-                audio_url = await self._generate_tts_audio(response_text, language) if enable_tts else None
+            # Generate TTS audio if requested
+            audio_url = await self._generate_tts_audio(response_text, language) if enable_tts else None
+
+        processing_time = int((time.time() - start_time) * 1000)
+
+        return VoiceResponse(
+            transcript=transcript,
+            intent=intent,
+            entities=entities,
+            confidence=confidence,
+            response_text=response_text,
+            audio_url=audio_url,
+            processing_time_ms=processing_time,
+            product_recommendations=product_recommendations,
+            stage_timings_ms=timings.as_dict() if config.STAGE_TIMINGS_IN_RESPONSE else None
+        )
+
+    async def process_text_batch(self, items: List[VoiceProcessRequest]) -> List[BatchItemResult]:
+        """Process many utterances at once and return one result per item, in input order
+
+        NLP runs over the whole batch in one pass, identical chatbot queries
+        are sent once with at most BATCH_CONCURRENCY in flight while the
+        product cache is checked, and every item is scored against the same
+        product index snapshot. A failing
+        item is returned as an error instead of failing the batch.
+        """
+        start_time = time.time()
+        batch_items.inc(len(items))
+        errors: Dict[int, str] = {}
+        semaphore = asyncio.Semaphore(config.BATCH_CONCURRENCY)
+        languages = [item.language or SupportedLanguage.VIETNAMESE for item in items]
+
+        # Process NLP for every item with the same matcher and automaton
+        analyses = {}
+        for index, item in enumerate(items):
+            try:
+                analyses[index] = self._analyze_text(item.text)
+            except Exception as e:
+                errors[index] = f"Text analysis failed: {str(e)}"
+
+        # Query the chatbot once per distinct (text, language)
+        queries = list(dict.fromkeys(
+            (items[index].text, languages[index].value) for index in analyses))
+        batch_chatbot_queries.inc(len(queries))
+        wants_products = [
+            index for index, (intent, _, _) in analyses.items() if self.wants_products(intent)
+        ]
+
+        async def ask(text: str, language: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self._within_deadline(
+                    "chatbot", self.query_chatbot(text, language), config.CHATBOT_DEADLINE_SECONDS, {})
+
+        async def load_products():
+            # Without a catalog in time the empty index yields no recommendations
+            if wants_products:
+                await self._within_deadline(
+                    "recommendations", self.ensure_product_cache(),
+                    config.RECOMMENDATION_DEADLINE_SECONDS, None)
+
+        answers, _ = await asyncio.gather(
+            asyncio.gather(*(ask(*query) for query in queries), return_exceptions=True),
+            load_products())
+        chatbot_responses = {
+            query: answer if isinstance(answer, dict) else {}
+            for query, answer in zip(queries, answers)
+        }
 
-                processing_time = int((time.time() - start_time) * 1000)
+        # Score every recommendation against one catalog snapshot
+        product_index = self.product_index
 
-                return VoiceResponse(
-                    transcript=transcript,
+        responses: Dict[int, VoiceResponse] = {}
+        for index, (intent, entities, confidence) in analyses.items():
+            text = items[index].text
+            try:
+                product_recommendations = (
+                    self._recommend(product_index, entities) if index in wants_products else [])
+                response_text = self._generate_enhanced_response(
+                    intent, entities, text,
+                    chatbot_responses[(text, languages[index].value)], product_recommendations)
+                responses[index] = VoiceResponse(
+                    transcript=text,
                     intent=intent,
                     entities=entities,
                     confidence=confidence,
                     response_text=response_text,
-                    audio_url=audio_url,
-                    processing_time_ms=processing_time,
+                    processing_time_ms=0,
                     product_recommendations=product_recommendations
                 )
+            except Exception as e:
+                errors[index] = f"Text processing failed: {str(e)}"
 
-            finally:
-                # Cleanup temp files
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-                if 'audio_path' in locals() and audio_path != temp_path and os.path.exists(audio_path):
-                    os.unlink(audio_path)
+        # Generate TTS audio if requested; identical replies share one clip
+        async def speak(index: int):
+            async with semaphore:
+                responses[index].audio_url = await self._generate_tts_audio(
+                    responses[index].response_text, languages[index])
 
-        except Exception as e:
-            logger.error(f"Error processing audio: {str(e)}")
-            raise HTTPException(
-                status_code=500, detail=f"Audio processing failed: {str(e)}")
+        await asyncio.gather(*(
+            speak(index) for index in responses if items[index].enable_tts))
+
+        processing_time = int((time.time() - start_time) * 1000)
+        for response in responses.values():
+            response.processing_time_ms = processing_time
+
+        if errors:
+            batch_item_errors.inc(len(errors))
+            logger.warning(f"Batch of {len(items)} finished with {len(errors)} failed items")
+
+        return [
+            BatchItemResult(index=index, response=responses.get(index), error=errors.get(index))
+            for index in range(len(items))
+        ]
 
     def _is_valid_audio_format(self, filename: str) -> bool:
         """Check if the uploaded file has a valid audio format"""
@@ -341,91 +731,93 @@ class VoiceAgentService:
         extension = Path(filename).suffix.lower().lstrip('.')
         return extension in [format.value for format in AudioFormat]
 
-    async def _save_temp_file(self, file: UploadFile) -> str:
-        """Save uploaded file to temporary location"""
-        suffix = Path(file.filename or "audio.wav").suffix
-        with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            return temp_file.name
-
-    async def _prepare_audio_file(self, file_path: str) -> str:
-        """Prepare audio file for speech recognition (convert format if needed)"""
+    @timed("decode")
+    async def _prepare_audio_file(self, content: bytes, suffix: str) -> Optional[SpeechClip]:
+        """Decode uploaded audio to 16 kHz mono PCM trimmed to the speech"""
         try:
-            # Load audio file
-            audio, sr_rate = librosa.load(file_path, sr=16000)
-
-            # Convert to WAV format for speech recognition
-            wav_path = file_path.replace(Path(file_path).suffix, '.wav')
-            sf.write(wav_path, audio, 16000)
-
-            return wav_path
+            # Decode/resample/VAD on the process pool to keep the event loop free
+            clip = await decode_pool.run(decode_speech, content, suffix)
+        except WorkerPoolSaturated:
+            raise
         except Exception as e:
             logger.error(f"Error preparing audio file: {str(e)}")
-            return file_path
+            return None
 
-    async def _speech_to_text(self, audio_path: str, language: SupportedLanguage) -> str:
-        """Convert speech to text using speech recognition"""
-        try:
-            with sr.AudioFile(audio_path) as source:
-                # Adjust for ambient noise
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                audio = self.recognizer.record(source)
+        vad_trimmed_bytes.inc(clip.decoded_bytes - len(clip.pcm))
+        if not clip.pcm:
+            vad_rejected.inc()
+        return clip
 
-            # Use Google Speech Recognition
-            try:
-                transcript = self.recognizer.recognize_google(
-                    audio, language=language.value)
-                logger.info(f"Transcript: {transcript}")
-                return transcript
-            except sr.UnknownValueError:
-                return "Không thể nhận diện được giọng nói"
-            except sr.RequestError as e:
-                logger.error(f"Speech recognition service error: {str(e)}")
-                return "Lỗi dịch vụ nhận diện giọng nói"
+    async def _speech_to_text(self, clip: Optional[SpeechClip], language: SupportedLanguage) -> str:
+        """Convert speech to text using speech recognition"""
+        if clip is None:
+            return "Lỗi xử lý âm thanh"
+        if not clip.pcm:
+            # The VAD found no speech, don't spend an STT call on it
+            return "Không thể nhận diện được giọng nói"
 
+        try:
+            stt_audio_bytes.observe(len(clip.pcm))
+            transcript = await self.recognize(clip.pcm, language)
+        except WorkerPoolSaturated:
+            raise
+        except STTServiceError as e:
+            logger.error(f"Speech recognition service error: {str(e)}")
+            return "Lỗi dịch vụ nhận diện giọng nói"
         except Exception as e:
             logger.error(f"Error in speech to text: {str(e)}")
             return "Lỗi xử lý âm thanh"
 
-    def _matches_price_range(self, price: float, price_range: str) -> bool:
-        """Check if a price matches the specified price range"""
-        try:
-            if price_range.startswith("under_"):
-                max_price = float(price_range.split("_")[1])
-                return price <= max_price
-            elif price_range.startswith("over_"):
-                min_price = float(price_range.split("_")[1])
-                return price >= min_price
-            elif price_range in ["low", "rẻ", "cheap"]:
-                return price < 2000000  # Under 2M VND
-            elif price_range in ["high", "đắt", "expensive"]:
-                return price > 3000000  # Over 3M VND
-            else:
-                return True  # No filter applied
-        except:
-            return True
+        if transcript is None:
+            return "Không thể nhận diện được giọng nói"
+        logger.info(f"Transcript: {transcript}")
+        return transcript
+
+    @timed("stt")
+    async def recognize(self, pcm: bytes, language: SupportedLanguage) -> Optional[str]:
+        """Recognise 16 kHz mono PCM with the configured STT backend
 
+        Returns None when no speech is recognised; raises STTServiceError
+        when the engine or service is unavailable, keeps failing (circuit
+        open) or overruns its timeout.
+        """
+        try:
+            return await self.breakers["stt"].call(
+                stt_pool.run, transcribe, pcm, language.value, cost=len(pcm) / (TARGET_SAMPLE_RATE * PCM_SAMPLE_WIDTH))
+        except CircuitOpenError as e:
+            raise STTServiceError(str(e)) from e
+        except asyncio.TimeoutError as e:
+            raise STTServiceError("Speech recognition timed out") from e
+
+    def _analyze_text(self, text: str) -> Tuple[str, List[Entity], float]:
+        """Extract intent, entities and confidence from text"""
+        intent = self._extract_intent(text)
+        entities = self._extract_entities(text)
+        return intent, entities, self._calculate_confidence(text, intent, entities)
+
+    @timed("intent")
     def _extract_intent(self, text: str) -> str:
         """Extract intent from text using pattern matching"""
-        text_lower = text.lower()
-
-        for intent, patterns in self.intent_patterns.items():
-            for pattern in patterns:
-                if re.search(pattern, text_lower):
-                    return intent
-
-        return Intent.UNKNOWN
+        intent = self.intent_matcher.match(text.lower())
+        return intent if intent is not None else Intent.UNKNOWN
 
+    @timed("entities")
     def _extract_entities(self, text: str) -> List[Entity]:
-        """Extract entities from text using pattern matching"""
+        """Extract entities from text using the keyword automaton and patterns"""
         entities = []
         text_lower = text.lower()
-
-        for entity_type, patterns in self.entity_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, text_lower)
-                for match in matches:
+        keyword_matches = self.entity_automaton.search(text_lower)
+
+        for entity_type in ENTITY_TYPES:
+            for value in keyword_matches.get(entity_type, []):
+                entities.append(Entity(
+                    type=entity_type,
+                    value=value,
+                    confidence=0.8
+                ))
+
+            for regex in self.entity_regexes.get(entity_type, []):
+                for match in regex.finditer(text_lower):
                     value = match.group(
                         1) if match.groups() else match.group(0)
                     entities.append(Entity(
@@ -484,14 +876,18 @@ class VoiceAgentService:
         # Limit to top 3 for voice
         for i, product in enumerate(recommendations[:3], 1):
             name = product.get('name', 'Unknown')
-            price = product.get('price', 0)
-            category = product.get('category', {}).get('name', 'Unknown')
+            category = (product.get('category') or {}).get('name', 'Unknown')
+            # The backend sends Decimal prices as strings
+            try:
+                price = float(product.get('price') or 0)
+            except (TypeError, ValueError):
+                price = 0
 
             # Format price in Vietnamese
             if price >= 1000000:
-                price_str = f"{price // 1000000} triệu VND"
+                price_str = f"{int(price // 1000000)} triệu VND"
             else:
-                price_str = f"{price:,} VND"
+                price_str = f"{price:,.0f} VND"
 
             response += f"{i}. {name} - {category} - Giá {price_str}\n"
 
@@ -499,83 +895,130 @@ class VoiceAgentService:
 
     def _generate_basic_response(self, intent: str, entities: List[Entity], transcript: str) -> str:
         """Generate basic response when chatbot is not available"""
-        responses = {
-            Intent.CREATE_ORDER: "Tôi sẽ giúp bạn đặt hàng. Bạn muốn mua sản phẩm nào?",
-            Intent.CANCEL_ORDER: "Tôi hiểu bạn muốn hủy đơn hàng. Bạn có thể cung cấp mã đơn hàng không?",
-            Intent.CHECK_ORDER_STATUS: "Tôi sẽ kiểm tra trạng thái đơn hàng cho bạn. Bạn có mã đơn hàng không?",
-            Intent.GET_PRODUCT_INFO: "Tôi sẽ tìm thông tin sản phẩm cho bạn. Bạn quan tâm đến sản phẩm nào?",
-            Intent.SEARCH_PRODUCTS: "Tôi sẽ giúp bạn tìm kiếm sản phẩm. Bạn muốn tìm theo danh mục nào?",
-            Intent.CHECK_STOCK: "Tôi sẽ kiểm tra tình trạng hàng tồn kho. Bạn muốn kiểm tra sản phẩm nào?",
-            Intent.CUSTOMIZATION_INQUIRY: "Tôi sẽ giải thích về các tùy chọn tùy chỉnh. Bạn muốn tùy chỉnh sản phẩm nào?",
-            Intent.PRICE_INQUIRY: "Tôi sẽ cung cấp thông tin về giá cả. Bạn muốn biết giá của sản phẩm nào?",
-            Intent.GREETING: "Xin chào! Tôi là trợ lý ảo của Figuro. Tôi có thể giúp bạn tìm sản phẩm, đặt hàng, hoặc tư vấn về mô hình figure. Bạn cần hỗ trợ gì?",
-            Intent.GOODBYE: "Cảm ơn bạn đã sử dụng dịch vụ của Figuro. Hẹn gặp lại!",
-            Intent.HELP: "Tôi có thể giúp bạn: tìm kiếm sản phẩm, xem danh mục, kiểm tra giá cả, theo dõi đơn hàng, và tư vấn tùy chỉnh. Bạn cần hỗ trợ gì cụ thể?"
-        }
-
-        return responses.get(intent, "Xin lỗi, tôi chưa hiểu rõ yêu cầu của bạn. Bạn có thể nói rõ hơn được không?")
+        return BASIC_RESPONSES.get(intent, DEFAULT_BASIC_RESPONSE)
 
+    @timed("tts")
     async def _generate_tts_audio(self, text: str, language: SupportedLanguage) -> Optional[str]:
-        """Generate text-to-speech audio file using gTTS for natural voice"""
+        """Generate text-to-speech audio file with the configured TTS backend"""
         try:
-            audio_dir = Path("app/static/audio")
-            audio_dir.mkdir(parents=True, exist_ok=True)
-
-            timestamp = int(time.time() * 1000)
-            # Prefer mp3 from gTTS if available
-            if gTTS is not None:
-                audio_filename = f"response_{timestamp}.mp3"
-                audio_path = audio_dir / audio_filename
-                lang_map = {
-                    SupportedLanguage.VIETNAMESE: "vi",
-                    SupportedLanguage.ENGLISH: "en",
-                    SupportedLanguage.JAPANESE: "ja",
-                }
-                gtts_lang = lang_map.get(language, "vi")
-                tts = gTTS(text=text, lang=gtts_lang)
-                tts.save(str(audio_path))
-            else:
-                # Fallback to local TTS engine (wav)
-                audio_filename = f"response_{timestamp}.wav"
-                audio_path = audio_dir / audio_filename
-                self.tts_engine.save_to_file(text, str(audio_path))
-                self.tts_engine.runAndWait()
-
-            return f"/static/audio/{audio_filename}"
-
+            return await self._synthesize_speech(text, language)
         except Exception as e:
             logger.error(f"Error generating TTS audio: {str(e)}")
             return None
 
-    async def text_to_speech(self, request: TTSRequest) -> str:
-        """Convert text to speech via gTTS and return audio file path"""
+    def _tts_cache_key(self, text: str, language: Optional[SupportedLanguage],
+                       voice_speed: float = 1.0) -> Tuple[str, str]:
+        """Return the (cache key, file extension) of a synthesised clip"""
+        language_code = language.value if language else SupportedLanguage.VIETNAMESE.value
+        key = tts_cache.key(text, language_code, voice_speed, tts_backend_class.name)
+        return key, tts_backend_class.extension
+
+    def _speech_synthesizer(self, text: str, language: Optional[SupportedLanguage],
+                            voice_speed: float = 1.0) -> Callable[[Path], Awaitable[None]]:
+        """Coroutine function the TTS cache calls to synthesise a missing clip"""
+        language_code = language.value if language else SupportedLanguage.VIETNAMESE.value
+
+        async def synthesize_to(audio_path: Path):
+            # The engine returns the audio in memory; only the cache touches disk
+            try:
+                audio = await self.breakers["tts"].call(
+                    tts_pool.run, synthesize, text, language_code, voice_speed or 1.0, cost=len(text))
+            except CircuitOpenError as e:
+                raise TTSServiceError(str(e)) from e
+            except asyncio.TimeoutError as e:
+                raise TTSServiceError("Speech synthesis timed out") from e
+            await io_pool.run(audio_path.write_bytes, audio)
+
+        return synthesize_to
+
+    async def _synthesize_speech(self, text: str, language: Optional[SupportedLanguage],
+                                 voice_speed: float = 1.0) -> str:
+        """Synthesise speech through the content-addressed TTS cache, return its URL"""
+        key, extension = self._tts_cache_key(text, language, voice_speed)
+        return await tts_cache.get_or_create(
+            key, extension, self._speech_synthesizer(text, language, voice_speed))
+
+    async def _speech_audio(self, text: str, language: Optional[SupportedLanguage],
+                            voice_speed: float = 1.0) -> bytes:
+        """Synthesise speech through the TTS cache and return the clip's bytes"""
+        key, extension = self._tts_cache_key(text, language, voice_speed)
+        return await tts_cache.read(
+            key, extension, self._speech_synthesizer(text, language, voice_speed))
+
+    def tts_media_type(self) -> str:
+        """Content type of the audio produced by the active TTS engine"""
+        return tts_backend_class.media_type
+
+    async def stream_speech(self, text: str, language: Optional[SupportedLanguage],
+                            voice_speed: float = 1.0) -> AsyncIterator[bytes]:
+        """Synthesise text sentence by sentence and yield audio as each is ready
+
+        Up to TTS_STREAM_LOOKAHEAD sentences are synthesised ahead of the one
+        being sent, so only the first sentence sits on the critical path.
+        Each sentence goes through the TTS cache on its own, so repeated
+        lines (greetings, product listings) are reused across responses.
+        MP3 chunks concatenate as-is; WAV chunks share one streaming header.
+        """
+        sentences = split_sentences(text)
+        lookahead = max(1, config.TTS_STREAM_LOOKAHEAD)
+        pending = deque()
+        next_sentence = 0
+        wav_header_sent = False
+
         try:
-            audio_dir = Path("app/static/audio")
-            audio_dir.mkdir(parents=True, exist_ok=True)
-
-            timestamp = int(time.time() * 1000)
-
-            if gTTS is not None:
-                audio_filename = f"tts_{timestamp}.mp3"
-                audio_path = audio_dir / audio_filename
-                lang_map = {
-                    SupportedLanguage.VIETNAMESE: "vi",
-                    SupportedLanguage.ENGLISH: "en",
-                    SupportedLanguage.JAPANESE: "ja",
-                }
-                gtts_lang = lang_map.get(request.language, "vi")
-                tts = gTTS(text=request.text, lang=gtts_lang)
-                tts.save(str(audio_path))
-            else:
-                audio_filename = f"tts_{timestamp}.wav"
-                audio_path = audio_dir / audio_filename
-                self.tts_engine.setProperty('rate', int(
-                    180 * (request.voice_speed or 1.0)))
-                self.tts_engine.save_to_file(request.text, str(audio_path))
-                self.tts_engine.runAndWait()
+            while next_sentence < len(sentences) or pending:
+                while next_sentence < len(sentences) and len(pending) < lookahead:
+                    pending.append(asyncio.ensure_future(self._speech_audio(
+                        sentences[next_sentence], language, voice_speed)))
+                    next_sentence += 1
+
+                # Each lookahead task reads its clip as soon as it is cached,
+                # so a clip evicted or cleaned up meanwhile is never streamed
+                data = await pending.popleft()
+                if tts_backend_class.extension == "wav":
+                    params, data = split_wav(data)
+                    if not wav_header_sent:
+                        data = wav_stream_header(*params) + data
+                        wav_header_sent = True
+                yield data
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def open_speech_stream(self, request: TTSRequest) -> AsyncIterator[bytes]:
+        """Start a TTS stream, failing before any bytes are sent if the first sentence fails"""
+        if not request.text or not request.text.strip():
+            raise HTTPException(status_code=400, detail="Text is required")
+
+        chunks = self.stream_speech(
+            request.text, request.language, request.voice_speed or 1.0)
+        try:
+            first_chunk = await chunks.__anext__()
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error(f"Error in streaming text to speech: {str(e)}")
+            raise HTTPException(
+                status_code=500, detail=f"TTS generation failed: {str(e)}")
 
-            return f"/static/audio/{audio_filename}"
+        async def stream():
+            yield first_chunk
+            try:
+                async for chunk in chunks:
+                    yield chunk
+            except Exception as e:
+                # Headers are already sent; end the stream early
+                logger.error(f"TTS stream aborted: {str(e)}")
 
+        return stream()
+
+    async def text_to_speech(self, request: TTSRequest) -> str:
+        """Convert text to speech and return the audio file URL"""
+        try:
+            return await self._synthesize_speech(
+                request.text, request.language, request.voice_speed or 1.0)
+        except HTTPException:
+            raise
         except Exception as e:
             logger.error(f"Error in text to speech: {str(e)}")
             raise HTTPException(
@@ -584,21 +1027,17 @@ class VoiceAgentService:
     def health_check(self) -> dict:
         """Check the health of voice agent services"""
         services = {
-            "speech_recognition": True,
-            "text_to_speech": True,
-            "nlp_processing": True
+            "speech_recognition": self.stt_available and not self.breakers["stt"].is_open(),
+            "text_to_speech": self.tts_available and not self.breakers["tts"].is_open(),
+            "nlp_processing": True,
+            "chatbot": not self.breakers["chatbot"].is_open(),
+            "product_catalog": not self.breakers["products"].is_open()
         }
 
-        try:
-            # Test TTS engine
-            voices = self.tts_engine.getProperty('voices')
-            services["text_to_speech"] = len(voices) > 0
-        except:
-            services["text_to_speech"] = False
-
         return {
             "status": "healthy" if all(services.values()) else "degraded",
-            "services": services
+            "services": services,
+            "dependencies": {name: breaker.snapshot() for name, breaker in self.breakers.items()}
         }
 
 
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from .audio import StreamResampler, TARGET_SAMPLE_RATE, PCM_SAMPLE_WIDTH
+from .config import config
+from .executor import decode_pool, WorkerPoolSaturated
+from .metrics import metrics
+from .schemas import SupportedLanguage
+from .stt import STTServiceError
+from .timing import collect_timings
+from .vad import SpeechEndpointer, find_speech
+
+logger = logging.getLogger(__name__)
+
+active_sessions = metrics.gauge(
+    "voice_stream_sessions_active", "Open WebSocket voice sessions")
+utterances_total = metrics.counter(
+    "voice_stream_utterances_total", "Utterances finalised on WebSocket voice sessions")
+barge_ins_total = metrics.counter(
+    "voice_stream_barge_ins_total", "Replies cancelled because the user started speaking over them")
+
+BYTES_PER_MS = TARGET_SAMPLE_RATE * PCM_SAMPLE_WIDTH // 1000
+
+
+class VoiceSession:
+    """One duplex voice conversation over a WebSocket.
+
+    The client streams 16-bit mono PCM as binary frames while recording.
+    Energy VAD finds where each utterance starts and ends; while the user is
+    still talking the buffered utterance is re-recognised every
+    STREAM_PARTIAL_INTERVAL_MS to push partial transcripts. When the VAD
+    hears enough trailing silence (or the client sends ``{"type": "end"}``)
+    the utterance is recognised once more, run through the normal NLP,
+    chatbot and recommendation pipeline, and the reply is sent as a
+    ``final`` message followed by streamed TTS audio on the same socket.
+
+    Each reply runs as its own task while the socket keeps being read, so
+    the VAD hears the user during the reply: with STREAM_BARGE_IN, speech
+    starting over a reply cancels it (``audio_end`` is sent with
+    ``interrupted: true``) and the new utterance is answered instead.
+    """
+
+    def __init__(self, websocket: WebSocket, service, language: SupportedLanguage,
+                 enable_tts: bool = True, sample_rate: int = TARGET_SAMPLE_RATE):
+        self.websocket = websocket
+        self.service = service
+        self.language = language
+        self.enable_tts = enable_tts
+        self.resampler = StreamResampler(sample_rate)
+        self.endpointer = SpeechEndpointer(
+            frame_ms=config.STREAM_VAD_FRAME_MS,
+            end_silence_ms=config.STREAM_END_SILENCE_MS)
+
+        self._buffer = bytearray()  # 16 kHz PCM of the current utterance
+        self._pre_roll_bytes = config.STREAM_PRE_ROLL_MS * BYTES_PER_MS
+        self._partial_interval_bytes = config.STREAM_PARTIAL_INTERVAL_MS * BYTES_PER_MS
+        self._max_utterance_bytes = config.STREAM_MAX_UTTERANCE_SECONDS * 1000 * BYTES_PER_MS
+        self._last_partial_bytes = 0
+        self._partial_task: Optional[asyncio.Task] = None
+        self._reply_task: Optional[asyncio.Task] = None
+        self._utterance_id = 0
+        self._send_lock = asyncio.Lock()
+
+    async def run(self):
+        """Serve the session until the client disconnects"""
+        active_sessions.inc()
+        try:
+            await self._send_json({
+                "type": "ready",
+                "sample_rate": self.resampler.sample_rate,
+                "language": self.language.value,
+            })
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    await self._on_audio(message["bytes"])
+                elif message.get("text") is not None:
+                    await self._on_control(message["text"])
+        except WebSocketDisconnect:
+            pass
+        except Exception as e:
+            # e.g. sending a reply after the client already hung up
+            logger.warning(f"Voice session ended: {str(e)}")
+        finally:
+            self._cancel_partial()
+            self._cancel_reply()
+            active_sessions.dec()
+
+    async def _send_json(self, payload: Dict[str, Any]):
+        async with self._send_lock:
+            await self.websocket.send_text(json.dumps(payload, ensure_ascii=False))
+
+    async def _send_bytes(self, data: bytes):
+        async with self._send_lock:
+            await self.websocket.send_bytes(data)
+
+    async def _on_control(self, text: str):
+        try:
+            message = json.loads(text)
+        except ValueError:
+            await self._send_json({"type": "error", "detail": "Control messages must be JSON"})
+            return
+
+        if message.get("type") == "end":
+            # Only meaningful mid-utterance; the VAD may have closed it already
+            if self.endpointer.in_speech:
+                self._finish_utterance()
+        else:
+            await self._send_json(
+                {"type": "error", "detail": f"Unknown message type: {message.get('type')}"})
+
+    async def _on_audio(self, data: bytes):
+        if len(data) % PCM_SAMPLE_WIDTH:
+            await self._send_json(
+                {"type": "error", "detail": "Audio frames must be 16-bit mono PCM"})
+            return
+
+        pcm = self.resampler.process(data)
+        events = self.endpointer.feed(pcm)
+        self._buffer.extend(pcm)
+
+        if "speech_start" in events:
+            if config.STREAM_BARGE_IN and self._cancel_reply():
+                barge_ins_total.inc()
+            await self._send_json({"type": "speech_start"})
+
+        if not self.endpointer.in_speech and "speech_end" not in events:
+            # Between utterances keep only a short pre-roll so the onset of
+            # the next one is not clipped
+            if len(self._buffer) > self._pre_roll_bytes:
+                del self._buffer[:len(self._buffer) - self._pre_roll_bytes]
+            self._last_partial_bytes = len(self._buffer)
+            return
+
+        if "speech_end" in events or len(self._buffer) >= self._max_utterance_bytes:
+            self._finish_utterance()
+        elif (len(self._buffer) - self._last_partial_bytes >= self._partial_interval_bytes and
+              (self._partial_task is None or self._partial_task.done())):
+            # At most one partial recognition in flight per session
+            self._last_partial_bytes = len(self._buffer)
+            self._partial_task = asyncio.create_task(
+                self._send_partial(bytes(self._buffer), self._utterance_id))
+
+    async def _send_partial(self, pcm: bytes, utterance_id: int):
+        try:
+            transcript = await self.service.recognize(pcm, self.language)
+        except (WorkerPoolSaturated, STTServiceError) as e:
+            # Partials are best effort; the final recognition reports errors
+            logger.debug(f"Partial recognition skipped: {e}")
+            return
+        except Exception as e:
+            logger.error(f"Error in partial recognition: {str(e)}")
+            return
+
+        if transcript and utterance_id == self._utterance_id:
+            await self._send_json({"type": "partial", "transcript": transcript})
+
+    def _cancel_partial(self):
+        if self._partial_task is not None and not self._partial_task.done():
+            self._partial_task.cancel()
+        self._partial_task = None
+
+    def _finish_utterance(self):
+        """Hand the buffered utterance to a reply task and reset for the next one
+
+        The reply (STT, pipeline, streamed TTS) runs beside the receive
+        loop, so audio keeps flowing into the VAD while it is produced.
+        """
+        start_time = time.time()
+        pcm = bytes(self._buffer)
+        self._cancel_partial()
+        self._utterance_id += 1
+        self._buffer.clear()
+        self._last_partial_bytes = 0
+        self.endpointer.reset()
+
+        if not pcm:
+            return
+        utterances_total.inc()
+        self._cancel_reply()
+        self._reply_task = asyncio.create_task(self._reply(pcm, start_time))
+
+    def _cancel_reply(self) -> bool:
+        """Stop the reply in progress, if any; True if one was stopped"""
+        task, self._reply_task = self._reply_task, None
+        if task is None or task.done():
+            return False
+        task.cancel()
+        return True
+
+    async def _reply(self, pcm: bytes, start_time: float):
+        """Recognise an utterance, send the final result and stream the spoken reply"""
+        try:
+            # Stage timings (stt, nlp, chatbot, ...) go into the final message
+            with collect_timings():
+                # Trim the pre-roll and trailing silence off the event loop;
+                # skip STT if nothing is left
+                try:
+                    bounds, _ = await decode_pool.run(find_speech, pcm)
+                except WorkerPoolSaturated as e:
+                    await self._send_json({"type": "error", "detail": e.detail})
+                    return
+                if bounds is None:
+                    await self._send_json(
+                        {"type": "error", "detail": "Không thể nhận diện được giọng nói"})
+                    return
+                pcm = pcm[bounds[0]:bounds[1]]
+
+                try:
+                    transcript = await self.service.recognize(pcm, self.language)
+                except WorkerPoolSaturated as e:
+                    await self._send_json({"type": "error", "detail": e.detail})
+                    return
+                except STTServiceError as e:
+                    logger.error(f"Speech recognition service error: {str(e)}")
+                    await self._send_json(
+                        {"type": "error", "detail": "Lỗi dịch vụ nhận diện giọng nói"})
+                    return
+
+                if not transcript:
+                    await self._send_json(
+                        {"type": "error", "detail": "Không thể nhận diện được giọng nói"})
+                    return
+
+                response = await self.service.process_transcript(
+                    transcript, self.language, start_time=start_time)
+                await self._send_json({"type": "final", **response.model_dump(mode="json")})
+
+            if self.enable_tts and response.response_text:
+                await self._stream_reply(response.response_text)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # e.g. sending a reply after the client already hung up
+            logger.warning(f"Voice session reply failed: {str(e)}")
+
+    async def _stream_reply(self, text: str):
+        await self._send_json(
+            {"type": "audio_start", "media_type": self.service.tts_media_type()})
+        interrupted = False
+        try:
+            async for chunk in self.service.stream_speech(text, self.language):
+                await self._send_bytes(chunk)
+        except asyncio.CancelledError:
+            # The user started talking over the reply
+            interrupted = True
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming session audio: {str(e)}")
+            await self._send_json({"type": "error", "detail": "TTS generation failed"})
+        finally:
+            try:
+                await self._send_json({"type": "audio_end", "interrupted": interrupted})
+            except Exception:
+                # The client is gone; nothing left to tell it
+                pass
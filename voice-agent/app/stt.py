@@ -0,0 +1,191 @@
+import json
+import logging
+import threading
+from typing import Dict, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+from .audio import TARGET_SAMPLE_RATE, PCM_SAMPLE_WIDTH
+from .config import config
+from .executor import WorkerPool, io_pool
+
+logger = logging.getLogger(__name__)
+
+
+class STTServiceError(Exception):
+    """The speech recognition engine or service could not process the audio"""
+
+
+class STTBackend:
+    """Speech-to-text engine for 16 kHz mono 16-bit PCM.
+
+    ``transcribe`` is blocking and returns None when no speech is
+    recognised. Backends with ``local = True`` run on the CPU and are served
+    from a process pool where each worker loads the model once; network
+    backends run on the I/O thread pool.
+    """
+
+    name = ""
+    local = False
+
+    def load(self):
+        """Load models; called once per worker before the first request"""
+
+    def transcribe(self, pcm: bytes, language: str) -> Optional[str]:
+        raise NotImplementedError
+
+
+class GoogleSTTBackend(STTBackend):
+    """Google Web Speech API through speech_recognition (needs the network)"""
+
+    name = "google"
+
+    def transcribe(self, pcm: bytes, language: str) -> Optional[str]:
+        recognizer = sr.Recognizer()
+        audio = sr.AudioData(pcm, TARGET_SAMPLE_RATE, PCM_SAMPLE_WIDTH)
+        try:
+            return recognizer.recognize_google(audio, language=language)
+        except sr.UnknownValueError:
+            return None
+        except sr.RequestError as e:
+            raise STTServiceError(str(e))
+
+
+class VoskSTTBackend(STTBackend):
+    """Offline Kaldi models through Vosk, one model directory per language"""
+
+    name = "vosk"
+    local = True
+
+    def __init__(self, model_paths: Dict[str, str]):
+        self.model_paths = model_paths
+        self._models = {}
+
+    def load(self):
+        try:
+            import vosk
+        except ImportError:
+            raise STTServiceError("STT_BACKEND=vosk needs the vosk package (pip install vosk)")
+        if not self.model_paths:
+            raise STTServiceError("STT_BACKEND=vosk needs VOSK_MODEL_PATHS")
+
+        vosk.SetLogLevel(-1)
+        for language, path in self.model_paths.items():
+            self._models[language] = vosk.Model(path)
+        logger.info(f"Vosk models loaded: {list(self._models)}")
+
+    def transcribe(self, pcm: bytes, language: str) -> Optional[str]:
+        import vosk
+
+        model = self._models.get(language)
+        if model is None:
+            raise STTServiceError(f"No Vosk model configured for {language}")
+
+        # Recognizers are cheap and not thread-safe; the model is shared
+        recognizer = vosk.KaldiRecognizer(model, TARGET_SAMPLE_RATE)
+        recognizer.AcceptWaveform(pcm)
+        text = json.loads(recognizer.FinalResult()).get("text", "").strip()
+        return text or None
+
+
+class WhisperSTTBackend(STTBackend):
+    """Offline multilingual Whisper through faster-whisper (CTranslate2, int8 on CPU)"""
+
+    name = "whisper"
+    local = True
+
+    def __init__(self, model_size: str, compute_type: str, cpu_threads: int):
+        self.model_size = model_size
+        self.compute_type = compute_type
+        self.cpu_threads = cpu_threads
+        self._model = None
+
+    def load(self):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise STTServiceError(
+                "STT_BACKEND=whisper needs the faster-whisper package (pip install faster-whisper)")
+        self._model = WhisperModel(
+            self.model_size, device="cpu", compute_type=self.compute_type,
+            cpu_threads=self.cpu_threads)
+        logger.info(f"Whisper model loaded: {self.model_size} ({self.compute_type})")
+
+    def transcribe(self, pcm: bytes, language: str) -> Optional[str]:
+        audio = np.frombuffer(pcm, dtype='<i2').astype(np.float32) / 32768.0
+        # Silence is already trimmed upstream, so skip Whisper's own VAD
+        segments, _ = self._model.transcribe(
+            audio, language=language.split("-")[0], beam_size=1, vad_filter=False)
+        text = " ".join(segment.text.strip() for segment in segments).strip()
+        return text or None
+
+
+STT_BACKENDS = {
+    "google": GoogleSTTBackend,
+    "vosk": VoskSTTBackend,
+    "whisper": WhisperSTTBackend,
+}
+
+
+def create_stt_backend(name: str) -> STTBackend:
+    """Build the named backend from the configuration"""
+    if name == "google":
+        return GoogleSTTBackend()
+    if name == "vosk":
+        return VoskSTTBackend(config.parse_language_map(config.VOSK_MODEL_PATHS))
+    if name == "whisper":
+        return WhisperSTTBackend(
+            config.WHISPER_MODEL, config.WHISPER_COMPUTE_TYPE, config.WHISPER_CPU_THREADS)
+    raise ValueError(f"Unknown STT_BACKEND: {name} (choose from {list(STT_BACKENDS)})")
+
+
+# The backend of this process: loaded once per worker, shared by its requests
+_backend: Optional[STTBackend] = None
+_backend_lock = threading.Lock()
+
+
+def load_stt_backend():
+    """Create and load the configured backend in the current process"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend = create_stt_backend(config.STT_BACKEND)
+                try:
+                    backend.load()
+                except STTServiceError:
+                    raise
+                except Exception as e:
+                    raise STTServiceError(f"Could not load {backend.name} model: {str(e)}")
+                _backend = backend
+
+
+def _init_stt_worker():
+    # A raising initializer would break the whole pool; log it instead and
+    # let each request report the load error as an STTServiceError
+    try:
+        load_stt_backend()
+    except Exception as e:
+        logger.error(f"Failed to load STT backend '{config.STT_BACKEND}': {str(e)}")
+
+
+def transcribe(pcm: bytes, language: str) -> Optional[str]:
+    """Blocking recognition with the configured backend (runs on the STT pool)"""
+    load_stt_backend()
+    return _backend.transcribe(pcm, language)
+
+
+def _create_stt_pool() -> WorkerPool:
+    backend_class = STT_BACKENDS.get(config.STT_BACKEND)
+    if backend_class is None:
+        raise ValueError(
+            f"Unknown STT_BACKEND: {config.STT_BACKEND} (choose from {list(STT_BACKENDS)})")
+    if backend_class.local:
+        return WorkerPool("stt", "process", config.STT_WORKERS,
+                          config.WORKER_QUEUE_SIZE, initializer=_init_stt_worker)
+    return io_pool
+
+
+# Local engines get their own process pool; network engines share the I/O pool
+stt_pool = _create_stt_pool()
@@ -0,0 +1,90 @@
+import functools
+import inspect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, Optional
+
+from .metrics import metrics
+
+stage_seconds = metrics.histogram(
+    "voice_stage_seconds", "Time spent in each voice pipeline stage")
+
+
+class StageTimings:
+    """Milliseconds spent per pipeline stage while handling one request.
+
+    Stages that run concurrently (chatbot and recommendations) overlap, so
+    the stages can add up to more than the request's processing time; a
+    stage entered twice accumulates.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+
+    def record(self, stage: str, seconds: float):
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds * 1000
+
+    def as_dict(self) -> Dict[str, float]:
+        return {stage: round(ms, 2) for stage, ms in self.stages.items()}
+
+
+# Timings of the request being handled; tasks it spawns inherit it
+_current: ContextVar[Optional[StageTimings]] = ContextVar("stage_timings", default=None)
+
+
+@contextmanager
+def collect_timings() -> Iterator[StageTimings]:
+    """Collect the stage timings of this request, or join the collection already running"""
+    timings = _current.get()
+    if timings is not None:
+        yield timings
+        return
+    timings = StageTimings()
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+def _finish(stage: str, started: float):
+    elapsed = time.perf_counter() - started
+    stage_seconds.observe(elapsed, stage=stage)
+    timings = _current.get()
+    if timings is not None:
+        timings.record(stage, elapsed)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Time a block as a pipeline stage: feeds voice_stage_seconds and the request's timings"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        _finish(stage, started)
+
+
+def timed(stage: str) -> Callable:
+    """Decorator timing every call of a function or coroutine function as a stage"""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    _finish(stage, started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                _finish(stage, started)
+        return wrapper
+    return decorator
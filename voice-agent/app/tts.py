@@ -0,0 +1,201 @@
+import io
+import logging
+import shutil
+import subprocess
+import threading
+import wave
+from typing import Dict, Optional
+
+from gtts import gTTS, gTTSError
+
+from .audio import pcm_to_wav, split_wav
+from .config import config
+from .executor import WorkerPool, io_pool
+
+logger = logging.getLogger(__name__)
+
+
+class TTSServiceError(Exception):
+    """The speech synthesis engine or service could not produce audio"""
+
+
+class TTSBackend:
+    """Text-to-speech engine that returns a complete audio file in memory.
+
+    ``synthesize`` is blocking. Backends with ``local = True`` run on the
+    CPU and are served from a pool of long-lived worker processes, each
+    holding its own engine instance; network backends run on the I/O
+    thread pool.
+    """
+
+    name = ""
+    local = False
+    extension = "wav"
+    media_type = "audio/wav"
+
+    def load(self):
+        """Load voices; called once per worker before the first request"""
+
+    def synthesize(self, text: str, language: str, voice_speed: float) -> bytes:
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS through gTTS (needs the network), returns MP3"""
+
+    name = "gtts"
+    extension = "mp3"
+    media_type = "audio/mpeg"
+
+    LANGUAGES = {"vi-VN": "vi", "en-US": "en", "ja-JP": "ja"}
+
+    def synthesize(self, text: str, language: str, voice_speed: float) -> bytes:
+        buffer = io.BytesIO()
+        try:
+            gTTS(text=text, lang=self.LANGUAGES.get(language, "vi")).write_to_fp(buffer)
+        except gTTSError as e:
+            raise TTSServiceError(str(e))
+        return buffer.getvalue()
+
+
+class EspeakBackend(TTSBackend):
+    """Offline formant synthesis with the espeak-ng (or espeak) command, returns WAV"""
+
+    name = "espeak"
+    local = True
+
+    VOICES = {"vi-VN": "vi", "en-US": "en-us", "ja-JP": "ja"}
+
+    def __init__(self, binary: str, words_per_minute: int):
+        self.binary = binary
+        self.words_per_minute = words_per_minute
+
+    def load(self):
+        binary = self.binary or shutil.which("espeak-ng") or shutil.which("espeak")
+        if not binary or not shutil.which(binary):
+            raise TTSServiceError(
+                "TTS_BACKEND=espeak needs espeak-ng on PATH (apt-get install espeak-ng)")
+        self.binary = binary
+
+    def synthesize(self, text: str, language: str, voice_speed: float) -> bytes:
+        rate = int(self.words_per_minute * (voice_speed or 1.0))
+        try:
+            # Text goes through stdin so it is never parsed as options
+            result = subprocess.run(
+                [self.binary, "--stdout", "-b", "1",
+                 "-v", self.VOICES.get(language, "vi"), "-s", str(rate)],
+                input=text.encode("utf-8"), capture_output=True, timeout=30, check=True)
+        except (subprocess.SubprocessError, OSError) as e:
+            raise TTSServiceError(f"espeak failed: {str(e)}")
+
+        # --stdout writes a streaming header with placeholder sizes; fix it
+        params, frames = split_wav(result.stdout)
+        return pcm_to_wav(frames, *params)
+
+
+class PiperBackend(TTSBackend):
+    """Offline neural voices through Piper (ONNX), one voice model per language"""
+
+    name = "piper"
+    local = True
+
+    def __init__(self, voice_paths: Dict[str, str]):
+        self.voice_paths = voice_paths
+        self._voices = {}
+
+    def load(self):
+        try:
+            from piper import PiperVoice
+        except ImportError:
+            raise TTSServiceError("TTS_BACKEND=piper needs the piper-tts package (pip install piper-tts)")
+        if not self.voice_paths:
+            raise TTSServiceError("TTS_BACKEND=piper needs PIPER_VOICE_PATHS")
+
+        for language, path in self.voice_paths.items():
+            self._voices[language] = PiperVoice.load(path)
+        logger.info(f"Piper voices loaded: {list(self._voices)}")
+
+    def synthesize(self, text: str, language: str, voice_speed: float) -> bytes:
+        from piper import SynthesisConfig
+
+        voice = self._voices.get(language)
+        if voice is None:
+            raise TTSServiceError(f"No Piper voice configured for {language}")
+
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav_file:
+            voice.synthesize_wav(text, wav_file, syn_config=SynthesisConfig(
+                length_scale=1.0 / (voice_speed or 1.0)))
+        return buffer.getvalue()
+
+
+TTS_BACKENDS = {
+    "gtts": GTTSBackend,
+    "espeak": EspeakBackend,
+    "piper": PiperBackend,
+}
+
+
+def create_tts_backend(name: str) -> TTSBackend:
+    """Build the named backend from the configuration"""
+    if name == "gtts":
+        return GTTSBackend()
+    if name == "espeak":
+        return EspeakBackend(config.ESPEAK_BINARY, config.TTS_VOICE_RATE)
+    if name == "piper":
+        return PiperBackend(config.parse_language_map(config.PIPER_VOICE_PATHS))
+    raise ValueError(f"Unknown TTS_BACKEND: {name} (choose from {list(TTS_BACKENDS)})")
+
+
+# The engine of this process: loaded once per worker, reused for every request
+_backend: Optional[TTSBackend] = None
+_backend_lock = threading.Lock()
+
+
+def load_tts_backend():
+    """Create and load the configured backend in the current process"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                backend = create_tts_backend(config.TTS_BACKEND)
+                try:
+                    backend.load()
+                except TTSServiceError:
+                    raise
+                except Exception as e:
+                    raise TTSServiceError(f"Could not load {backend.name} voices: {str(e)}")
+                _backend = backend
+
+
+def _init_tts_worker():
+    # A raising initializer would break the whole pool; log it instead and
+    # let each request report the load error as a TTSServiceError
+    try:
+        load_tts_backend()
+    except Exception as e:
+        logger.error(f"Failed to load TTS backend '{config.TTS_BACKEND}': {str(e)}")
+
+
+def synthesize(text: str, language: str, voice_speed: float = 1.0) -> bytes:
+    """Blocking synthesis with the configured backend (runs on the TTS pool)"""
+    load_tts_backend()
+    return _backend.synthesize(text, language, voice_speed)
+
+
+def _create_tts_pool() -> WorkerPool:
+    backend_class = TTS_BACKENDS.get(config.TTS_BACKEND)
+    if backend_class is None:
+        raise ValueError(
+            f"Unknown TTS_BACKEND: {config.TTS_BACKEND} (choose from {list(TTS_BACKENDS)})")
+    if backend_class.local:
+        return WorkerPool("tts", "process", config.TTS_WORKERS,
+                          config.WORKER_QUEUE_SIZE, initializer=_init_tts_worker)
+    return io_pool
+
+
+# The backend class picked by TTS_BACKEND, for cache keys and content types
+tts_backend_class = TTS_BACKENDS.get(config.TTS_BACKEND)
+
+# Local engines get their own process pool; network engines share the I/O pool
+tts_pool = _create_tts_pool()
@@ -0,0 +1,283 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .config import config
+from .executor import io_pool
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+tts_cache_hits = metrics.counter(
+    "voice_tts_cache_hits_total", "TTS requests served from the audio cache")
+tts_cache_misses = metrics.counter(
+    "voice_tts_cache_misses_total", "TTS requests that had to synthesise audio")
+tts_cache_bytes_saved = metrics.counter(
+    "voice_tts_cache_bytes_saved_total", "Audio bytes served from cache instead of synthesised")
+tts_cache_evictions = metrics.counter(
+    "voice_tts_cache_evictions_total", "Cached TTS clips evicted for size or entry limits")
+tts_cache_entries = metrics.gauge(
+    "voice_tts_cache_entries", "Clips currently in the TTS cache")
+tts_cache_bytes = metrics.gauge(
+    "voice_tts_cache_bytes", "Bytes of audio currently in the TTS cache")
+tts_cache_hit_ratio = metrics.gauge(
+    "voice_tts_cache_hit_ratio", "Share of TTS requests served from cache")
+audio_dir_bytes = metrics.gauge(
+    "voice_audio_dir_bytes", "Bytes of all files in the static audio directory, cached or not")
+audio_dir_files = metrics.gauge(
+    "voice_audio_dir_files", "Files in the static audio directory")
+
+
+class TTSCache:
+    """Content-addressed cache of synthesised speech clips.
+
+    Clips live on disk under the static audio directory as
+    ``tts_<sha256>.<ext>``, keyed on (text, language, voice speed, engine),
+    with an in-memory LRU index of their sizes. A hit returns the existing
+    ``/static/audio/...`` URL without touching the TTS engine; concurrent
+    misses for the same key share a single synthesis, which finishes and
+    is cached even if the caller that started it is cancelled. Hits trust
+    the index and never touch the disk; the directory scan, renames, stats
+    and deletes run on the I/O pool. A file removed behind the cache's back
+    surfaces when it is read, and ``discard`` drops it from the index.
+    """
+
+    FILE_PREFIX = "tts_"
+
+    def __init__(self, directory: Path, max_entries: int, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # filename -> size
+        self._total_bytes = 0
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self._loading: Optional[asyncio.Task] = None
+        # filename -> readers; eviction skips clips being read
+        self._reading: Dict[str, int] = {}
+        self._loaded = False
+
+        tts_cache_entries.set_function(lambda: len(self._index))
+        tts_cache_bytes.set_function(lambda: self._total_bytes)
+        tts_cache_hit_ratio.set_function(self.hit_ratio)
+
+    @staticmethod
+    def key(text: str, language: str, voice_speed: float, engine: str) -> str:
+        """Content hash identifying one synthesised clip"""
+        payload = json.dumps(
+            [text, language, round(float(voice_speed or 1.0), 3), engine],
+            ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def hit_ratio() -> float:
+        hits, misses = tts_cache_hits.get(), tts_cache_misses.get()
+        return hits / (hits + misses) if hits + misses else 0.0
+
+    def _scan(self) -> List[Tuple[str, int]]:
+        """(filename, size) of the clips on disk, oldest first"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        clips = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.startswith(self.FILE_PREFIX):
+                    continue
+                try:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        clips.append((stat.st_mtime, entry.name, stat.st_size))
+                except FileNotFoundError:
+                    continue
+        return [(name, size) for _, name, size in sorted(clips)]
+
+    async def load(self):
+        """Index clips already on disk, oldest first, then enforce the limits"""
+        clips = await io_pool.run(self._scan)
+        self._index.clear()
+        self._total_bytes = 0
+        for filename, size in clips:
+            self._index[filename] = size
+            self._total_bytes += size
+        self._loaded = True
+        await self._delete(self._evict())
+        logger.info(
+            f"TTS cache loaded: {len(self._index)} clips, {self._total_bytes} bytes")
+
+    async def _ensure_loaded(self):
+        if self._loaded:
+            return
+        # Concurrent first requests share one scan
+        if self._loading is None or self._loading.done():
+            self._loading = asyncio.ensure_future(self.load())
+        await asyncio.shield(self._loading)
+
+    def _url(self, filename: str) -> str:
+        return f"/static/audio/{filename}"
+
+    def path(self, url: str) -> Path:
+        """Local file behind a URL returned by get_or_create"""
+        return self.directory / Path(url).name
+
+    def _filename(self, key: str, extension: str) -> str:
+        return f"{self.FILE_PREFIX}{key}.{extension}"
+
+    def contains(self, key: str, extension: str) -> bool:
+        """Check the index for a clip without counting it as a hit"""
+        return self._filename(key, extension) in self._index
+
+    def discard(self, url: str):
+        """Drop a clip whose file turned out to be missing, so the next request synthesises it"""
+        self._forget(Path(url).name)
+
+    def _lookup(self, filename: str) -> bool:
+        size = self._index.get(filename)
+        if size is None:
+            return False
+        self._index.move_to_end(filename)
+        tts_cache_hits.inc()
+        tts_cache_bytes_saved.inc(size)
+        return True
+
+    def _forget(self, filename: str):
+        size = self._index.pop(filename, None)
+        if size is not None:
+            self._total_bytes -= size
+
+    def _store(self, filename: str, size: int) -> List[Path]:
+        self._forget(filename)
+        self._index[filename] = size
+        self._total_bytes += size
+        return self._evict(keep=filename)
+
+    def _evict(self, keep: Optional[str] = None) -> List[Path]:
+        """Drop least recently used clips over the limits; returns the files to delete
+
+        Clips being read and ``keep`` (the clip just stored) are skipped, so
+        the limits can be exceeded until their readers are done.
+        """
+        evicted = []
+        while len(self._index) > self.max_entries or self._total_bytes > self.max_bytes:
+            filename = next((name for name in self._index
+                             if name != keep and name not in self._reading), None)
+            if filename is None:
+                break
+            size = self._index.pop(filename)
+            self._total_bytes -= size
+            tts_cache_evictions.inc()
+            evicted.append(self.directory / filename)
+        return evicted
+
+    @staticmethod
+    def _unlink(paths: List[Path]):
+        for path in paths:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    async def _delete(self, paths: List[Path]):
+        """Delete files on the I/O pool; a leftover file is re-indexed by the next load"""
+        if not paths:
+            return
+        try:
+            await io_pool.run(self._unlink, paths)
+        except Exception as e:
+            logger.warning(f"Could not delete {len(paths)} TTS cache files: {str(e)}")
+
+    @staticmethod
+    def _commit(temp_path: Path, path: Path) -> int:
+        """Move a finished clip into place and return its size"""
+        os.replace(temp_path, path)
+        return path.stat().st_size
+
+    async def get_or_create(self, key: str, extension: str,
+                            synthesize: Callable[[Path], Awaitable[None]]) -> str:
+        """Return the URL for a cached clip, synthesising it on a miss"""
+        await self._ensure_loaded()
+
+        filename = self._filename(key, extension)
+        if self._lookup(filename):
+            return self._url(filename)
+
+        task = self._in_flight.get(filename)
+        if task is not None:
+            await asyncio.shield(task)
+            tts_cache_hits.inc()
+            tts_cache_bytes_saved.inc(self._index.get(filename, 0))
+            return self._url(filename)
+
+        tts_cache_misses.inc()
+        # Its own task: a caller giving up (client disconnect, cancelled
+        # lookahead) must not cancel the synthesis the others wait for
+        task = self._in_flight[filename] = asyncio.ensure_future(self._create(filename, synthesize))
+        # Mark a failure retrieved even if every caller gave up waiting for it
+        task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        await asyncio.shield(task)
+        return self._url(filename)
+
+    async def read(self, key: str, extension: str,
+                   synthesize: Callable[[Path], Awaitable[None]]) -> bytes:
+        """Return a clip's audio, synthesising it on a miss
+
+        The clip is pinned against eviction while it is read. If its file is
+        gone anyway (removed behind the cache's back), it is discarded and
+        synthesised again once rather than failing the caller.
+        """
+        for attempt in range(2):
+            url = await self.get_or_create(key, extension, synthesize)
+            filename = Path(url).name
+            self._reading[filename] = self._reading.get(filename, 0) + 1
+            try:
+                return await io_pool.run((self.directory / filename).read_bytes)
+            except FileNotFoundError:
+                if attempt:
+                    raise
+                self.discard(url)
+            finally:
+                self._reading[filename] -= 1
+                if not self._reading[filename]:
+                    del self._reading[filename]
+
+    async def _create(self, filename: str, synthesize: Callable[[Path], Awaitable[None]]):
+        """Synthesise a clip into the cache for every caller waiting on it"""
+        # Write under a temporary name so readers never see partial files
+        temp_path = self.directory / f".{filename}.tmp"
+        try:
+            await synthesize(temp_path)
+            size = await io_pool.run(self._commit, temp_path, self.directory / filename)
+            evicted = self._store(filename, size)
+        except BaseException:
+            await self._delete([temp_path])
+            raise
+        finally:
+            del self._in_flight[filename]
+        await self._delete(evicted)
+
+
+def audio_dir_usage(directory: Path):
+    """(files, bytes) in a directory; read on collection, not on the request path"""
+    files = size = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file():
+                        files += 1
+                        size += entry.stat().st_size
+                except FileNotFoundError:
+                    continue
+    except FileNotFoundError:
+        pass
+    return files, size
+
+
+audio_dir_files.set_function(lambda: audio_dir_usage(config.AUDIO_DIR)[0])
+audio_dir_bytes.set_function(lambda: audio_dir_usage(config.AUDIO_DIR)[1])
+
+# Create global TTS cache instance
+tts_cache = TTSCache(
+    config.AUDIO_DIR, config.TTS_CACHE_MAX_ENTRIES, config.TTS_CACHE_MAX_BYTES)
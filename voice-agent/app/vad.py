@@ -0,0 +1,170 @@
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .audio import decode_to_pcm, TARGET_SAMPLE_RATE, PCM_SAMPLE_WIDTH
+
+# Frame levels are in dBFS; digital silence sits at the floor
+SILENCE_FLOOR_DB = -100.0
+
+# Zero-crossing rate above which a frame sounds like hiss/noise, not voicing
+NOISE_ZCR = 0.3
+
+
+def frame_levels_db(pcm: bytes, frame_samples: int) -> np.ndarray:
+    """RMS level in dBFS of each whole frame of 16-bit mono PCM"""
+    samples = np.frombuffer(pcm, dtype='<i2')
+    frame_count = len(samples) // frame_samples
+    if frame_count == 0:
+        return np.empty(0, dtype=np.float32)
+    frames = samples[:frame_count * frame_samples].reshape(
+        frame_count, frame_samples).astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    return np.maximum(20.0 * np.log10(rms + 1e-10), SILENCE_FLOOR_DB)
+
+
+def frame_zero_crossing_rates(pcm: bytes, frame_samples: int) -> np.ndarray:
+    """Share of sign changes between neighbouring samples in each whole frame"""
+    samples = np.frombuffer(pcm, dtype='<i2')
+    frame_count = len(samples) // frame_samples
+    if frame_count == 0:
+        return np.empty(0, dtype=np.float32)
+    signs = np.signbit(samples[:frame_count * frame_samples].reshape(frame_count, frame_samples))
+    return np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame_samples - 1)
+
+
+class SpeechClip(NamedTuple):
+    """Decoded clip trimmed to its speech, plus what the VAD measured"""
+    pcm: bytes  # empty when the clip holds no speech
+    decoded_bytes: int
+    noise_floor_db: float
+
+
+def _speech_bounds(levels: np.ndarray, zcr: np.ndarray, noise_floor_db: float,
+                   margin_db: float, min_level_db: float,
+                   min_speech_frames: int) -> Optional[Tuple[int, int]]:
+    """First and last frame (exclusive) of sustained speech, or None"""
+    threshold = max(min_level_db, noise_floor_db + margin_db)
+    # Loud frames are speech; quieter but noisy-sounding frames (high ZCR,
+    # e.g. "s", "x", "ch") count too so word edges are not clipped
+    speech = (levels > threshold) | (
+        (levels > threshold - margin_db / 2) & (zcr > NOISE_ZCR))
+    if len(speech) < min_speech_frames:
+        return None
+    sustained = np.flatnonzero(np.convolve(
+        speech, np.ones(min_speech_frames, dtype=int), 'valid') == min_speech_frames)
+    if len(sustained) == 0:
+        return None
+    return int(sustained[0]), int(sustained[-1]) + min_speech_frames
+
+
+def find_speech(pcm: bytes, sample_rate: int = TARGET_SAMPLE_RATE, frame_ms: int = 30,
+                margin_db: float = 10.0, min_level_db: float = -50.0,
+                min_speech_ms: int = 90, padding_ms: int = 200) -> Tuple[Optional[Tuple[int, int]], float]:
+    """Locate speech in 16-bit mono PCM with energy and zero-crossing rate
+
+    Returns ((start byte, end byte) or None, noise floor in dBFS). A first
+    pass uses a low percentile of the frame levels as the noise floor; the
+    floor is then re-estimated from the frames that pass trimmed off and
+    the bounds recomputed, so the estimate comes from the clip's actual
+    leading/trailing silence rather than a fixed window.
+
+    A clip with no quiet part to measure against is kept whole unless it is
+    near-silent or noise-like, so the VAD errs towards sending audio to STT.
+    """
+    frame_samples = int(sample_rate * frame_ms / 1000)
+    levels = frame_levels_db(pcm, frame_samples)
+    if len(levels) == 0:
+        return None, SILENCE_FLOOR_DB
+    zcr = frame_zero_crossing_rates(pcm, frame_samples)
+    min_speech_frames = max(1, min_speech_ms // frame_ms)
+
+    noise_floor_db = float(np.percentile(levels, 10))
+    bounds = _speech_bounds(levels, zcr, noise_floor_db, margin_db,
+                            min_level_db, min_speech_frames)
+    if bounds is not None:
+        silence = np.concatenate([levels[:bounds[0]], levels[bounds[1]:]])
+        if len(silence):
+            noise_floor_db = float(np.median(silence))
+            bounds = _speech_bounds(levels, zcr, noise_floor_db, margin_db,
+                                    min_level_db, min_speech_frames)
+    if bounds is None:
+        if (np.percentile(levels, 95) <= min_level_db or
+                np.median(zcr) > NOISE_ZCR):
+            return None, noise_floor_db
+        return (0, len(pcm)), noise_floor_db
+
+    padding = padding_ms // frame_ms
+    start = max(0, bounds[0] - padding) * frame_samples * PCM_SAMPLE_WIDTH
+    end = min(len(levels), bounds[1] + padding) * frame_samples * PCM_SAMPLE_WIDTH
+    if bounds[1] + padding >= len(levels):
+        end = len(pcm)  # keep the partial last frame
+    return (start, end), noise_floor_db
+
+
+def decode_speech(data: bytes, suffix: str) -> SpeechClip:
+    """Decode an upload and trim it to its speech (runs in the decode workers)"""
+    pcm = decode_to_pcm(data, suffix)
+    bounds, noise_floor_db = find_speech(pcm)
+    speech = pcm[bounds[0]:bounds[1]] if bounds is not None else b''
+    return SpeechClip(speech, len(pcm), noise_floor_db)
+
+
+class SpeechEndpointer:
+    """Energy-based voice activity detection for live PCM.
+
+    Audio is cut into fixed frames; a frame counts as speech when it is
+    ``margin_db`` above the running noise floor (and above ``min_level_db``).
+    Speech starts after ``start_ms`` of consecutive speech frames and ends
+    after ``end_silence_ms`` of consecutive non-speech frames. The noise
+    floor tracks non-speech frames only, so it adapts to the room without
+    drifting up while the user talks.
+    """
+
+    def __init__(self, sample_rate: int = TARGET_SAMPLE_RATE, frame_ms: int = 30,
+                 start_ms: int = 90, end_silence_ms: int = 700,
+                 margin_db: float = 10.0, min_level_db: float = -50.0):
+        self.frame_samples = int(sample_rate * frame_ms / 1000)
+        self.frame_bytes = self.frame_samples * PCM_SAMPLE_WIDTH
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.end_frames = max(1, end_silence_ms // frame_ms)
+        self.margin_db = margin_db
+        self.min_level_db = min_level_db
+        self.noise_floor_db: Optional[float] = None
+        self.in_speech = False
+        self._pending = b''
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def reset(self):
+        """Forget the current utterance but keep the learned noise floor"""
+        self.in_speech = False
+        self._pending = b''
+        self._speech_run = 0
+        self._silence_run = 0
+
+    def feed(self, pcm: bytes) -> List[str]:
+        """Consume PCM and return the "speech_start"/"speech_end" events it triggers"""
+        data = self._pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+
+        events = []
+        for level in frame_levels_db(data[:usable], self.frame_samples):
+            floor = self.noise_floor_db if self.noise_floor_db is not None else self.min_level_db
+            if level > max(self.min_level_db, floor + self.margin_db):
+                self._speech_run += 1
+                self._silence_run = 0
+            else:
+                self._silence_run += 1
+                self._speech_run = 0
+                self.noise_floor_db = level if self.noise_floor_db is None else (
+                    0.95 * self.noise_floor_db + 0.05 * level)
+
+            if not self.in_speech and self._speech_run >= self.start_frames:
+                self.in_speech = True
+                events.append("speech_start")
+            elif self.in_speech and self._silence_run >= self.end_frames:
+                self.in_speech = False
+                events.append("speech_end")
+        return events
@@ -0,0 +1,617 @@
+#!/usr/bin/env python3
+"""
+Voice Agent Micro-benchmarks
+Measures the hot paths of the voice pipeline without a running server
+
+Usage:
+    python benchmark_voice_agent.py            # run every benchmark
+    python benchmark_voice_agent.py intent     # run selected benchmarks
+"""
+
+import io
+import multiprocessing
+import os
+import random
+import re
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from app.nlp import (
+    INTENT_PATTERNS, ENTITY_KEYWORDS, ENTITY_PATTERNS, IntentMatcher,
+    build_entity_automaton
+)
+from app.catalog import ProductIndex
+from app.schemas import AudioFormat
+from app.vad import find_speech, decode_speech
+
+
+# Mixed Vietnamese/English utterances as they come out of STT
+UTTERANCE_CORPUS = [
+    "Tôi muốn tìm mô hình Naruto",
+    "Show me Dragon Ball figures",
+    "Xin chào, bạn có thể giúp tôi không?",
+    "Tôi muốn xem sản phẩm trong danh mục One Piece",
+    "Giá của sản phẩm này bao nhiêu?",
+    "Hủy đơn hàng giúp tôi",
+    "Kiểm tra đơn hàng của tôi",
+    "Đơn hàng của tôi đang ở đâu vậy",
+    "Mô hình Luffy còn hàng không?",
+    "Có mô hình Goku màu đỏ không",
+    "Tôi cần 2 cái figure Zoro",
+    "Có sản phẩm nào dưới 2 triệu không",
+    "Tôi muốn tùy chỉnh màu sắc cho mô hình",
+    "Có khuyến mãi gì không",
+    "Cảm ơn nhé, tạm biệt",
+    "Good morning, I want to buy a figure",
+    "Do you have anything from Attack on Titan?",
+    "Recommend some anime figures please",
+    "Cancel order 12345",
+    "Check stock for Tanjiro",
+    "Hướng dẫn tôi cách thanh toán",
+    "Thời tiết hôm nay thế nào",
+    "What time does the store open tomorrow",
+    "ok",
+]
+
+
+def make_catalog(size: int, seed: int = 42) -> Dict[int, Dict[str, Any]]:
+    """Build a synthetic product cache shaped like the backend's product listing"""
+    rng = random.Random(seed)
+    characters = ENTITY_KEYWORDS["product"]
+    series = ["Naruto", "One Piece", "Dragon Ball", "Demon Slayer",
+              "My Hero Academia", "Attack on Titan", "Jujutsu Kaisen"]
+    editions = ["Sage Mode", "Gear 5", "Ultra Instinct", "Limited", "Deluxe", "Mini"]
+    catalog = {}
+    for product_id in range(1, size + 1):
+        name = (f"{rng.choice(characters).title()} "
+                f"{rng.choice(editions)} Figure #{product_id}")
+        catalog[product_id] = {
+            "id": product_id,
+            "name": name,
+            "price": rng.randrange(300000, 6000000, 50000),
+            "stock": rng.randrange(0, 50),
+            "category": {"id": product_id % len(series), "name": rng.choice(series)},
+        }
+    return catalog
+
+
+def make_clip(audio_format: str, sample_rate: int, seconds: float = 3.0) -> Optional[bytes]:
+    """Encode a synthetic voice-like stereo clip, or None if the format needs ffmpeg"""
+    import numpy as np
+    import soundfile as sf
+
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    # A few harmonics with a syllable-rate envelope
+    voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 720)))
+    voice *= 0.3 * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+    stereo = np.stack([voice, voice], axis=1)
+
+    formats = {"wav": "WAV", "flac": "FLAC", "mp3": "MP3"}
+    if audio_format not in formats:
+        return None
+    buffer = io.BytesIO()
+    sf.write(buffer, stereo, sample_rate, format=formats[audio_format])
+    return buffer.getvalue()
+
+
+def make_utterance_pcm(lead: float, speech: float, trail: float,
+                       noise: float = 0.0, seed: int = 7) -> bytes:
+    """16 kHz mono PCM: silence (or background noise), voice-like audio, silence"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    rate = 16000
+    t = np.arange(int(rate * speech)) / rate
+    voice = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180, 360, 720)))
+    voice *= 0.3 * np.abs(np.sin(2 * np.pi * 3 * t))
+    audio = np.concatenate([np.zeros(int(rate * lead)), voice, np.zeros(int(rate * trail))])
+    audio += rng.normal(0, noise, len(audio))
+    return (np.clip(audio, -1, 1) * 32767).astype('<i2').tobytes()
+
+
+def _measure_decode(decoder: str, data: bytes, suffix: str, iterations: int) -> Tuple[float, float, float]:
+    """Decode a clip in a fresh process: (cold ms incl. imports, warm ms, peak RSS MB)"""
+
+    def decode_legacy():
+        # The original path: temp file -> librosa.load -> second WAV on disk
+        import librosa
+        import soundfile as sf
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        try:
+            audio, _ = librosa.load(path, sr=16000)
+            wav_path = path.replace(suffix, '.out.wav')
+            sf.write(wav_path, audio, 16000)
+            os.unlink(wav_path)
+        finally:
+            os.unlink(path)
+
+    def decode_tiered():
+        from app.audio import decode_to_pcm
+        decode_to_pcm(data, suffix)
+
+    decode = decode_legacy if decoder == "librosa" else decode_tiered
+    start = time.perf_counter()
+    decode()
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode()
+    warm_ms = (time.perf_counter() - start) / iterations * 1000
+
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return cold_ms, warm_ms, peak_rss_mb
+
+
+class VoiceAgentBenchmark:
+    def __init__(self, iterations: int = 200):
+        self.iterations = iterations
+
+    def print_header(self, title: str):
+        """Print a benchmark section header"""
+        print(f"\n{'=' * 60}")
+        print(f"⏱️  {title}")
+        print(f"{'=' * 60}")
+
+    def time_per_call(self, func: Callable[[str], object], corpus: List[str]) -> float:
+        """Return the mean wall time of func over the corpus in microseconds"""
+        start = time.perf_counter()
+        for _ in range(self.iterations):
+            for text in corpus:
+                func(text)
+        elapsed = time.perf_counter() - start
+        return elapsed / (self.iterations * len(corpus)) * 1e6
+
+    def benchmark_intent(self):
+        """Compare the compiled IntentMatcher against the raw re.search loop"""
+        self.print_header("Intent matching")
+
+        def legacy_extract_intent(text: str):
+            for intent, patterns in INTENT_PATTERNS.items():
+                for pattern in patterns:
+                    if re.search(pattern, text):
+                        return intent
+            return None
+
+        matcher = IntentMatcher(INTENT_PATTERNS)
+        corpus = [text.lower() for text in UTTERANCE_CORPUS]
+
+        mismatches = [text for text in corpus
+                      if legacy_extract_intent(text) != matcher.match(text)]
+        if mismatches:
+            print(f"❌ {len(mismatches)} utterances disagree: {mismatches}")
+            return
+
+        legacy_us = self.time_per_call(legacy_extract_intent, corpus)
+        compiled_us = self.time_per_call(matcher.match, corpus)
+        print(f"   Utterances:      {len(corpus)} x {self.iterations}")
+        print(f"   re.search loop:  {legacy_us:8.2f} µs/utterance")
+        print(f"   IntentMatcher:   {compiled_us:8.2f} µs/utterance")
+        print(f"   Speedup:         {legacy_us / compiled_us:8.2f}x")
+
+    def benchmark_entities(self):
+        """Compare the keyword automaton against per-type regex alternations"""
+        self.print_header("Dictionary entity extraction")
+
+        legacy_patterns = [
+            re.compile("(" + "|".join(re.escape(k) for k in keywords) + ")")
+            for keywords in ENTITY_KEYWORDS.values()
+        ]
+
+        def legacy_extract(text: str):
+            return [match.group(1) for regex in legacy_patterns
+                    for match in regex.finditer(text)]
+
+        corpus = [text.lower() for text in UTTERANCE_CORPUS]
+        for catalog_size in (0, 1000, 10000):
+            characters = ENTITY_KEYWORDS["product"]
+            catalog = [("product", f"{characters[i % len(characters)]} figure ver {i}")
+                       for i in range(catalog_size)]
+            start = time.perf_counter()
+            automaton = build_entity_automaton(catalog)
+            build_ms = (time.perf_counter() - start) * 1000
+            search_us = self.time_per_call(automaton.search, corpus)
+            print(f"   Catalog {catalog_size:>6} names: build {build_ms:8.2f} ms, "
+                  f"search {search_us:6.2f} µs/utterance")
+
+        legacy_us = self.time_per_call(legacy_extract, corpus)
+        print(f"   Regex alternations (static keywords only): {legacy_us:6.2f} µs/utterance")
+        print(f"   Regex-only entity types still matched by pattern: "
+              f"{sorted(ENTITY_PATTERNS)}")
+
+    def benchmark_recommendations(self):
+        """Compare inverted-index scoring against the full product scan"""
+        self.print_header("Product recommendations")
+
+        def legacy_recommend(product_cache, product_names, categories, price_ranges):
+            recommendations = []
+            for product in product_cache.values():
+                score = 0
+                if any(name.lower() in product['name'].lower() for name in product_names):
+                    score += 10
+                if categories and product.get('category') and any(cat.lower() in product['category']['name'].lower() for cat in categories):
+                    score += 8
+                if price_ranges:
+                    price = float(product['price'])
+                    for price_range in price_ranges:
+                        if 'rẻ' in price_range.lower() or 'cheap' in price_range.lower():
+                            if price < 2000000:
+                                score += 5
+                        elif 'đắt' in price_range.lower() or 'expensive' in price_range.lower():
+                            if price > 3000000:
+                                score += 5
+                if score > 0:
+                    recommendations.append({**product, 'relevance_score': score})
+            recommendations.sort(key=lambda x: x['relevance_score'], reverse=True)
+            return recommendations[:5]
+
+        queries = [
+            (["naruto"], ["naruto"], []),
+            (["goku", "vegeta"], [], ["rẻ"]),
+            (["luffy gear"], ["one piece"], ["đắt"]),
+            ([], ["demon slayer"], []),
+            (["todoroki"], [], []),
+            ([], [], ["cheap"]),
+            ([], [], ["low"]),
+            (["naruto"], [], ["high", "thấp"]),
+        ]
+        iterations = max(1, self.iterations // 20)
+        for catalog_size in (1000, 20000):
+            catalog = make_catalog(catalog_size)
+            start = time.perf_counter()
+            index = ProductIndex(catalog, fuzzy=False)
+            build_ms = (time.perf_counter() - start) * 1000
+
+            for query in queries:
+                if legacy_recommend(catalog, *query) != index.recommend(*query):
+                    print(f"❌ Results differ for {query}")
+                    return
+
+            timings = {}
+            for label, func in (("scan", lambda q: legacy_recommend(catalog, *q)),
+                                ("index", lambda q: index.recommend(*q))):
+                start = time.perf_counter()
+                for _ in range(iterations):
+                    for query in queries:
+                        func(query)
+                timings[label] = (time.perf_counter() - start) / (iterations * len(queries)) * 1000
+            print(f"   Catalog {catalog_size:>6}: build {build_ms:7.2f} ms, "
+                  f"scan {timings['scan']:7.3f} ms/query, index {timings['index']:7.3f} ms/query")
+
+    def benchmark_fuzzy(self):
+        """Typo-tolerant name lookups by catalog size"""
+        self.print_header("Fuzzy product matching")
+
+        # STT-style misspellings of catalog words, none matching exactly
+        typos = ["luphy", "narto", "sasuk", "todoriki", "bakgo", "tanjirou", "zorro", "vegita"]
+        syllables = ["ka", "ri", "to", "mo", "shi", "ra", "ne", "ku", "ya", "zu", "ho", "min"]
+        rng = random.Random(7)
+        iterations = max(1, self.iterations // 20)
+        for catalog_size in (1000, 20000, 100000):
+            catalog = make_catalog(catalog_size)
+            for product in catalog.values():
+                # One made-up word per product grows the vocabulary with the catalog
+                word = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+                product["name"] = f"{word} {product['name']}"
+            start = time.perf_counter()
+            index = ProductIndex(catalog)
+            build_ms = (time.perf_counter() - start) * 1000
+            vocabulary = len(index._fuzzy_index)
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                for typo in typos:
+                    index._fuzzy_index.lookup(typo, 2)
+            lookup_ms = (time.perf_counter() - start) / (iterations * len(typos)) * 1000
+
+            start = time.perf_counter()
+            for _ in range(iterations):
+                for typo in typos:
+                    index.recommend([typo], [], [])
+                index.apply_delta([], [])  # drop memoised lookups between rounds
+            recommend_ms = (time.perf_counter() - start) / (iterations * len(typos)) * 1000
+            print(f"   Catalog {catalog_size:>6} ({vocabulary:>6} tokens): build {build_ms:8.2f} ms, "
+                  f"lookup {lookup_ms:6.3f} ms/token, recommend {recommend_ms:6.3f} ms/query")
+
+    def benchmark_decode(self):
+        """Per-clip decode latency and peak RSS: librosa path vs. tiered decoder"""
+        self.print_header("Audio decode (3 s clips)")
+        print(f"   {'format':<6} {'rate':>6} {'decoder':<8} {'cold ms':>9} {'warm ms':>9} {'peak RSS':>9}")
+
+        context = multiprocessing.get_context("spawn")
+        iterations = max(1, self.iterations // 20)
+        for audio_format in AudioFormat:
+            for sample_rate in (16000, 44100, 48000):
+                data = make_clip(audio_format.value, sample_rate)
+                if data is None:
+                    print(f"   {audio_format.value:<6} {sample_rate:>6} skipped (needs ffmpeg to encode)")
+                    break
+                if audio_format == AudioFormat.WAV and sample_rate == 16000:
+                    # Pass-through tier: mono 16-bit PCM at 16 kHz
+                    import numpy as np
+                    import soundfile as sf
+                    mono, _ = sf.read(io.BytesIO(data), dtype='int16')
+                    buffer = io.BytesIO()
+                    sf.write(buffer, np.ascontiguousarray(mono[:, 0]), 16000,
+                             format='WAV', subtype='PCM_16')
+                    data = buffer.getvalue()
+
+                for decoder in ("librosa", "tiered"):
+                    # A fresh process per measurement keeps imports and RSS honest
+                    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                        cold_ms, warm_ms, rss_mb = pool.submit(
+                            _measure_decode, decoder, data, f".{audio_format.value}",
+                            iterations).result()
+                    print(f"   {audio_format.value:<6} {sample_rate:>6} {decoder:<8} "
+                          f"{cold_ms:9.1f} {warm_ms:9.2f} {rss_mb:7.1f}MB")
+
+    def benchmark_vad(self):
+        """Bytes sent to STT per clip: fixed 0.5 s skip vs. VAD trimming"""
+        self.print_header("Silence trimming before STT (16 kHz PCM)")
+        print(f"   {'clip':<34} {'decoded':>9} {'0.5s skip':>10} {'VAD':>9} {'saved':>6} {'VAD ms':>7}")
+
+        clips = [
+            ("1 s + 2 s speech + 1 s", make_utterance_pcm(1.0, 2.0, 1.0)),
+            ("noisy 1.5 s + 2 s + 2 s", make_utterance_pcm(1.5, 2.0, 2.0, noise=0.003)),
+            ("push-to-talk 0.3 s + 3 s + 0.3 s", make_utterance_pcm(0.3, 3.0, 0.3)),
+            ("5 s speech, no silence", make_utterance_pcm(0.0, 5.0, 0.0)),
+            ("3 s background noise only", make_utterance_pcm(3.0, 0.0, 0.0, noise=0.003)),
+        ]
+        calibration_bytes = 16000 // 2 * 2
+        for name, pcm in clips:
+            start = time.perf_counter()
+            for _ in range(self.iterations):
+                bounds, _ = find_speech(pcm)
+            vad_ms = (time.perf_counter() - start) / self.iterations * 1000
+
+            legacy_bytes = max(0, len(pcm) - calibration_bytes)
+            vad_bytes = bounds[1] - bounds[0] if bounds is not None else 0
+            saved = 1 - vad_bytes / legacy_bytes if legacy_bytes else 0.0
+            sent = f"{vad_bytes:9d}" if bounds is not None else "rejected "
+            print(f"   {name:<34} {len(pcm):9d} {legacy_bytes:10d} {sent:>9} "
+                  f"{saved:6.0%} {vad_ms:7.2f}")
+        print("   (negative savings: the fixed 0.5 s skip was cutting off speech)")
+
+    def benchmark_stt(self):
+        """Real-time factor of each STT backend on a fixed clip set"""
+        from app.stt import STT_BACKENDS, create_stt_backend
+
+        self.print_header("Speech recognition real-time factor")
+        # Real recordings give meaningful transcripts; synthetic clips still time the engines
+        clip_dir = os.getenv("STT_BENCHMARK_CLIPS")
+        if clip_dir:
+            clips = []
+            for name in sorted(os.listdir(clip_dir)):
+                suffix = os.path.splitext(name)[1].lower()
+                if suffix in (".wav", ".flac", ".mp3"):
+                    with open(os.path.join(clip_dir, name), "rb") as clip_file:
+                        clips.append(decode_speech(clip_file.read(), suffix).pcm)
+            clips = [pcm for pcm in clips if pcm]
+        else:
+            clips = [make_utterance_pcm(0.2, seconds, 0.2, seed=i)
+                     for i, seconds in enumerate((1.5, 3.0, 6.0))]
+        audio_seconds = sum(len(pcm) for pcm in clips) / 32000
+        language = os.getenv("STT_BENCHMARK_LANGUAGE", "vi-VN")
+        print(f"   {len(clips)} clips, {audio_seconds:.1f} s of audio, language {language}")
+        print(f"   {'backend':<8} {'load s':>7} {'first s':>8} {'RTF':>7}")
+
+        for name in STT_BACKENDS:
+            backend = create_stt_backend(name)
+            try:
+                start = time.perf_counter()
+                backend.load()
+                load_seconds = time.perf_counter() - start
+
+                # The first call includes lazy initialisation inside the engine
+                start = time.perf_counter()
+                backend.transcribe(clips[0], language)
+                first_seconds = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for pcm in clips:
+                    backend.transcribe(pcm, language)
+                rtf = (time.perf_counter() - start) / audio_seconds
+            except Exception as e:
+                print(f"   {name:<8} skipped: {str(e).splitlines()[0][:70]}")
+                continue
+            print(f"   {name:<8} {load_seconds:7.2f} {first_seconds:8.2f} {rtf:7.3f}")
+
+    def benchmark_tts(self):
+        """Synthesised audio seconds per wall second for each local TTS backend by pool size"""
+        from app.tts import TTS_BACKENDS, _init_tts_worker, create_tts_backend
+
+        self.print_header("Local TTS throughput")
+        replies = [text for text in UTTERANCE_CORPUS for _ in range(2)]
+        language = os.getenv("TTS_BENCHMARK_LANGUAGE", "vi-VN")
+        print(f"   {len(replies)} replies, language {language}")
+        print(f"   {'backend':<8} {'workers':>7} {'audio s':>8} {'wall s':>7} {'audio s/s':>10}")
+
+        context = multiprocessing.get_context("spawn")
+        for name, backend_class in TTS_BACKENDS.items():
+            if not backend_class.local:
+                continue
+            try:
+                create_tts_backend(name).load()
+            except Exception as e:
+                print(f"   {name:<8} skipped: {str(e).splitlines()[0][:70]}")
+                continue
+
+            # Spawned workers read TTS_BACKEND from the environment
+            previous = os.environ.get("TTS_BACKEND")
+            os.environ["TTS_BACKEND"] = name
+            try:
+                for workers in (1, 2, 4):
+                    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                             initializer=_init_tts_worker) as pool:
+                        # Warm every worker so voice loading is not timed
+                        list(pool.map(_synthesize_seconds, replies[:workers], [language] * workers))
+                        start = time.perf_counter()
+                        audio_seconds = sum(pool.map(
+                            _synthesize_seconds, replies, [language] * len(replies)))
+                        wall_seconds = time.perf_counter() - start
+                    print(f"   {name:<8} {workers:>7} {audio_seconds:8.1f} {wall_seconds:7.2f} "
+                          f"{audio_seconds / wall_seconds:10.1f}")
+            finally:
+                if previous is None:
+                    del os.environ["TTS_BACKEND"]
+                else:
+                    os.environ["TTS_BACKEND"] = previous
+
+    def benchmark_cold_start(self):
+        """Startup to the first useful recommendation: backend sync vs. persisted snapshot"""
+        import asyncio
+        import socket
+        from pathlib import Path
+        from aiohttp import web
+        from app.catalog_sync import CatalogSync
+        from app.config import config
+        from app.http_client import http_client
+        from app.schemas import Entity
+        from app.service import VoiceAgentService
+        from stub_backend import StubCatalog, create_app
+
+        self.print_header("Cold start to first recommendation")
+        latency_ms = float(os.getenv("COLD_START_BACKEND_LATENCY_MS", 30))
+        print(f"   stub backend {latency_ms:.0f} ms per request, {config.PRODUCT_SYNC_PAGE_SIZE} products per page")
+        print(f"   {'products':>8} {'start from':<10} {'first rec ms':>12} {'snapshot':>9}")
+        entities = [Entity(type="product", value="goku", confidence=0.8)]
+
+        async def first_recommendation(api_url: str, snapshot_path: Path, warm: bool) -> float:
+            # A fresh service is what a restarted process has
+            service = VoiceAgentService()
+            service.backend_api_url = api_url
+            service.catalog_sync = CatalogSync(
+                api_url, config.PRODUCT_SYNC_PAGE_SIZE, config.PRODUCT_SYNC_CONCURRENCY)
+            service.snapshot_path = snapshot_path
+            start = time.perf_counter()
+            if warm:
+                await service.load_product_snapshot()
+            recommendations = await service.get_product_recommendations("search_products", entities)
+            elapsed = time.perf_counter() - start
+            await service.shutdown()
+            if not recommendations:
+                raise RuntimeError("no recommendations")
+            return elapsed
+
+        async def measure(size: int):
+            runner = web.AppRunner(create_app(StubCatalog(size), latency_ms))
+            await runner.setup()
+            with socket.socket() as probe:
+                probe.bind(("127.0.0.1", 0))
+                port = probe.getsockname()[1]
+            await web.TCPSite(runner, "127.0.0.1", port).start()
+            api_url = f"http://127.0.0.1:{port}/api"
+            snapshot_path = Path(tempfile.mkdtemp()) / "product_snapshot.msgpack"
+            try:
+                # The cold run syncs from the backend and leaves the snapshot behind
+                cold = await first_recommendation(api_url, snapshot_path, warm=False)
+                snapshot_kb = snapshot_path.stat().st_size / 1024
+                warm = await first_recommendation(api_url, snapshot_path, warm=True)
+            finally:
+                await http_client.close()
+                await runner.cleanup()
+            print(f"   {size:>8} {'backend':<10} {cold * 1000:12.1f}")
+            print(f"   {size:>8} {'snapshot':<10} {warm * 1000:12.1f} {snapshot_kb:8.0f}K")
+
+        for size in (1000, 10000, 30000):
+            asyncio.run(measure(size))
+
+    def benchmark_metrics(self):
+        """Per-request cost of the request metrics middleware and stage spans, and /metrics render time"""
+        import asyncio
+        from app.metrics import metrics
+        from app.request_metrics import RequestMetricsMiddleware
+        from app.timing import collect_timings, span
+
+        self.print_header("Metrics collection overhead")
+        requests = self.iterations * 100
+
+        class Route:
+            path = "/voice/process-text"
+
+        async def endpoint(scope, receive, send):
+            scope["route"] = Route
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def send(message):
+            pass
+
+        async def per_request_us(app) -> float:
+            scope = {"type": "http", "method": "POST", "path": "/voice/process-text", "root_path": ""}
+            start = time.perf_counter()
+            for _ in range(requests):
+                await app(dict(scope), None, send)
+            return (time.perf_counter() - start) / requests * 1e6
+
+        async def measure():
+            bare = await per_request_us(endpoint)
+            wrapped = await per_request_us(RequestMetricsMiddleware(endpoint))
+            start = time.perf_counter()
+            for _ in range(requests):
+                with collect_timings():
+                    pass
+            collector_us = (time.perf_counter() - start) / requests * 1e6
+            with collect_timings():
+                start = time.perf_counter()
+                for _ in range(requests):
+                    with span("benchmark"):
+                        pass
+                span_us = (time.perf_counter() - start) / requests * 1e6
+            return bare, wrapped, collector_us, span_us
+
+        bare, wrapped, collector_us, span_us = asyncio.run(measure())
+        start = time.perf_counter()
+        exposition = metrics.render_prometheus()
+        render_ms = (time.perf_counter() - start) * 1000
+        print(f"   Requests:              {requests}")
+        print(f"   Request middleware:    {wrapped - bare:8.2f} µs/request")
+        print(f"   Stage timings:         {collector_us:8.2f} µs/request")
+        print(f"   Stage span:            {span_us:8.2f} µs/stage")
+        print(f"   /metrics render:       {render_ms:8.2f} ms ({len(exposition.splitlines())} lines)")
+
+    def run(self, selected: List[str]):
+        """Run the selected benchmarks (all when none are given)"""
+        benchmarks: Dict[str, Callable[[], None]] = {
+            "intent": self.benchmark_intent,
+            "entities": self.benchmark_entities,
+            "recommendations": self.benchmark_recommendations,
+            "fuzzy": self.benchmark_fuzzy,
+            "decode": self.benchmark_decode,
+            "vad": self.benchmark_vad,
+            "stt": self.benchmark_stt,
+            "tts": self.benchmark_tts,
+            "cold_start": self.benchmark_cold_start,
+            "metrics": self.benchmark_metrics,
+        }
+        unknown = [name for name in selected if name not in benchmarks]
+        if unknown:
+            print(f"Unknown benchmarks: {unknown}. Available: {list(benchmarks)}")
+            return
+
+        print("🚀 Voice Agent Benchmarks")
+        for name in selected or benchmarks:
+            benchmarks[name]()
+
+
+def _synthesize_seconds(text: str, language: str) -> float:
+    """Synthesise one reply in a TTS worker and return its audio duration"""
+    from app.audio import split_wav
+    from app.tts import synthesize
+    (channels, sample_width, sample_rate), frames = split_wav(synthesize(text, language))
+    return len(frames) / (channels * sample_width * sample_rate)
+
+
+def main():
+    """Main benchmark function"""
+    VoiceAgentBenchmark().run(sys.argv[1:])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
 from app.api import router
+from app.metrics import metrics, PROMETHEUS_CONTENT_TYPE
+from app.request_metrics import RequestMetricsMiddleware
+from app.service import voice_service
 from app.config import config
 import logging
 
@@ -30,6 +34,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request rate and latency per route for /metrics
+app.add_middleware(RequestMetricsMiddleware)
+
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
@@ -46,6 +53,7 @@ def read_root():
         "docs": "/docs",
         "redoc": "/redoc",
         "health": "/voice/health",
+        "metrics": "/metrics",
         "features": [
             "Speech-to-Text",
             "Text-to-Speech",
@@ -63,6 +71,12 @@ def health_check():
     return {"status": "healthy", "service": "voice-agent"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Every metric in the Prometheus text format, for scraping"""
+    return Response(metrics.render_prometheus(), headers={"Content-Type": PROMETHEUS_CONTENT_TYPE})
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
@@ -71,6 +85,12 @@ async def startup_event():
     logger.info(f"🎵 Audio files directory: {config.AUDIO_DIR}")
     logger.info(
         f"🌍 Supported languages: {list(config.SUPPORTED_LANGUAGES.keys())}")
+    await voice_service.startup()
+    if config.TTS_PREWARM_ENABLED:
+        # Canned replies are synthesised in the background; until a clip is
+        # ready it is generated lazily on first use
+        voice_service.start_tts_prewarm()
+        logger.info("🔥 Pre-warming canned response audio in the background")
     logger.info("✅ Voice Agent Service ready!")
 
 
@@ -78,4 +98,5 @@ async def startup_event():
 async def shutdown_event():
     """Cleanup on shutdown"""
     logger.info("🛑 Voice Agent Service shutting down...")
+    await voice_service.shutdown()
     logger.info("✅ Shutdown complete!")
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Stand-in Figuro backend for running the voice agent offline
+Serves the product listing (paginated, newest first, with ETags and 304s
+like the Express backend), the categories and the chatbot endpoints, plus
+/_stub routes to change the catalog or inject chatbot failures while the
+voice agent is running
+
+Usage:
+    python stub_backend.py                      # 250 products on port 3000
+    python stub_backend.py --port 3001 --products 5000 --latency-ms 40 --chatbot-latency-ms 800
+    BACKEND_API_URL=http://localhost:3001/api CHATBOT_API_URL=http://localhost:3001/api/chatbot \
+        uvicorn main:app
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+SERIES = ["Naruto", "Dragon Ball", "One Piece", "Demon Slayer", "My Hero Academia",
+          "Attack on Titan", "Jujutsu Kaisen"]
+CHARACTERS = ["Goku", "Vegeta", "Naruto", "Sasuke", "Luffy", "Zoro", "Tanjiro", "Nezuko",
+              "Deku", "Bakugo", "Eren", "Levi", "Gojo", "Itadori"]
+EDITIONS = ["Figure", "Statue", "Premium", "Limited", "Chibi", "Deluxe"]
+
+
+class StubCatalog:
+    """In-memory catalog shaped like the backend's Prisma models"""
+
+    def __init__(self, product_count: int = 250, seed: int = 42):
+        rng = random.Random(seed)
+        self.categories = [
+            {"id": i + 1, "name": name, "description": f"{name} figures"}
+            for i, name in enumerate(SERIES)
+        ]
+        self.products: Dict[int, Dict[str, Any]] = {}
+        self._next_id = 1
+        self._created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        for _ in range(product_count):
+            category = rng.choice(self.categories)
+            self.upsert({
+                "name": f"{rng.choice(CHARACTERS)} {rng.choice(EDITIONS)} {self._next_id}",
+                "price": rng.randrange(500_000, 5_000_000, 10_000),
+                "stock": rng.randint(0, 50),
+                "categoryId": category["id"],
+            })
+
+    def upsert(self, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a product, or update the one with fields["id"]"""
+        product_id = fields.get("id")
+        if product_id in self.products:
+            product = self.products[product_id]
+        else:
+            product_id = self._next_id
+            self._next_id += 1
+            self._created += timedelta(minutes=1)
+            product = {
+                "id": product_id, "name": "", "description": None, "price": 0,
+                "imageUrl": None, "isCustomizable": False, "stock": 0,
+                "productionTimeDays": None, "categoryId": None,
+                "slug": f"product-{product_id}", "createdAt": self._created.isoformat(),
+            }
+            self.products[product_id] = product
+        product.update({k: v for k, v in fields.items() if k != "id"})
+        product["category"] = next(
+            (c for c in self.categories if c["id"] == product.get("categoryId")), None)
+        # Prisma serialises Decimal prices as strings
+        product["price"] = f"{float(product['price']):.2f}"
+        return product
+
+    def delete(self, product_id: int) -> bool:
+        return self.products.pop(product_id, None) is not None
+
+    def page(self, page: int, limit: int) -> Dict[str, Any]:
+        """One page of the listing, newest first like the backend's default sort"""
+        ordered: List[Dict[str, Any]] = sorted(
+            self.products.values(), key=lambda p: p["createdAt"], reverse=True)
+        start = (page - 1) * limit
+        return {
+            "products": ordered[start:start + limit],
+            "pagination": {
+                "page": page, "limit": limit, "total": len(ordered),
+                "pages": -(-len(ordered) // limit),
+            },
+        }
+
+
+CATALOG = web.AppKey("catalog", StubCatalog)
+# Request counters: requests, 304 answers, JSON bytes sent, chatbot queries
+STATS = web.AppKey("stats", Dict[str, int])
+# Simulated database/network time per backend request
+LATENCY = web.AppKey("latency", float)
+# Simulated answer time of the chatbot
+CHATBOT_LATENCY = web.AppKey("chatbot_latency", float)
+# Injected failures: HTTP status the chatbot answers with
+FAULTS = web.AppKey("faults", Dict[str, int])
+
+
+def json_response(request: web.Request, message: str, data: Any) -> web.Response:
+    """Backend-style envelope with a weak ETag; 304 when If-None-Match matches"""
+    body = json.dumps({"success": True, "message": message, "data": data},
+                      ensure_ascii=False).encode("utf-8")
+    etag = f'W/"{len(body):x}-{hashlib.sha1(body).hexdigest()[:27]}"'
+    request.app[STATS]["requests"] += 1
+    if request.headers.get("If-None-Match") == etag:
+        request.app[STATS]["not_modified"] += 1
+        return web.Response(status=304, headers={"ETag": etag})
+    request.app[STATS]["bytes"] += len(body)
+    return web.Response(body=body, content_type="application/json", headers={"ETag": etag})
+
+
+async def list_products(request: web.Request) -> web.Response:
+    await asyncio.sleep(request.app[LATENCY])
+    page = int(request.query.get("page", 1))
+    limit = int(request.query.get("limit", 20))
+    return json_response(request, "Products retrieved successfully",
+                         request.app[CATALOG].page(page, limit))
+
+
+async def list_categories(request: web.Request) -> web.Response:
+    await asyncio.sleep(request.app[LATENCY])
+    return json_response(request, "Categories retrieved successfully",
+                         {"categories": request.app[CATALOG].categories})
+
+
+async def query_chatbot(request: web.Request) -> web.Response:
+    payload = await request.json()
+    request.app[STATS]["chatbot_queries"] += 1
+    await asyncio.sleep(request.app[CHATBOT_LATENCY])
+    status = request.app[FAULTS]["chatbot_status"]
+    if status != 200:
+        return web.json_response({"error": "Stub chatbot failure"}, status=status)
+    return web.json_response({"response": f"Stub chatbot: {payload.get('text', '')}"})
+
+
+async def upsert_product(request: web.Request) -> web.Response:
+    product = request.app[CATALOG].upsert(await request.json())
+    return web.json_response(product)
+
+
+async def delete_product(request: web.Request) -> web.Response:
+    deleted = request.app[CATALOG].delete(int(request.match_info["product_id"]))
+    return web.json_response({"deleted": deleted}, status=200 if deleted else 404)
+
+
+async def set_faults(request: web.Request) -> web.Response:
+    request.app[FAULTS].update(await request.json())
+    return web.json_response(request.app[FAULTS])
+
+
+async def get_stats(request: web.Request) -> web.Response:
+    return web.json_response(request.app[STATS])
+
+
+def create_app(catalog: StubCatalog, latency_ms: float = 0,
+               chatbot_latency_ms: float = 0) -> web.Application:
+    """Build the stub backend around a catalog"""
+    app = web.Application()
+    app[CATALOG] = catalog
+    app[LATENCY] = latency_ms / 1000
+    app[CHATBOT_LATENCY] = chatbot_latency_ms / 1000
+    app[STATS] = {"requests": 0, "not_modified": 0, "bytes": 0, "chatbot_queries": 0}
+    app[FAULTS] = {"chatbot_status": 200}
+    app.router.add_get("/api/products", list_products)
+    app.router.add_get("/api/products/categories/all", list_categories)
+    app.router.add_post("/api/chatbot/query", query_chatbot)
+    app.router.add_post("/_stub/products", upsert_product)
+    app.router.add_delete("/_stub/products/{product_id}", delete_product)
+    app.router.add_post("/_stub/faults", set_faults)
+    app.router.add_get("/_stub/stats", get_stats)
+    return app
+
+
+def main():
+    """Run the stub backend"""
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=3000)
+    parser.add_argument("--products", type=int, default=250)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--chatbot-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+    web.run_app(create_app(StubCatalog(args.products), args.latency_ms, args.chatbot_latency_ms),
+                port=args.port)
+
+
+if __name__ == "__main__":
+    main()
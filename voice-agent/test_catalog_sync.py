@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the product catalog: delta sync, snapshots and matching
+Runs the voice agent's catalog sync against stub_backend.py in-process, no
+backend or voice agent server needed
+"""
+
+import asyncio
+import socket
+import tempfile
+from pathlib import Path
+
+import httpx
+from aiohttp import web
+
+from app.catalog import ProductIndex
+from app.catalog_sync import CatalogSync
+from app.http_client import http_client
+from app.service import VoiceAgentService
+from stub_backend import STATS, StubCatalog, create_app
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def make_service(api_url: str, page_size: int, snapshot_path=None) -> VoiceAgentService:
+    """Voice service pointed at the stub backend, not persisting unless asked"""
+    service = VoiceAgentService()
+    service.backend_api_url = api_url
+    service.catalog_sync = CatalogSync(api_url, page_size=page_size, concurrency=4,
+                                       breaker=service.breakers["products"])
+    service.snapshot_path = snapshot_path
+    return service
+
+
+async def with_stub_backend(catalog: StubCatalog, scenario, **options):
+    """Serve the catalog on a local port and run scenario(app, api_url)
+
+    ``options`` go to stub_backend.create_app, e.g. latency_ms.
+    """
+    app = create_app(catalog, **options)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    port = free_port()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    try:
+        await scenario(app, f"http://127.0.0.1:{port}/api")
+    finally:
+        await http_client.close()
+        await runner.cleanup()
+
+
+def same_recommendations(index: ProductIndex, expected: ProductIndex) -> bool:
+    queries = [(["goku"], [], []), ([], ["dragon ball"], ["rẻ"]), (["figure"], ["naruto"], ["đắt"]),
+               ([" "], [], []), ([], [], ["under_1500000", "over_4000000"])]
+    filters = [{}, {"category_filter": "naruto"}, {"price_filter": "cheap"}]
+    return all(
+        index.recommend(*query, limit=20, **kw) == expected.recommend(*query, limit=20, **kw)
+        for query in queries for kw in filters)
+
+
+def test_full_then_delta_sync():
+    """First sync walks every page; later syncs only download changed pages"""
+    print("🔄 Testing delta catalog sync...")
+    catalog = StubCatalog(product_count=230)
+
+    async def scenario(app, api_url):
+        sync = CatalogSync(api_url, page_size=50, concurrency=2)
+
+        changes = await sync.sync({})
+        assert changes.full and len(changes.products) == 230
+        assert changes.pages_fetched == 5 and changes.pages_unchanged == 0
+        cache = changes.products
+
+        # Nothing changed: every page answers 304
+        changes = await sync.sync(cache)
+        assert not changes.full and not changes.products and not changes.removed_ids
+        assert changes.pages_unchanged == 5 and changes.categories is None
+
+        # An update in place only changes its own page
+        oldest_id = min(cache)
+        catalog.upsert({"id": oldest_id, "price": 123000})
+        changes = await sync.sync(cache)
+        assert list(changes.products) == [oldest_id] and changes.pages_fetched == 1
+
+        # A new product shifts every page, but only it is reported
+        cache.update(changes.products)
+        new_product = catalog.upsert({"name": "Gojo Limited Domain", "price": 2500000, "categoryId": 7})
+        changes = await sync.sync(cache)
+        assert list(changes.products) == [new_product["id"]] and not changes.removed_ids
+
+        # Deleted products disappear from the listing
+        cache.update(changes.products)
+        catalog.delete(oldest_id)
+        changes = await sync.sync(cache)
+        assert changes.removed_ids == {oldest_id} and not changes.products
+
+    asyncio.run(with_stub_backend(catalog, scenario))
+    print("✅ Delta sync fetched only changed pages and products")
+
+
+def test_service_patches_index():
+    """The service patches its cache and index to match a fresh full build"""
+    print("\n🧩 Testing in-place index patching...")
+    catalog = StubCatalog(product_count=120)
+
+    async def scenario(app, api_url):
+        service = make_service(api_url, page_size=25)
+
+        assert await service.refresh_product_cache()
+        assert len(service.product_cache) == 120
+        index = service.product_index
+
+        ids = sorted(catalog.products)
+        catalog.upsert({"id": ids[3], "name": "Goku Ultra Instinct", "categoryId": 2})
+        catalog.upsert({"id": ids[10], "price": 999000})
+        catalog.delete(ids[20])
+        catalog.upsert({"name": "Goku Black Rose", "price": 1500000, "categoryId": 2})
+        before = app[STATS]["bytes"]
+
+        assert await service.refresh_product_cache()
+        assert service.product_index is index  # patched, not rebuilt
+        assert service.product_cache == {
+            product_id: product for product_id, product in
+            ((p["id"], p) for p in catalog.page(1, 1000)["products"])}
+        assert same_recommendations(index, ProductIndex(service.product_cache))
+        products = service.entity_automaton.search("tìm goku black rose").get("product", [])
+        assert [name.lower() for name in products] == ["goku black rose"]
+        print(f"   Delta sync downloaded {app[STATS]['bytes'] - before} bytes")
+
+    asyncio.run(with_stub_backend(catalog, scenario))
+    print("✅ Patched index matches a full rebuild")
+
+
+def test_snapshot_warm_start():
+    """A restarted service serves the persisted catalog, then revalidates with 304s"""
+    print("\n💾 Testing product snapshot warm start...")
+    catalog = StubCatalog(product_count=150)
+    snapshot_path = Path(tempfile.mkdtemp()) / "product_snapshot.msgpack"
+
+    async def scenario(app, api_url):
+        first = make_service(api_url, page_size=50, snapshot_path=snapshot_path)
+        assert await first.refresh_product_cache()
+        assert snapshot_path.is_file()
+
+        # "Restart": a new service loads the snapshot without calling the backend
+        requests_before = app[STATS]["requests"]
+        restarted = make_service(api_url, page_size=50, snapshot_path=snapshot_path)
+        assert await restarted.load_product_snapshot()
+        assert app[STATS]["requests"] == requests_before
+        assert restarted.product_cache == first.product_cache
+        assert same_recommendations(restarted.product_index, first.product_index)
+
+        # Revalidation is a delta: every page and the categories answer 304
+        not_modified_before = app[STATS]["not_modified"]
+        assert await restarted.refresh_product_cache()
+        assert app[STATS]["not_modified"] - not_modified_before == 4  # 3 pages + categories
+
+        # A snapshot taken from a different backend is not used
+        other = make_service("http://127.0.0.1:1/api", page_size=50, snapshot_path=snapshot_path)
+        assert not await other.load_product_snapshot()
+
+    asyncio.run(with_stub_backend(catalog, scenario))
+    print("✅ Snapshot loaded without the backend and revalidated with 304s")
+
+
+def test_fuzzy_product_matching():
+    """Misspelt and unaccented names still find products, ranked below exact matches"""
+    print("\n🔤 Testing fuzzy product matching...")
+    catalog = {
+        1: {"id": 1, "name": "Mô hình Luffy Gear 5", "price": "2500000.00",
+            "category": {"id": 1, "name": "One Piece"}},
+        2: {"id": 2, "name": "Luffy Snakeman", "price": "1800000.00",
+            "category": {"id": 1, "name": "One Piece"}},
+        3: {"id": 3, "name": "Tanjiro Kamado", "price": "900000.00",
+            "category": {"id": 2, "name": "Thanh Gươm Diệt Quỷ"}},
+    }
+    index = ProductIndex(catalog)
+
+    def names(*query, **kw):
+        return [(p["id"], p["relevance_score"]) for p in index.recommend(*query, **kw)]
+
+    assert names(["mo hinh luffy"], [], []) == [(1, 10)]
+    assert names(["luphy"], [], []) == [(1, 7), (2, 7)]
+    assert names(["gear luffy"], [], []) == [(1, 7)]  # any word order
+    assert names(["luffy", "snakemen"], [], []) == [(1, 10), (2, 10)]  # only unmatched values go fuzzy
+    assert names([], ["thanh guong"], []) == [(3, 6)]
+    assert names([], ["thanh gươm"], [], category_filter="thanh guom diet quy") == [(3, 8)]
+    assert names(["xyz"], [], []) == []
+
+    # Typo lookups follow catalog changes
+    index.apply_delta([{"id": 4, "name": "Zoro Enma", "price": "1200000.00"}], [2])
+    assert names(["zorro"], [], []) == [(4, 7)]
+    assert names(["snakemen"], [], []) == []
+    print("✅ Typos and missing diacritics matched")
+
+
+def test_price_ranges():
+    """Scoring keeps the legacy price words; low/high only work as search filters"""
+    print("\n💰 Testing price range scoring and filters...")
+    catalog = {
+        1: {"id": 1, "name": "Naruto Sage", "price": "1500000.00", "category": None},
+        2: {"id": 2, "name": "Naruto Kurama", "price": "3500000.00", "category": None},
+        3: {"id": 3, "name": "Naruto Hokage", "price": "2500000.00", "category": None},
+    }
+    index = ProductIndex(catalog)
+
+    def names(*query, **kw):
+        return [(p["id"], p["relevance_score"]) for p in index.recommend(*query, **kw)]
+
+    assert names([], [], ["rẻ"]) == [(1, 5)]
+    assert names(["naruto"], [], ["expensive"]) == [(2, 15), (1, 10), (3, 10)]
+    assert names([], [], ["low"]) == [] and names([], [], ["high"]) == []
+    assert names(["naruto"], [], ["high"]) == [(1, 10), (2, 10), (3, 10)]
+    assert names(["naruto"], [], [], price_filter="low") == [(1, 10)]
+    assert names(["naruto"], [], [], price_filter="high") == [(2, 10)]
+    assert names(["naruto"], [], [], price_filter="under_2500000") == [(1, 10), (3, 10)]
+    print("✅ low/high filter without changing scores")
+
+
+def test_recommendations_endpoint():
+    """/voice/products/recommendations scores category and price_max entities"""
+    print("\n🎯 Testing recommendations endpoint...")
+    from app import api
+    from main import app as voice_app
+
+    async def scenario(app, api_url):
+        service = make_service(api_url, page_size=50)
+        endpoint_service, api.voice_service = api.voice_service, service
+        try:
+            transport = httpx.ASGITransport(app=voice_app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://voice") as client:
+                response = await client.get("/voice/products/recommendations",
+                                            params={"category": "naruto", "price_max": 2000000})
+        finally:
+            api.voice_service = endpoint_service
+
+        assert response.status_code == 200, response.text
+        body = response.json()
+        assert body["filters"] == {"category": "naruto", "price_max": 2000000}
+        expected = service.product_index.recommend([], ["naruto"], ["under_2000000.0"], limit=5)
+        assert body["recommendations"] == expected and body["total"] == 5
+        for product in body["recommendations"]:
+            # Category and price both matched
+            assert product["relevance_score"] == 13
+            assert float(product["price"]) <= 2000000
+
+    asyncio.run(with_stub_backend(StubCatalog(product_count=120), scenario))
+    print("✅ price_max became an under_ price range")
+
+
+def main():
+    """Run the offline catalog sync tests"""
+    print("🚀 Catalog Sync Tests (offline, stub backend)")
+    print("=" * 50)
+    test_full_then_delta_sync()
+    test_service_patches_index()
+    test_snapshot_warm_start()
+    test_fuzzy_product_matching()
+    test_price_ranges()
+    test_recommendations_endpoint()
+    print("\n🎉 All catalog sync tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -90,7 +90,8 @@ class EnhancedVoiceAgentTester:
                     self.log_test(
                         f"Text Processing: {test_case['description']}",
                         success,
-                        f"Expected: {test_case['expected_intent']}, Got: {intent}"
+                        f"Expected: {test_case['expected_intent']}, Got: {intent}, "
+                        f"{data.get('processing_time_ms')}ms {data.get('stage_timings_ms')}"
                     )
                 else:
                     self.log_test(
@@ -105,6 +106,48 @@ class EnhancedVoiceAgentTester:
                     f"Error: {str(e)}"
                 )
 
+    async def test_batch_text_processing(self):
+        """Test batch text processing keeps input order and isolates items"""
+        texts = [
+            "Tôi muốn tìm mô hình Naruto",
+            "Xin chào, bạn có thể giúp tôi không?",
+            "Tôi muốn tìm mô hình Naruto",
+            "Giá của sản phẩm này bao nhiêu?"
+        ]
+        try:
+            response = requests.post(
+                f"{self.base_url}/voice/process-text/batch",
+                json={
+                    "items": [
+                        {"text": text, "language": "vi-VN", "enable_tts": False}
+                        for text in texts
+                    ]
+                }
+            )
+
+            if response.status_code == 200:
+                results = response.json().get("results", [])
+                in_order = [r["index"] for r in results] == list(range(len(texts)))
+                transcripts = [(r.get("response") or {}).get("transcript") for r in results]
+                self.log_test(
+                    "Batch Text Processing",
+                    in_order and transcripts == texts,
+                    f"{len(results)} results in {response.json().get('processing_time_ms')}ms"
+                )
+            else:
+                self.log_test("Batch Text Processing", False,
+                              f"Status code: {response.status_code}")
+
+            # Oversized batches are rejected up front
+            response = requests.post(
+                f"{self.base_url}/voice/process-text/batch",
+                json={"items": [{"text": "Xin chào"}] * 1000}
+            )
+            self.log_test("Batch Size Limit", response.status_code == 413,
+                          f"Status code: {response.status_code}")
+        except Exception as e:
+            self.log_test("Batch Text Processing", False, f"Error: {str(e)}")
+
     async def test_product_search(self):
         """Test voice-based product search"""
         search_queries = [
@@ -336,6 +379,45 @@ class EnhancedVoiceAgentTester:
                     f"Error: {str(e)}"
                 )
 
+    async def test_voice_session(self):
+        """Test the duplex WebSocket voice session with synthetic audio"""
+        try:
+            import numpy as np
+            import websockets
+
+            # 0.5 s silence, 1.5 s tone, 1 s silence as 16 kHz 16-bit PCM
+            rate = 16000
+            tone = 0.3 * np.sin(2 * np.pi * 220 * np.arange(int(1.5 * rate)) / rate)
+            audio = np.concatenate([np.zeros(rate // 2), tone, np.zeros(rate)])
+            pcm = (audio * 32767).astype('<i2').tobytes()
+            frame_bytes = rate * 2 * 20 // 1000  # 20 ms frames
+
+            ws_url = self.base_url.replace("http", "ws", 1)
+            async with websockets.connect(
+                    f"{ws_url}/voice/session?language=vi-VN&sample_rate={rate}") as ws:
+                for i in range(0, len(pcm), frame_bytes):
+                    await ws.send(pcm[i:i + frame_bytes])
+                await ws.send(json.dumps({"type": "end"}))
+
+                events, audio_bytes = [], 0
+                while True:
+                    message = await asyncio.wait_for(ws.recv(), timeout=30)
+                    if isinstance(message, bytes):
+                        audio_bytes += len(message)
+                        continue
+                    event = json.loads(message)["type"]
+                    events.append(event)
+                    if event in ("audio_end", "error"):
+                        break
+
+            success = events[:2] == ["ready", "speech_start"] and (
+                "final" in events or "error" in events)
+            self.log_test("Voice Session (WebSocket)", success,
+                          f"Events: {events}, audio: {audio_bytes} bytes")
+        except Exception as e:
+            self.log_test("Voice Session (WebSocket)",
+                          False, f"Error: {str(e)}")
+
     async def run_all_tests(self):
         """Run all test cases"""
         print("🚀 Starting Enhanced Voice Agent Test Suite")
@@ -343,11 +425,13 @@ class EnhancedVoiceAgentTester:
 
         await self.test_health_check()
         await self.test_text_processing()
+        await self.test_batch_text_processing()
         await self.test_product_search()
         await self.test_product_categories()
         await self.test_product_recommendations()
         await self.test_chatbot_integration()
         await self.test_voice_streaming()
+        await self.test_voice_session()
 
         # Print summary
         print("\n" + "=" * 60)
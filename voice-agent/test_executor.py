@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the bounded worker pools: backpressure and slot
+accounting when callers stop waiting
+"""
+
+import asyncio
+import threading
+
+from app.executor import WorkerPool, WorkerPoolSaturated
+
+
+def test_saturated_pool_rejects():
+    """Jobs beyond max_workers + max_queue are rejected with a 503"""
+    print("🚦 Testing worker pool backpressure...")
+    pool = WorkerPool("test", "thread", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        jobs = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool._in_flight == 2 and pool.queue_depth == 1
+        try:
+            await pool.run(release.wait)
+            assert False, "expected WorkerPoolSaturated"
+        except WorkerPoolSaturated as e:
+            assert e.status_code == 503
+        release.set()
+        await asyncio.gather(*jobs)
+        assert pool._in_flight == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+    print("✅ Saturated pool answered 503")
+
+
+def test_cancelled_callers_keep_their_slots():
+    """A job whose caller timed out still occupies the pool until it finishes"""
+    print("\n⏳ Testing slots held by abandoned jobs...")
+    pool = WorkerPool("test", "thread", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    async def scenario():
+        for _ in range(2):
+            try:
+                await asyncio.wait_for(pool.run(release.wait), 0.02)
+            except asyncio.TimeoutError:
+                pass
+        # Both jobs are still running or queued: the bound still applies
+        assert pool._in_flight == 2
+        try:
+            await pool.run(release.wait)
+            assert False, "expected WorkerPoolSaturated"
+        except WorkerPoolSaturated:
+            pass
+
+        release.set()
+        for _ in range(50):
+            if pool._in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert pool._in_flight == 0
+        assert await pool.run(sum, [1, 2]) == 3
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        pool.shutdown()
+    print("✅ Abandoned jobs counted until they finished")
+
+
+def main():
+    """Run the offline worker pool tests"""
+    print("🚀 Worker Pool Tests (offline)")
+    print("=" * 50)
+    test_saturated_pool_rejects()
+    test_cancelled_callers_keep_their_slots()
+    print("\n🎉 All worker pool tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the /metrics endpoint: Prometheus text format, request
+metrics per route template and the pipeline gauges, no backend needed
+"""
+
+import re
+
+from fastapi.testclient import TestClient
+
+from app.metrics import MetricsRegistry
+from main import app
+
+# name{labels} value, as Prometheus parses it
+SAMPLE_LINE = re.compile(r'^[a-zA-Z_:][a-zA-Z0-9_:]*(\{[a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*"'
+                         r'(,[a-zA-Z_][a-zA-Z0-9_]*="(\\.|[^"\\])*")*\})? [-+0-9.eEInfNa]+$')
+
+
+def test_prometheus_exposition():
+    """Counters, gauges and histograms render in the text exposition format"""
+    print("📈 Testing Prometheus exposition format...")
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests").inc(2, route='/a"b', status=200)
+    registry.gauge("queue_depth", "Queue").set_function(lambda: 3)
+    histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05, stage="stt")
+    histogram.observe(5.0, stage="stt")
+    # Bound series update the same samples as the labelled calls
+    registry.counter("requests_total", "Requests").labels(status=200, route='/a"b').inc()
+    histogram.labels(stage="tts").observe(0.5)
+
+    text = registry.render_prometheus()
+    lines = text.splitlines()
+    assert "# TYPE requests_total counter" in lines
+    assert 'requests_total{route="/a\\"b",status="200"} 3' in lines
+    assert "queue_depth 3" in lines
+    assert 'latency_seconds_bucket{stage="stt",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{stage="stt",le="+Inf"} 2' in lines
+    assert 'latency_seconds_sum{stage="stt"} 5.05' in lines
+    assert 'latency_seconds_count{stage="stt"} 2' in lines
+    assert 'latency_seconds_bucket{stage="tts",le="1.0"} 1' in lines
+    for line in lines:
+        assert line.startswith("# ") or SAMPLE_LINE.match(line), line
+    print("✅ Exposition format is valid")
+
+
+def test_metrics_endpoint():
+    """/metrics reports requests per route template and the pipeline metrics"""
+    print("\n🩺 Testing /metrics endpoint...")
+    client = TestClient(app)
+    assert client.get("/voice/supported-languages").status_code == 200
+    assert client.get("/voice/static/audio/missing-12345.wav").status_code == 404
+    assert client.get("/no-such-page").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    for line in text.splitlines():
+        assert line.startswith("# ") or SAMPLE_LINE.match(line), line
+
+    assert re.search(r'voice_http_requests_total\{method="GET",route="/voice/supported-languages",'
+                     r'status="200"\} [1-9]', text)
+    # Path parameters do not create a series per id
+    assert 'route="/voice/static/audio/{filename}",status="404"' in text and "missing-12345" not in text
+    assert 'route="unmatched",status="404"' in text
+    assert 'voice_http_request_duration_seconds_count{method="GET",route="/voice/supported-languages"}' in text
+    for name in ("voice_worker_pool_queue_depth", "voice_tts_cache_hit_ratio", "voice_chatbot_cache_hit_ratio",
+                 "voice_product_cache_hit_ratio", "voice_audio_dir_bytes", "voice_circuit_breaker_state"):
+        assert f"# TYPE {name} gauge" in text, name
+    print(f"✅ /metrics served {len(text.splitlines())} lines")
+
+
+def main():
+    """Run the offline metrics tests"""
+    print("🚀 Metrics Tests (offline)")
+    print("=" * 50)
+    test_prometheus_exposition()
+    test_metrics_endpoint()
+    print("\n🎉 All metrics tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the NLP matchers: pre-compiled intent matching and the
+keyword automaton behind dictionary entity extraction
+"""
+
+import re
+
+from app.nlp import (
+    INTENT_PATTERNS, IntentMatcher, KeywordAutomaton, build_entity_automaton
+)
+from app.schemas import Intent
+
+UTTERANCES = [
+    "tôi muốn mua mô hình naruto",
+    "toi muon mua mo hinh naruto",
+    "hủy đơn hàng giúp tôi",
+    "huy don hang giup toi",
+    "kiểm tra đơn hàng của tôi",
+    "còn hàng không",
+    "giá bao nhiêu vậy",
+    "gia bao nhieu vay",
+    "cho tôi xem tất cả danh mục",
+    "xin chào",
+    "tạm biệt nhé",
+    "cảm ơn",
+    "one piece",
+    "có màu đỏ không",
+    "",
+    "không có gì",
+]
+
+
+def naive_intent(text):
+    """Walk the raw pattern lists one regex at a time, as before the matcher"""
+    for intent, patterns in INTENT_PATTERNS.items():
+        for pattern in patterns:
+            if re.search(pattern, text):
+                return intent
+    return None
+
+
+def test_intent_matcher():
+    """The merged per-intent regexes give the same intent as the raw pattern walk"""
+    print("🎯 Testing intent matcher...")
+    matcher = IntentMatcher(INTENT_PATTERNS)
+    for text in UTTERANCES:
+        assert matcher.match(text) == naive_intent(text), text
+
+    assert matcher.match("tôi muốn mua mô hình naruto") == Intent.CREATE_ORDER
+    assert matcher.match("hủy đơn hàng giúp tôi") == Intent.CANCEL_ORDER
+    assert matcher.match("giá bao nhiêu vậy") == Intent.GET_PRODUCT_INFO
+    assert matcher.match("không có gì") is None
+    # Priority follows dict order, not which pattern matches first in the text
+    matcher = IntentMatcher({"first": [r"world"], "second": [r"hello"], "empty": []})
+    assert matcher.match("hello world") == "first"
+    assert matcher.match("hello") == "second"
+    assert matcher.match("bye") is None
+    print("✅ Intent matcher agrees with the raw patterns")
+
+
+def test_keyword_automaton():
+    """Multi-word keywords, word boundaries and leftmost-longest overlaps"""
+    print("\n🔤 Testing keyword automaton...")
+    automaton = KeywordAutomaton()
+    for keyword in ("goku", "goku black", "black", "ace", "one piece", "piece of cake"):
+        automaton.add(keyword, "product")
+    automaton.add("Black", "color")
+    automaton.add("goku", "product")
+    automaton.add("  ", "product")
+    assert len(automaton) == 7
+
+    assert automaton.search("Goku Black and goku") == {
+        "product": ["goku black", "goku"], "color": ["black"]}
+    # Matches fall on word boundaries only
+    assert automaton.search("a place for gokus") == {}
+    assert automaton.search("ace, place; ace!") == {"product": ["ace", "ace"]}
+    # Overlapping keywords of one type: the leftmost wins, then the longest
+    assert automaton.search("one piece of cake") == {"product": ["one piece"]}
+    assert automaton.search("piece of cake") == {"product": ["piece of cake"]}
+    # Failure links: a partial "piece of" falls back into "one piece"
+    assert automaton.search("piece of one piece") == {"product": ["one piece"]}
+    # Keywords added after a search are picked up by the next search
+    automaton.add("luffy", "product")
+    assert automaton.search("luffy") == {"product": ["luffy"]}
+    print("✅ Automaton matches whole words, leftmost-longest")
+
+
+def test_entity_automaton():
+    """Static keywords plus catalog names, with and without diacritics"""
+    print("\n🇻🇳 Testing entity automaton with Vietnamese...")
+    automaton = build_entity_automaton([
+        ("product", "Mô hình Luffy Gear 5"), ("category", "Nhân vật Anime"), ("product", "")])
+
+    assert automaton.search("cho tôi xem mô hình luffy gear 5 màu đỏ") == {
+        "product": ["mô hình luffy gear 5"], "category": ["mô hình"], "color": ["đỏ"]}
+    assert automaton.search("cho toi xem mo hinh luffy gear 5") == {
+        "product": ["mo hinh luffy gear 5"]}
+    assert automaton.search("nhân vật anime") == {"category": ["nhân vật anime"]}
+    assert automaton.search("nhan vat anime") == {"category": ["nhan vat anime"]}
+    # The same keyword reports once per entity type
+    assert automaton.search("naruto one piece") == {
+        "product": ["naruto", "one piece"], "category": ["naruto", "one piece"]}
+    assert automaton.search("majin buu và all might") == {"product": ["majin buu", "all might"]}
+    # "all mighty" is not "all might", "xanhh" is not "xanh"
+    assert automaton.search("all mighty xanhh") == {}
+    print("✅ Catalog names match with and without diacritics")
+
+
+def main():
+    """Run the offline NLP tests"""
+    print("🚀 NLP Tests (offline)")
+    print("=" * 50)
+    test_intent_matcher()
+    test_keyword_automaton()
+    test_entity_automaton()
+    print("\n🎉 All NLP tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the response pipeline after NLP: chatbot and product
+recommendations against stub_backend.py in-process, no backend needed
+"""
+
+import asyncio
+import time
+
+from app.config import config
+from app.schemas import SupportedLanguage, VoiceProcessRequest
+from stub_backend import FAULTS, STATS, StubCatalog
+from test_catalog_sync import make_service, with_stub_backend
+
+PRODUCT_QUERY = "Cho tôi xem sản phẩm Naruto"
+
+
+def make_pipeline_service(api_url: str):
+    service = make_service(api_url, page_size=50)
+    service.chatbot_api_url = f"{api_url}/chatbot"
+    return service
+
+
+def test_chatbot_and_products_run_concurrently():
+    """The first catalog load and a slow chatbot overlap instead of adding up"""
+    print("🔀 Testing concurrent chatbot and recommendations...")
+
+    async def scenario(app, api_url):
+        service = make_pipeline_service(api_url)
+        start = time.perf_counter()
+        response = await service.process_transcript(PRODUCT_QUERY, SupportedLanguage.VIETNAMESE)
+        elapsed = time.perf_counter() - start
+
+        assert response.response_text.startswith("Stub chatbot:")
+        assert response.product_recommendations
+        # Catalog (page 1, then pages 2-3: ~0.6 s) and chatbot (0.4 s) in parallel
+        assert elapsed < 0.9, f"took {elapsed:.2f}s"
+        print(f"   Answered in {elapsed:.2f}s (sequential would be ~1.0s)")
+
+    asyncio.run(with_stub_backend(StubCatalog(product_count=150), scenario,
+                                  latency_ms=300, chatbot_latency_ms=400))
+    print("✅ Chatbot and recommendations overlapped")
+
+
+def test_slow_chatbot_falls_back_to_basic_response():
+    """A chatbot past its deadline is dropped for the basic response, products still included"""
+    print("\n⏱️  Testing chatbot deadline fallback...")
+    deadline = config.CHATBOT_DEADLINE_SECONDS
+    config.CHATBOT_DEADLINE_SECONDS = 0.2
+
+    async def scenario(app, api_url):
+        service = make_pipeline_service(api_url)
+        await service.refresh_product_cache()
+
+        start = time.perf_counter()
+        response = await service.process_transcript(PRODUCT_QUERY, SupportedLanguage.VIETNAMESE)
+        elapsed = time.perf_counter() - start
+
+        basic = service._generate_basic_response(response.intent, response.entities, PRODUCT_QUERY)
+        assert response.response_text.startswith(basic)
+        assert response.product_recommendations
+        assert elapsed < 1.0, f"took {elapsed:.2f}s"
+        print(f"   Answered in {elapsed:.2f}s instead of waiting for the 1s chatbot")
+
+    try:
+        asyncio.run(with_stub_backend(StubCatalog(product_count=60), scenario,
+                                      chatbot_latency_ms=1000))
+    finally:
+        config.CHATBOT_DEADLINE_SECONDS = deadline
+    print("✅ Basic response served at the chatbot deadline")
+
+
+def test_chatbot_response_cache():
+    """Repeated and concurrent identical utterances reach the chatbot once per TTL"""
+    print("\n🗃️  Testing chatbot response cache...")
+
+    async def scenario(app, api_url):
+        service = make_pipeline_service(api_url)
+
+        # Concurrent spellings of one utterance share a single request
+        answers = await asyncio.gather(*(
+            service.query_chatbot(text) for text in ["Xin chào!", "xin  chào", "Xin chào", "XIN CHÀO."]))
+        assert app[STATS]["chatbot_queries"] == 1
+        assert all(answer == answers[0] and answer["response"] for answer in answers)
+
+        # Later repeats are served from the cache; language is part of the key
+        start = time.perf_counter()
+        assert await service.query_chatbot("xin chào") == answers[0]
+        assert time.perf_counter() - start < 0.05
+        await service.query_chatbot("xin chào", "en-US")
+        assert app[STATS]["chatbot_queries"] == 2
+
+        # A caller giving up at its deadline still leaves the answer cached
+        try:
+            await asyncio.wait_for(service.query_chatbot("giúp tôi"), 0.05)
+            assert False, "expected a timeout"
+        except asyncio.TimeoutError:
+            pass
+        await asyncio.sleep(0.25)
+        assert (await service.query_chatbot("giúp tôi"))["response"]
+        assert app[STATS]["chatbot_queries"] == 3
+
+        # Expired entries are fetched again
+        service.chatbot_cache.ttl_seconds = 0.1
+        await service.query_chatbot("cảm ơn")
+        await asyncio.sleep(0.15)
+        await service.query_chatbot("cảm ơn")
+        assert app[STATS]["chatbot_queries"] == 5
+
+    asyncio.run(with_stub_backend(StubCatalog(product_count=10), scenario, chatbot_latency_ms=200))
+    print("✅ Identical utterances shared one chatbot request")
+
+
+def test_failing_chatbot_opens_circuit():
+    """A chatbot that keeps failing is skipped until its open period ends, then retried"""
+    print("\n🔌 Testing chatbot circuit breaker...")
+
+    async def scenario(app, api_url):
+        service = make_pipeline_service(api_url)
+        service.chatbot_cache.clear()
+        breaker = service.breakers["chatbot"]
+        breaker.open_seconds = 0.3
+        app[FAULTS]["chatbot_status"] = 503
+
+        for i in range(breaker.min_calls):
+            assert await service.query_chatbot(f"câu hỏi {i}") == {}
+        assert breaker.is_open()
+        health = service.health_check()
+        assert health["status"] == "degraded" and not health["services"]["chatbot"]
+        assert health["dependencies"]["chatbot"]["state"] == "open"
+
+        # While open the backend is not called and the basic response comes at once
+        queries = app[STATS]["chatbot_queries"]
+        start = time.perf_counter()
+        response = await service.process_transcript("Xin chào", SupportedLanguage.VIETNAMESE)
+        assert time.perf_counter() - start < 0.1
+        assert response.response_text == service._generate_basic_response(
+            response.intent, response.entities, "Xin chào")
+        assert app[STATS]["chatbot_queries"] == queries
+
+        # After the open period one trial call goes through and closes it again
+        app[FAULTS]["chatbot_status"] = 200
+        await asyncio.sleep(0.35)
+        assert (await service.query_chatbot("xin chào"))["response"]
+        assert breaker.state == breaker.CLOSED
+        assert service.health_check()["services"]["chatbot"]
+
+    asyncio.run(with_stub_backend(StubCatalog(product_count=10), scenario, chatbot_latency_ms=20))
+    print("✅ Failing chatbot was skipped, then recovered")
+
+
+def test_adaptive_timeout():
+    """Timeouts follow the dependency's observed p99 latency within their bounds"""
+    print("\n⏲️  Testing adaptive dependency timeout...")
+    from app.circuit_breaker import CircuitBreaker
+
+    async def scenario():
+        breaker = CircuitBreaker("test", max_timeout=5.0, min_calls=3, min_timeout=0.05,
+                                 timeout_multiplier=2.0)
+        assert breaker.timeout() == 5.0
+        for _ in range(3):
+            await breaker.call(asyncio.sleep, 0.05)
+        assert 0.1 <= breaker.timeout() < 0.5, breaker.timeout()
+
+        # A call far beyond the usual latency times out and counts as a failure
+        try:
+            await breaker.call(asyncio.sleep, 2.0)
+            assert False, "expected a timeout"
+        except asyncio.TimeoutError:
+            pass
+        assert breaker.snapshot()["error_rate"] == 0.25
+
+        assert CircuitBreaker("local", max_timeout=5.0, adaptive=False, min_calls=1).timeout() == 5.0
+
+        # Per-unit latencies: short calls do not make long ones time out
+        speech = CircuitBreaker("speech", max_timeout=5.0, min_calls=3, min_timeout=0.05, unit="character")
+        for _ in range(3):
+            await speech.call(asyncio.sleep, 0.02, cost=10)
+        assert speech.snapshot()["per"] == "character"
+        assert 0.2 <= speech.timeout(cost=100) < 1.0, speech.timeout(cost=100)
+        await speech.call(asyncio.sleep, 0.2, cost=100)
+        assert speech.error_rate() == 0.0
+
+    asyncio.run(scenario())
+    print("✅ Timeout tracked the p99 latency")
+
+
+def test_stage_timings():
+    """Responses break their processing time down by stage and feed the stage histograms"""
+    print("\n📏 Testing per-stage latency instrumentation...")
+    from app.timing import stage_seconds
+
+    async def scenario(app, api_url):
+        service = make_pipeline_service(api_url)
+        await service.refresh_product_cache()
+        chatbot_calls = stage_seconds.samples().get((("stage", "chatbot"),), {}).get("count", 0)
+
+        response = await service.process_transcript(PRODUCT_QUERY, SupportedLanguage.VIETNAMESE)
+        timings = response.stage_timings_ms
+        assert {"intent", "entities", "chatbot", "recommendations", "response"} <= set(timings)
+        assert 150 <= timings["chatbot"] <= response.processing_time_ms + 1
+        assert response.processing_time_ms >= 150
+        assert stage_seconds.samples()[(("stage", "chatbot"),)]["count"] == chatbot_calls + 1
+        print(f"   {response.processing_time_ms} ms: {timings}")
+
+        # Concurrent requests keep their own breakdowns
+        first, second = await asyncio.gather(
+            service.process_transcript("Xin chào", SupportedLanguage.VIETNAMESE),
+            service.process_transcript(PRODUCT_QUERY, SupportedLanguage.VIETNAMESE))
+        assert "recommendations" not in first.stage_timings_ms
+        assert "recommendations" in second.stage_timings_ms
+
+    asyncio.run(with_stub_backend(StubCatalog(product_count=40), scenario, chatbot_latency_ms=150))
+    print("✅ Stage timings reported per request")
+
+
+def test_text_batch():
+    """Batches coalesce duplicate chatbot queries, keep input order and isolate failures"""
+    print("\n📦 Testing text batch processing...")
+
+    async def scenario(app, api_url):
+        service = make_pipeline_service(api_url)
+        analyze = service._analyze_text
+
+        def analyze_or_fail(text):
+            if text == "lỗi":
+                raise ValueError("broken item")
+            return analyze(text)
+
+        service._analyze_text = analyze_or_fail
+        texts = ["Xin chào", PRODUCT_QUERY, "lỗi", "Xin chào", "Cảm ơn", "Xin chào"]
+        items = [VoiceProcessRequest(text=text, enable_tts=False) for text in texts]
+        # A null language falls back to Vietnamese, sharing the query above
+        items[5] = VoiceProcessRequest(text="Xin chào", language=None, enable_tts=False)
+
+        results = await service.process_text_batch(items)
+
+        assert [result.index for result in results] == list(range(len(texts)))
+        assert results[2].response is None and "broken item" in results[2].error
+        for index in (0, 1, 3, 4, 5):
+            assert results[index].error is None
+            assert results[index].response.transcript == texts[index]
+            assert results[index].response.response_text.startswith("Stub chatbot:")
+        assert results[1].response.product_recommendations
+        assert results[5].response.response_text == results[0].response.response_text
+        # "Xin chào" x3, the product query and "Cảm ơn": three distinct queries
+        assert app[STATS]["chatbot_queries"] == 3
+        assert service.chatbot_cache.key("Xin chào", "vi-VN") in service.chatbot_cache._entries
+
+    asyncio.run(with_stub_backend(StubCatalog(product_count=40), scenario, chatbot_latency_ms=50))
+
+    # The endpoint rejects empty and oversized batches before any work
+    from fastapi.testclient import TestClient
+    from main import app as voice_app
+    client = TestClient(voice_app)
+    assert client.post("/voice/process-text/batch", json={"items": []}).status_code == 400
+    too_many = [{"text": "Xin chào"}] * (config.BATCH_MAX_ITEMS + 1)
+    assert client.post("/voice/process-text/batch", json={"items": too_many}).status_code == 413
+    print("✅ Duplicates shared a chatbot call, the failing item stayed isolated")
+
+
+def main():
+    """Run the offline response pipeline tests"""
+    print("🚀 Response Pipeline Tests (offline, stub backend)")
+    print("=" * 50)
+    test_chatbot_and_products_run_concurrently()
+    test_slow_chatbot_falls_back_to_basic_response()
+    test_chatbot_response_cache()
+    test_failing_chatbot_opens_circuit()
+    test_adaptive_timeout()
+    test_stage_timings()
+    test_text_batch()
+    print("\n🎉 All response pipeline tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the content-addressed TTS cache: hits, misses, eviction
+and shared synthesis, with a fake engine writing into a temporary directory
+"""
+
+import asyncio
+import os
+import tempfile
+from pathlib import Path
+
+from app.tts_cache import TTSCache
+
+
+class FakeEngine:
+    """Writes size bytes per clip after delay seconds, counting calls"""
+
+    def __init__(self, size: int = 100, delay: float = 0.0):
+        self.size = size
+        self.delay = delay
+        self.calls = 0
+
+    def synthesizer(self, text: str):
+        async def synthesize(path: Path):
+            self.calls += 1
+            await asyncio.sleep(self.delay)
+            path.write_bytes(text.encode("utf-8")[:1] * self.size)
+        return synthesize
+
+
+def make_cache(max_entries: int = 100, max_bytes: int = 10 ** 6) -> TTSCache:
+    return TTSCache(Path(tempfile.mkdtemp()), max_entries, max_bytes)
+
+
+def clip(cache: TTSCache, engine: FakeEngine, text: str):
+    key = TTSCache.key(text, "vi-VN", 1.0, "fake")
+    return cache.get_or_create(key, "mp3", engine.synthesizer(text))
+
+
+def test_hit_and_miss():
+    """A clip is synthesised once and served from disk afterwards"""
+    print("🔊 Testing TTS cache hit and miss...")
+    cache, engine = make_cache(), FakeEngine()
+
+    async def scenario():
+        url = await clip(cache, engine, "Xin chào")
+        assert url.startswith("/static/audio/tts_") and url.endswith(".mp3")
+        assert cache.path(url).stat().st_size == 100
+        assert await clip(cache, engine, "Xin chào") == url
+        assert engine.calls == 1
+        assert await clip(cache, engine, "Tạm biệt") != url
+        assert engine.calls == 2
+        # Hits trust the index; a clip deleted behind the cache's back is
+        # synthesised again once the reader discards it
+        cache.path(url).unlink()
+        assert await clip(cache, engine, "Xin chào") == url
+        assert engine.calls == 2
+        cache.discard(url)
+        assert await clip(cache, engine, "Xin chào") == url
+        assert engine.calls == 3 and cache.path(url).exists()
+
+    asyncio.run(scenario())
+    print("✅ Hits skipped the engine")
+
+
+def test_load():
+    """Clips already on disk are indexed oldest first and trimmed to the limits"""
+    print("\n📂 Testing TTS cache load...")
+
+    async def scenario():
+        cache, engine = make_cache(), FakeEngine()
+        urls = [await clip(cache, engine, text) for text in "abc"]
+        for age, url in enumerate(reversed(urls)):
+            os.utime(cache.path(url), (1000 - age, 1000 - age))
+        (cache.directory / "other.wav").write_bytes(b"not a clip")
+
+        reloaded = TTSCache(cache.directory, max_entries=2, max_bytes=10 ** 6)
+        await reloaded.load()
+        assert list(reloaded._index) == [Path(url).name for url in urls[1:]]
+        assert not cache.path(urls[0]).exists()
+        assert (cache.directory / "other.wav").exists()
+        assert reloaded.contains(TTSCache.key("c", "vi-VN", 1.0, "fake"), "mp3")
+
+        # The first request loads a cache that was never loaded, once
+        lazy = TTSCache(cache.directory, max_entries=2, max_bytes=10 ** 6)
+        await asyncio.gather(*(clip(lazy, engine, "c") for _ in range(3)))
+        assert engine.calls == 3 and len(lazy._index) == 2
+
+    asyncio.run(scenario())
+    print("✅ Existing clips indexed without blocking the loop")
+
+
+def test_eviction():
+    """Least recently used clips go first when entries or bytes exceed the limits"""
+    print("\n🧹 Testing TTS cache eviction...")
+
+    async def scenario():
+        cache, engine = make_cache(max_entries=2), FakeEngine()
+        first = await clip(cache, engine, "a")
+        second = await clip(cache, engine, "b")
+        await clip(cache, engine, "a")  # "b" is now the least recently used
+        await clip(cache, engine, "c")
+        assert len(cache._index) == 2
+        assert cache.path(first).exists() and not cache.path(second).exists()
+
+        cache, engine = make_cache(max_bytes=250), FakeEngine(size=100)
+        urls = [await clip(cache, engine, text) for text in "xyz"]
+        assert cache._total_bytes == 200
+        assert not cache.path(urls[0]).exists()
+        assert all(cache.path(url).exists() for url in urls[1:])
+
+    asyncio.run(scenario())
+    print("✅ Limits enforced oldest first")
+
+
+def test_single_flight():
+    """Concurrent misses for one clip share a single synthesis"""
+    print("\n🔀 Testing TTS cache single-flight...")
+    cache, engine = make_cache(), FakeEngine(delay=0.05)
+
+    async def scenario():
+        urls = await asyncio.gather(*(clip(cache, engine, "Xin chào") for _ in range(5)))
+        assert len(set(urls)) == 1
+        assert engine.calls == 1
+
+    asyncio.run(scenario())
+    print("✅ Five callers, one synthesis")
+
+
+def test_cancelled_first_caller():
+    """Cancelling the caller that started a synthesis does not fail the others"""
+    print("\n🛑 Testing cancelled first caller...")
+    cache, engine = make_cache(), FakeEngine(delay=0.1)
+
+    async def scenario():
+        first = asyncio.ensure_future(clip(cache, engine, "Xin chào"))
+        await asyncio.sleep(0.01)
+        second = asyncio.ensure_future(clip(cache, engine, "Xin chào"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+
+        url = await second
+        assert first.cancelled() and not second.cancelled()
+        assert cache.path(url).exists()
+        assert engine.calls == 1
+
+        # Abandoned by every caller, the clip is still cached for the next one
+        lone = asyncio.ensure_future(clip(cache, engine, "Tạm biệt"))
+        await asyncio.sleep(0.01)
+        lone.cancel()
+        await asyncio.sleep(0.15)
+        await clip(cache, engine, "Tạm biệt")
+        assert engine.calls == 2
+
+    asyncio.run(scenario())
+    print("✅ Waiter got the URL after the first caller was cancelled")
+
+
+def test_failed_synthesis():
+    """A failed synthesis reaches every waiter, leaves no file and is retried next time"""
+    print("\n💥 Testing failed synthesis...")
+    cache = make_cache()
+
+    async def failing(path: Path):
+        await asyncio.sleep(0.02)
+        path.write_bytes(b"partial")
+        raise RuntimeError("engine down")
+
+    async def scenario():
+        key = TTSCache.key("Xin chào", "vi-VN", 1.0, "fake")
+        results = await asyncio.gather(
+            cache.get_or_create(key, "mp3", failing),
+            cache.get_or_create(key, "mp3", failing), return_exceptions=True)
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert not list(cache.directory.iterdir())
+        assert await clip(cache, FakeEngine(), "Xin chào")
+
+    asyncio.run(scenario())
+    print("✅ Failure propagated and retried")
+
+
+def test_read():
+    """Readers get the clip's bytes, even when its file went missing or others evict around it"""
+    print("\n📖 Testing TTS cache reads...")
+
+    async def scenario():
+        cache, engine = make_cache(max_entries=1), FakeEngine()
+        key = TTSCache.key("a", "vi-VN", 1.0, "fake")
+        assert await cache.read(key, "mp3", engine.synthesizer("a")) == b"a" * 100
+        assert await cache.read(key, "mp3", engine.synthesizer("a")) == b"a" * 100
+        assert engine.calls == 1
+
+        # Removed behind the cache's back: synthesised again instead of failing
+        cache.path(await clip(cache, engine, "a")).unlink()
+        assert await cache.read(key, "mp3", engine.synthesizer("a")) == b"a" * 100
+        assert engine.calls == 2
+
+        # A clip being read is not evicted by clips stored meanwhile
+        url = await clip(cache, engine, "a")
+        cache._reading[Path(url).name] = 1
+        await clip(cache, engine, "b")
+        assert cache.path(url).exists() and len(cache._index) == 2
+        del cache._reading[Path(url).name]
+        await clip(cache, engine, "c")
+        assert not cache.path(url).exists() and len(cache._index) == 1
+
+    asyncio.run(scenario())
+    print("✅ Missing clips resynthesised, pinned clips kept")
+
+
+def test_stream_survives_missing_clips():
+    """A TTS stream resynthesises sentences whose cached files were cleaned up"""
+    print("\n🌊 Testing TTS stream with missing clips...")
+    from app import service as service_module
+
+    class FakeBackend:
+        name = "fake"
+        extension = "mp3"
+
+    cache, engine = make_cache(), FakeEngine()
+    patched = {"tts_cache": cache, "tts_backend_class": FakeBackend}
+    saved = {name: getattr(service_module, name) for name in patched}
+    service = service_module.VoiceAgentService()
+    service._speech_synthesizer = lambda text, language, voice_speed: engine.synthesizer(text)
+
+    async def stream():
+        return [chunk async for chunk in service.stream_speech("Xin chào. Tạm biệt.", None)]
+
+    async def scenario():
+        first = await stream()
+        assert first == [b"X" * 100, b"T" * 100] and engine.calls == 2
+        for path in cache.directory.iterdir():
+            path.unlink()
+        assert await stream() == first
+        assert engine.calls == 4
+
+    for name, value in patched.items():
+        setattr(service_module, name, value)
+    try:
+        asyncio.run(scenario())
+    finally:
+        for name, value in saved.items():
+            setattr(service_module, name, value)
+    print("✅ Stream completed after the clips were deleted")
+
+
+def main():
+    """Run the offline TTS cache tests"""
+    print("🚀 TTS Cache Tests (offline)")
+    print("=" * 50)
+    test_hit_and_miss()
+    test_load()
+    test_eviction()
+    test_single_flight()
+    test_cancelled_first_caller()
+    test_failed_synthesis()
+    test_read()
+    test_stream_survives_missing_clips()
+    print("\n🎉 All TTS cache tests passed!")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,7 @@ Test script for the Voice Agent API
 import asyncio
 import requests
 import json
+import time
 from pathlib import Path
 import tempfile
 import wave
@@ -92,6 +93,40 @@ def test_text_to_speech():
     except Exception as e:
         print(f"❌ TTS error: {e}")
 
+def test_streaming_text_to_speech():
+    """Test the streaming text-to-speech endpoint"""
+    print("\n📡 Testing streaming text-to-speech...")
+    try:
+        tts_data = {
+            "text": "Xin chào! Tôi là voice agent của Figuro. Bạn cần hỗ trợ gì?",
+            "language": "vi-VN",
+            "voice_speed": 1.0
+        }
+
+        start_time = time.time()
+        response = requests.post(
+            f"{BASE_URL}/voice/text-to-speech/stream",
+            json=tts_data,
+            stream=True
+        )
+
+        if response.status_code == 200:
+            first_byte_ms = None
+            total_bytes = 0
+            for chunk in response.iter_content(chunk_size=None):
+                if first_byte_ms is None:
+                    first_byte_ms = int((time.time() - start_time) * 1000)
+                total_bytes += len(chunk)
+            total_ms = int((time.time() - start_time) * 1000)
+            print(f"✅ Streaming TTS successful: {total_bytes} bytes "
+                  f"({response.headers.get('content-type')})")
+            print(f"   First byte: {first_byte_ms}ms, total: {total_ms}ms")
+        else:
+            print(f"❌ Streaming TTS failed: {response.status_code}")
+            print(f"   Response: {response.text}")
+    except Exception as e:
+        print(f"❌ Streaming TTS error: {e}")
+
 def test_voice_processing():
     """Test the voice processing endpoint"""
     print("\n🎤 Testing voice processing...")
@@ -170,6 +205,7 @@ def main():
     test_health_check()
     test_supported_languages()
     test_text_to_speech()
+    test_streaming_text_to_speech()
     test_voice_processing()
     test_cleanup()
     
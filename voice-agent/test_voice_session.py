@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Offline tests for the WebSocket voice session: VAD endpointing, replies
+running beside the receive loop, and barge-in, with a fake voice service
+"""
+
+import asyncio
+import json
+import time
+from typing import AsyncIterator
+
+import numpy as np
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from app.schemas import Intent, SupportedLanguage, VoiceResponse
+from app.session import VoiceSession
+
+SAMPLE_RATE = 16000
+
+
+def pcm(kind: str, ms: int) -> bytes:
+    """16-bit mono PCM: quiet room noise or a voiced, speech-like tone"""
+    samples = SAMPLE_RATE * ms // 1000
+    rng = np.random.default_rng(ms)
+    if kind == "silence":
+        signal = rng.normal(0, 30, samples)
+    else:
+        t = np.arange(samples) / SAMPLE_RATE
+        signal = 8000 * (np.sin(2 * np.pi * 180 * t) + 0.5 * np.sin(2 * np.pi * 360 * t))
+    return signal.astype(np.int16).tobytes()
+
+
+class FakeVoiceService:
+    """Recognises every utterance as "xin chào" and speaks the reply in slow chunks"""
+
+    def __init__(self, chunks: int = 3, chunk_delay: float = 0.0):
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.recognised = 0
+
+    async def recognize(self, pcm: bytes, language: SupportedLanguage):
+        self.recognised += 1
+        return f"xin chào {self.recognised}"
+
+    async def process_transcript(self, transcript: str, language: SupportedLanguage,
+                                 enable_tts: bool = False, start_time=None) -> VoiceResponse:
+        return VoiceResponse(
+            transcript=transcript, intent=Intent.GREETING, entities=[], confidence=0.9,
+            response_text="Xin chào! Tôi có thể giúp gì cho bạn?", processing_time_ms=1)
+
+    def tts_media_type(self) -> str:
+        return "audio/mpeg"
+
+    async def stream_speech(self, text: str, language: SupportedLanguage) -> AsyncIterator[bytes]:
+        for _ in range(self.chunks):
+            await asyncio.sleep(self.chunk_delay)
+            yield b"\xff\xfb" + b"\x00" * 64
+
+
+def make_app(service: FakeVoiceService) -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/session")
+    async def session(websocket: WebSocket):
+        await websocket.accept()
+        await VoiceSession(websocket, service, SupportedLanguage.VIETNAMESE).run()
+
+    return app
+
+
+def send_audio(ws, audio: bytes, frame_ms: int = 30):
+    frame = SAMPLE_RATE * 2 * frame_ms // 1000
+    for start in range(0, len(audio), frame):
+        ws.send_bytes(audio[start:start + frame])
+
+
+def receive_until(ws, message_type: str, limit: int = 200) -> list:
+    """Messages up to and including the first JSON message of the given type"""
+    messages = []
+    for _ in range(limit):
+        message = ws.receive()
+        if message.get("text") is not None:
+            payload = json.loads(message["text"])
+            messages.append(payload)
+            if payload["type"] == message_type:
+                return messages
+        else:
+            messages.append(message.get("bytes"))
+    raise AssertionError(f"no {message_type} in {messages}")
+
+
+def test_utterance_reply():
+    """An utterance ended by silence gets a final result and a spoken reply"""
+    print("🎙️  Testing voice session reply...")
+    service = FakeVoiceService()
+    with TestClient(make_app(service)).websocket_connect("/session") as ws:
+        assert ws.receive_json()["type"] == "ready"
+        send_audio(ws, pcm("silence", 600) + pcm("speech", 600) + pcm("silence", 900))
+
+        messages = receive_until(ws, "audio_end")
+        types = [m["type"] if isinstance(m, dict) else "audio" for m in messages]
+        assert types[0] == "speech_start"
+        final = next(m for m in messages if isinstance(m, dict) and m["type"] == "final")
+        assert final["transcript"] == "xin chào 1" and final["intent"] == "greeting"
+        assert types.index("final") < types.index("audio_start") < types.index("audio")
+        assert types.count("audio") == 3
+        assert messages[-1] == {"type": "audio_end", "interrupted": False}
+    print("✅ Final result and reply audio received")
+
+
+def test_barge_in():
+    """Speech during a reply is still heard: it cancels the reply and is answered"""
+    print("\n🗣️  Testing barge-in...")
+    service = FakeVoiceService(chunks=50, chunk_delay=0.05)
+    with TestClient(make_app(service)).websocket_connect("/session") as ws:
+        assert ws.receive_json()["type"] == "ready"
+        send_audio(ws, pcm("silence", 600) + pcm("speech", 600) + pcm("silence", 900))
+        receive_until(ws, "audio_start")
+        assert ws.receive().get("bytes")  # the reply is playing
+
+        # The user talks over it
+        start = time.perf_counter()
+        send_audio(ws, pcm("speech", 600) + pcm("silence", 900))
+        messages = receive_until(ws, "audio_end")
+        assert messages[-1] == {"type": "audio_end", "interrupted": True}
+        assert {"type": "speech_start"} in messages
+        assert time.perf_counter() - start < 2.0  # well before the 2.5 s reply would end
+
+        final = [m for m in receive_until(ws, "final") if isinstance(m, dict)][-1]
+        assert final["transcript"] == "xin chào 2"
+    print("✅ Reply interrupted and the new utterance answered")
+
+
+def main():
+    """Run the offline voice session tests"""
+    print("🚀 Voice Session Tests (offline)")
+    print("=" * 50)
+    test_utterance_reply()
+    test_barge_in()
+    print("\n🎉 All voice session tests passed!")
+
+
+if __name__ == "__main__":
+    main()